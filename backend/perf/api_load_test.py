@@ -0,0 +1,256 @@
+"""
+Load-test the API end to end with a realistic request mix and report throughput and latency per step.
+
+Closed-loop workers replay a weighted mix of scenarios for a fixed duration at each concurrency step:
+    upload       POST /pipeline/run with a corpus Excel file (files under EXCEL_FILES_DIR/<env_id>/)
+    leaderboard  GET  /benchmark?summary=true, revalidated with the ETag of the last answer
+    pipeline     GET  /benchmark/{pipeline_name}?summary=true
+    results      GET  /db/pipeline_results?limit=100
+The report (JSON) has, per step and scenario, requests, RPS, error rate, status codes and
+p50/p95/p99/max latency. With --baseline, the RPS and p95 of every step/scenario are compared to an
+earlier report, and the exit code is 1 when any got worse by more than --threshold.
+
+With --start-app, the app is started with uvicorn on --port, pointed at in-process stand-ins for n8n
+(perf.n8n_stub_server, with --n8n-latency) and Mick (perf.mick_stub_server); PostgreSQL still comes
+from POSTGRES_CONNECTION_STRING, use a throwaway database.
+
+Usage (from the backend directory):
+    python -m perf.api_load_test --start-app --concurrency 1,8,32 --duration 30 \\
+        --mix upload=1,leaderboard=6,pipeline=2,results=2 --output load_report.json
+    python -m perf.api_load_test --base-url http://127.0.0.1:8000/api/v1 --baseline load_report.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+from src.utils.constants import EXCEL_FILES_DIR
+
+SCENARIOS = ("upload", "leaderboard", "pipeline", "results")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Scenario weights from "upload=1,leaderboard=6,..." """
+    weights = {}
+    for item in filter(None, mix.split(",")):
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name}, expected one of {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+
+def corpus_files(excel_dir: str = EXCEL_FILES_DIR) -> List[Tuple[str, str, bytes]]:
+    """(env_id, file name, content) of every Excel file in the environment directories"""
+    files = []
+    for env_dir in sorted(Path(excel_dir).iterdir()):
+        if env_dir.is_dir():
+            for path in sorted(list(env_dir.glob("*.xlsx")) + list(env_dir.glob("*.xls"))):
+                files.append((env_dir.name, path.name, path.read_bytes()))
+    return files
+
+
+class Scenarios:
+    """The requests of each scenario, sent over one worker's session"""
+
+    def __init__(self, base_url: str, pipeline_name: str, pipeline_type: str, corpus: List[Tuple[str, str, bytes]],
+                 timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.pipeline_name = pipeline_name
+        self.pipeline_type = pipeline_type
+        self.corpus = corpus
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._leaderboard_etag: Optional[str] = None
+
+    def upload(self, rng: np.random.Generator) -> requests.Response:
+        env_id, file_name, content = self.corpus[int(rng.integers(len(self.corpus)))]
+        return self.session.post(f"{self.base_url}/pipeline/run", timeout=self.timeout,
+                                 files={"file": (file_name, content)},
+                                 data={"pipeline_name": self.pipeline_name, "env_id": env_id,
+                                       "pipeline_type": self.pipeline_type})
+
+    def leaderboard(self, rng: np.random.Generator) -> requests.Response:
+        headers = {"If-None-Match": self._leaderboard_etag} if self._leaderboard_etag else {}
+        response = self.session.get(f"{self.base_url}/benchmark", params={"summary": "true"}, headers=headers,
+                                    timeout=self.timeout)
+        self._leaderboard_etag = response.headers.get("ETag", self._leaderboard_etag)
+        return response
+
+    def pipeline(self, rng: np.random.Generator) -> requests.Response:
+        return self.session.get(f"{self.base_url}/benchmark/{self.pipeline_name}", params={"summary": "true"},
+                                timeout=self.timeout)
+
+    def results(self, rng: np.random.Generator) -> requests.Response:
+        return self.session.get(f"{self.base_url}/db/pipeline_results",
+                                params={"pipeline_name": self.pipeline_name, "limit": 100}, timeout=self.timeout)
+
+
+def summarize(latencies: List[float], statuses: Counter, errors: int, elapsed: float) -> Dict[str, Any]:
+    """Counts, RPS and latency percentiles (ms) of one scenario or a whole step"""
+    values = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) if len(values) else (0.0, 0.0, 0.0)
+    return {"requests": len(latencies), "errors": errors,
+            "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+            "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2), "p99_ms": round(float(p99), 2),
+            "max_ms": round(float(values.max()), 2) if len(values) else 0.0,
+            "status_codes": dict(sorted((str(code), count) for code, count in statuses.items()))}
+
+
+def run_step(make_scenarios: Callable[[], Scenarios], mix: Dict[str, float], concurrency: int, duration: float,
+             seed: int) -> Dict[str, Any]:
+    """Run `concurrency` closed-loop workers for `duration` seconds"""
+    names = list(mix)
+    probabilities = np.array([mix[name] for name in names]) / sum(mix.values())
+    lock = threading.Lock()
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    statuses: Dict[str, Counter] = {name: Counter() for name in names}
+    errors: Counter = Counter()
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_index: int):
+        rng = np.random.default_rng([seed, concurrency, worker_index])
+        scenarios = make_scenarios()
+        while time.perf_counter() < deadline:
+            name = names[int(rng.choice(len(names), p=probabilities))]
+            start = time.perf_counter()
+            try:
+                status = getattr(scenarios, name)(rng).status_code
+            except requests.RequestException as e:
+                status = type(e).__name__
+            latency = time.perf_counter() - start
+            with lock:
+                latencies[name].append(latency)
+                statuses[name][status] += 1
+                # 304 is the expected answer to a revalidated leaderboard poll
+                if not (isinstance(status, int) and (status < 400)):
+                    errors[name] += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    all_statuses = sum(statuses.values(), Counter())
+    return {"concurrency": concurrency, "duration_s": round(elapsed, 2),
+            "overall": summarize([value for name in names for value in latencies[name]], all_statuses,
+                                 sum(errors.values()), elapsed),
+            "scenarios": {name: summarize(latencies[name], statuses[name], errors[name], elapsed) for name in names}}
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Lines describing the RPS and p95 changes against a baseline report; regressions are marked"""
+    lines = []
+    baseline_steps = {step["concurrency"]: step for step in baseline.get("steps", [])}
+    for step in report["steps"]:
+        before_step = baseline_steps.get(step["concurrency"])
+        if before_step is None:
+            continue
+        for name, after in [("overall", step["overall"]), *step["scenarios"].items()]:
+            before = before_step["overall"] if name == "overall" else before_step["scenarios"].get(name)
+            if not before or not before["requests"] or not after["requests"]:
+                continue
+            rps_change = after["rps"] / before["rps"] - 1 if before["rps"] else 0.0
+            p95_change = after["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+            regressed = rps_change < -threshold or p95_change > threshold
+            lines.append(f"{'REGRESSION ' if regressed else ''}c={step['concurrency']} {name}: "
+                         f"rps {before['rps']} -> {after['rps']} ({rps_change:+.1%}), "
+                         f"p95 {before['p95_ms']} -> {after['p95_ms']} ms ({p95_change:+.1%})")
+    return lines
+
+
+def start_app(port: int, n8n_latency: str) -> Tuple[subprocess.Popen, list]:
+    """uvicorn with the app pointed at local n8n and Mick stand-ins; returns the process and the stub servers"""
+    from perf.mick_stub_server import start_stub_server as start_mick_stub
+    from perf.n8n_stub_server import StubProfile, start_stub_server as start_n8n_stub
+    n8n_server, n8n_url = start_n8n_stub(0, StubProfile(latency=n8n_latency))
+    mick_server, mick_url = start_mick_stub(0)
+    env = dict(os.environ, N8N_URL=n8n_url, MICK_API_BASE_URL=mick_url, MICK_MOCK_SCHEMAS="false")
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port), "--log-level", "warning"],
+                               env=env)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/api/v1/", timeout=1).ok:
+                return process, [n8n_server, mick_server]
+        except requests.RequestException:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("The app did not become healthy within 60 seconds")
+
+
+def main(args: argparse.Namespace) -> int:
+    mix = parse_mix(args.mix)
+    corpus = corpus_files(args.excel_dir)
+    if "upload" in mix and not corpus:
+        raise SystemExit(f"No Excel files under {args.excel_dir}/<env_id>/ to upload")
+    process, stubs = start_app(args.port, args.n8n_latency) if args.start_app else (None, [])
+    base_url = f"http://127.0.0.1:{args.port}/api/v1" if args.start_app else args.base_url
+    report: Dict[str, Any] = {"config": {"base_url": base_url, "mix": mix, "duration_s": args.duration, "seed": args.seed,
+                                         "pipeline_name": args.pipeline_name, "pipeline_type": args.pipeline_type,
+                                         "corpus_files": len(corpus), "n8n_latency": args.n8n_latency if args.start_app else None},
+                              "steps": []}
+    try:
+        make_scenarios = lambda: Scenarios(base_url, args.pipeline_name, args.pipeline_type, corpus, args.timeout)
+        if args.warmup:
+            run_step(make_scenarios, mix, 1, args.warmup, args.seed)
+        for concurrency in [int(value) for value in args.concurrency.split(",")]:
+            step = run_step(make_scenarios, mix, concurrency, args.duration, args.seed)
+            report["steps"].append(step)
+            overall = step["overall"]
+            print(f"c={concurrency}: {overall['rps']} rps, p50 {overall['p50_ms']} ms, p95 {overall['p95_ms']} ms, "
+                  f"p99 {overall['p99_ms']} ms, errors {overall['error_rate']:.1%}", file=sys.stderr)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        for stub in stubs:
+            stub.shutdown()
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+    if args.baseline:
+        lines = compare(report, json.loads(Path(args.baseline).read_text()), args.threshold)
+        print("\n".join(lines), file=sys.stderr)
+        return 1 if any(line.startswith("REGRESSION") for line in lines) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000/api/v1", help="API to load (ignored with --start-app)")
+    parser.add_argument("--start-app", action="store_true", help="Start the app with stub n8n and Mick backends")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --start-app")
+    parser.add_argument("--n8n-latency", default="lognormal:500:0.5", help="Latency profile of the n8n stub, see perf.n8n_stub_server")
+    parser.add_argument("--mix", default="upload=1,leaderboard=6,pipeline=2,results=2", help="Scenario weights")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated worker counts, one step each")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per step")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds at concurrency 1 before the steps, not reported")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Client timeout per request in seconds")
+    parser.add_argument("--pipeline-name", default="load_test", help="Name uploads are saved under and the pipeline scenario reads")
+    parser.add_argument("--pipeline-type", default="n8n_pipeline", help="Pipeline type used by uploads")
+    parser.add_argument("--excel-dir", default=EXCEL_FILES_DIR, help="Directory with <env_id>/ subdirectories of Excel files")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative RPS drop or p95 rise counted as a regression")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,121 @@
+"""
+Measure request-handler throughput of the blocking psycopg2 path against the asyncpg pool.
+
+Runs the same query the /db/pipeline_results route issues from many concurrent coroutines,
+once through the synchronous provider (as the routes used to do) and once through the async
+provider, and reports requests/second, latency percentiles and the worst event loop stall.
+
+Usage (from the backend directory, with PostgreSQL reachable via POSTGRES_CONNECTION_STRING):
+    python -m perf.async_db_throughput --concurrency 50 --requests 500 --query-delay-ms 5
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from src.providers.postgress import postgres_provider
+from src.providers.async_postgress import AsyncPostgreSQLProvider
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def measure(handler: Callable[[], Awaitable[None]], concurrency: int, total_requests: int) -> Dict[str, float]:
+    """Fire total_requests calls of handler with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    max_loop_lag = 0.0
+    done = asyncio.Event()
+
+    async def heartbeat():
+        # Detects how long the event loop was blocked between two 1ms ticks
+        nonlocal max_loop_lag
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            max_loop_lag = max(max_loop_lag, time.perf_counter() - start - 0.001)
+
+    async def one_request():
+        async with semaphore:
+            start = time.perf_counter()
+            await handler()
+            latencies.append(time.perf_counter() - start)
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(total_requests)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await heartbeat_task
+
+    return {
+        "requests": total_requests,
+        "elapsed_s": round(elapsed, 4),
+        "rps": round(total_requests / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_loop_lag_ms": round(max_loop_lag * 1000, 2),
+    }
+
+
+async def main(concurrency: int, total_requests: int, limit: int, query_delay_ms: float):
+    # The sync connection also creates/migrates the tables
+    postgres_provider.connect()
+    async_provider = AsyncPostgreSQLProvider(max_size=concurrency)
+    await async_provider.connect()
+
+    delay_s = query_delay_ms / 1000.0
+    # pg_sleep in FROM runs once per query and simulates a remote/busy database
+    sync_query = """
+        SELECT r.* FROM pg_sleep(%s) s,
+        (SELECT * FROM pipeline_results ORDER BY timestamp DESC LIMIT %s) r
+    """
+    async_query = """
+        SELECT r.* FROM pg_sleep($1) s,
+        (SELECT * FROM pipeline_results ORDER BY timestamp DESC LIMIT $2) r
+    """
+
+    async def blocking_handler():
+        with postgres_provider.connection.cursor() as cursor:
+            cursor.execute(sync_query, (delay_s, limit))
+            cursor.fetchall()
+
+    async def async_handler():
+        async with async_provider.pool.acquire() as conn:
+            await conn.fetch(async_query, delay_s, limit)
+
+    try:
+        report = {
+            "concurrency": concurrency,
+            "query_delay_ms": query_delay_ms,
+            "blocking_psycopg2": await measure(blocking_handler, concurrency, total_requests),
+            "async_pool": await measure(async_handler, concurrency, total_requests),
+        }
+        report["speedup"] = round(report["async_pool"]["rps"] / report["blocking_psycopg2"]["rps"], 2) \
+            if report["blocking_psycopg2"]["rps"] else None
+        print(json.dumps(report, indent=2))
+    finally:
+        await async_provider.disconnect()
+        postgres_provider.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent in-flight requests")
+    parser.add_argument("--requests", type=int, default=500, help="Total requests per provider")
+    parser.add_argument("--limit", type=int, default=100, help="Rows fetched per request")
+    parser.add_argument("--query-delay-ms", type=float, default=5.0,
+                        help="Simulated server-side query time, to mimic a remote database")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.requests, args.limit, args.query_delay_ms))
@@ -0,0 +1,72 @@
+"""
+Benchmark the bootstrap confidence intervals against plain index resampling.
+
+Draws a synthetic 0/1 correctness array (and a correlated second pipeline for the paired test),
+times the count-based bootstrap used by pipeline_statistics, and checks that its intervals agree
+with a chunked index-resampling bootstrap of the same arrays.
+
+Usage (from the backend directory):
+    python -m perf.bootstrap_benchmark --predictions 100000 --resamples 10000
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict
+
+import numpy as np
+
+from src.benchmarking.bootstrap import proportion_interval, paired_bootstrap
+
+
+def index_resampled_means(sample: np.ndarray, n_resamples: int, rng: np.random.Generator, chunk: int = 100) -> np.ndarray:
+    """Reference bootstrap: draw n indices per resample, vectorized over chunks of resamples"""
+    means = np.empty(n_resamples)
+    for start in range(0, n_resamples, chunk):
+        stop = min(start + chunk, n_resamples)
+        indices = rng.integers(0, len(sample), size=(stop - start, len(sample)))
+        means[start:stop] = sample[indices].mean(axis=1)
+    return means
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(n_predictions: int, n_resamples: int, reference_resamples: int, accuracy: float):
+    rng = np.random.default_rng(1)
+    correct_a = rng.random(n_predictions) < accuracy
+    # Pipeline b agrees with a on most items and is slightly worse
+    flip = rng.random(n_predictions) < 0.1
+    correct_b = np.where(flip, rng.random(n_predictions) < accuracy - 0.02, correct_a)
+    report: Dict[str, Any] = {"predictions": n_predictions, "resamples": n_resamples}
+
+    interval, report["interval_s"] = timed(proportion_interval, int(correct_a.sum()), n_predictions, 0.95, n_resamples)
+    report["accuracy"] = float(correct_a.mean())
+    report["interval"] = [round(bound, 5) for bound in interval]
+    comparison, report["paired_s"] = timed(paired_bootstrap, correct_a.astype(float), correct_b.astype(float), 0.95, n_resamples)
+    report["paired"] = {key: round(value, 5) if isinstance(value, float) else value for key, value in comparison.items()}
+
+    if reference_resamples:
+        reference, report["reference_interval_s"] = timed(index_resampled_means, correct_a.astype(float), reference_resamples, rng)
+        low, high = np.quantile(reference, [0.025, 0.975])
+        report["reference_interval"] = [round(float(low), 5), round(float(high), 5)]
+        # Both are Monte Carlo estimates of the same interval; allow a tenth of its width
+        tolerance = (interval[1] - interval[0]) / 10
+        report["agrees"] = bool(abs(low - interval[0]) <= tolerance and abs(high - interval[1]) <= tolerance)
+
+    print(json.dumps({k: round(v, 4) if isinstance(v, float) else v for k, v in report.items()}, indent=2))
+    if report.get("agrees") is False:
+        raise SystemExit("Count-based bootstrap interval differs from index resampling")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--predictions", type=int, default=100000, help="Number of synthetic predictions")
+    parser.add_argument("--resamples", type=int, default=10000, help="Bootstrap resamples")
+    parser.add_argument("--reference-resamples", type=int, default=2000,
+                        help="Resamples for the index-resampling reference (0 to skip)")
+    parser.add_argument("--accuracy", type=float, default=0.8, help="Accuracy of the synthetic pipeline")
+    args = parser.parse_args()
+    main(args.predictions, args.resamples, args.reference_resamples, args.accuracy)
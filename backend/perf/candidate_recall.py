@@ -0,0 +1,117 @@
+"""
+Measure recall@k of the candidate-schema retrieval index against the ground truth.
+
+For every Excel table with ground truth, ranks the schemas of its environment by the table's column
+names and checks whether each expected schema (fitted_schema of the ground truth) is among the top k.
+--distractors adds synthetic schemas built from common column vocabulary to every environment, to see
+how recall, index build time, query time and payload size behave as environments grow.
+
+Usage (from the backend directory):
+    python -m perf.candidate_recall --distractors 500 --k 1 2 3 5 10
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.benchmarking.ground_truth import ground_truth_index
+from src.pipeline.candidate_retrieval import CandidateIndex
+from src.providers.mick import get_database_schema
+from src.providers.schema_registry import RegisteredSchema
+from src.utils.constants import EXCEL_FILES_DIR
+
+# Words shared with real column names, so distractors compete with the true schemas
+VOCABULARY = ["id", "name", "code", "date", "status", "amount", "type", "user", "item", "product", "price",
+              "total", "count", "level", "email", "account", "customer", "order", "stock", "created", "updated",
+              "region", "category", "balance", "method", "address", "phone", "note", "flag", "rate"]
+
+
+def distractor_schemas(n_schemas: int, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    """Synthetic schemas of 3-8 fields named from VOCABULARY, with mapping history and descriptions"""
+    def name(words: int) -> str:
+        return "_".join(rng.choice(VOCABULARY, size=words, replace=False))
+
+    schemas = []
+    for schema_number in range(n_schemas):
+        fields = []
+        for field_number in range(int(rng.integers(3, 9))):
+            field_name = name(int(rng.integers(1, 3)))
+            fields.append({
+                "field_id": f"distractor_{schema_number}_{field_number}",
+                "field_name": field_name,
+                "example_values": [],
+                "mapping_history": [name(int(rng.integers(1, 3))) for _ in range(int(rng.integers(0, 3)))],
+                "description": f"The {field_name.replace('_', ' ')} of the record."
+            })
+        schemas.append({"schema_id": f"distractor_{schema_number}", "schema_name": f"Distractor {schema_number}",
+                        "description": "Synthetic schema", "fields": fields})
+    return schemas
+
+
+def main(excel_dir: str, distractors: int, ks: List[int]):
+    rng = np.random.default_rng(0)
+    hits = dict.fromkeys(ks, 0)
+    expected_total = 0
+    build_seconds, query_seconds, queries = 0.0, 0.0, 0
+    payload_bytes = {"all": 0, **{k: 0 for k in ks}}
+    tables: Dict[str, Any] = {}
+
+    for env_id in sorted(os.listdir(excel_dir)):
+        env_dir = os.path.join(excel_dir, env_id)
+        if not os.path.isdir(env_dir):
+            continue
+        env_schema = get_database_schema(env_id) or {"env_id": env_id, "schemas": []}
+        env_schema = {**env_schema, "schemas": env_schema["schemas"] + distractor_schemas(distractors, rng)}
+        registered = RegisteredSchema(env_id, env_schema)
+        schema_names = [schema.get("schema_name") for schema in env_schema["schemas"]]
+
+        start = time.perf_counter()
+        index = CandidateIndex(registered)
+        build_seconds += time.perf_counter() - start
+
+        for file_name in sorted(os.listdir(env_dir)):
+            table_name, extension = os.path.splitext(file_name)
+            ground_truth = ground_truth_index.get_table(table_name)
+            if extension not in (".xlsx", ".xls") or ground_truth is None:
+                continue
+            columns = list(pd.read_excel(os.path.join(env_dir, file_name), nrows=0).columns)
+            expected = {item.fitted_schema for item in ground_truth if item.fitted_schema}
+
+            start = time.perf_counter()
+            scores = index.schema_scores(columns)
+            query_seconds += time.perf_counter() - start
+            queries += 1
+            ranking = [schema_names[i] for i in np.argsort(-scores, kind="stable")]
+
+            tables[f"{env_id}/{table_name}"] = {"expected": sorted(expected),
+                                                "rank": {schema: ranking.index(schema) + 1 for schema in expected
+                                                         if schema in ranking}}
+            expected_total += len(expected)
+            payload_bytes["all"] += len(registered.json_bytes)
+            for k in ks:
+                hits[k] += len(expected & set(ranking[:k]))
+                top = index.top_schemas(columns, k)
+                payload_bytes[k] += len(registered.subset_json(top).encode("utf-8"))
+
+    report = {
+        "distractors_per_env": distractors,
+        "tables": tables,
+        "recall_at_k": {k: round(hits[k] / expected_total, 4) if expected_total else None for k in ks},
+        "payload_bytes": payload_bytes,
+        "index_build_ms": round(build_seconds * 1000, 3),
+        "query_ms_per_table": round(query_seconds * 1000 / max(queries, 1), 3)
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--excel-dir", default=EXCEL_FILES_DIR, help="Directory with one folder of Excel files per environment")
+    parser.add_argument("--distractors", type=int, default=0, help="Synthetic schemas added to every environment")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 2, 3, 5], help="Values of k to report recall for")
+    args = parser.parse_args()
+    main(args.excel_dir, args.distractors, args.k)
@@ -0,0 +1,144 @@
+"""
+Local stand-in for the Mick schema API, serving synthetic environments of configurable size.
+
+Any environment id is served: the built-in development environments (env1, env2) as they are, every
+other id as a synthetic environment generated deterministically from the id. Implements the routes
+MickClient uses, with ETags and 304 answers:
+    GET /api/environments/{env_id}/schema
+    GET /api/environments/schemas?env_ids=a,b[&etags=a:<etag>,b:<etag>]
+
+Usage (from the backend directory), then set MICK_MOCK_SCHEMAS=false:
+    python -m perf.mick_stub_server --port 8080 --schemas 200 --fields 15 --latency-ms 20
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from src.providers.mick import _mock_database_schema
+
+WORDS = ["id", "name", "code", "date", "status", "amount", "type", "user", "item", "product", "price", "total",
+         "count", "level", "email", "account", "customer", "order", "stock", "created", "updated", "region",
+         "category", "balance", "method", "address", "phone", "note", "flag", "rate", "country", "city"]
+REGEXES = ["^[0-9]+$", "^[0-9]+(\\.[0-9]{1,2})?$", "^[A-Z]{3}_[0-9]{4}$", "^[\\w.%+-]+@[\\w.-]+\\.[a-zA-Z]{2,}$", None, None]
+
+
+def synthetic_environment(env_id: str, n_schemas: int, n_fields: int) -> Dict[str, Any]:
+    """An EnvModel-shaped environment, identical for the same id and sizes"""
+    rng = np.random.default_rng(zlib.crc32(env_id.encode("utf-8")))
+
+    def name() -> str:
+        return "_".join(rng.choice(WORDS, size=int(rng.integers(1, 4)), replace=False))
+
+    schemas = []
+    for schema_number in range(n_schemas):
+        fields = []
+        for field_number in range(n_fields):
+            field_name = name()
+            options = list(rng.choice(WORDS, size=4, replace=False)) if rng.random() < 0.2 else None
+            fields.append({
+                "field_id": f"{env_id}_f{schema_number}_{field_number}",
+                "field_name": field_name,
+                "example_values": options[:3] if options else [f"{field_name}_{i}" for i in range(3)],
+                "mapping_history": [name() for _ in range(int(rng.integers(0, 4)))],
+                "value_options": options,
+                "regex": None if options else REGEXES[int(rng.integers(len(REGEXES)))],
+                "probability": f"{rng.uniform(0.8, 1.0):.2f}",
+                "description": f"The {field_name.replace('_', ' ')} of the {WORDS[schema_number % len(WORDS)]} record."
+            })
+        schemas.append({"schema_id": f"{env_id}_s{schema_number}", "schema_name": f"{env_id} schema {schema_number}",
+                        "description": f"Synthetic schema {schema_number} of {env_id}.", "fields": fields})
+    return {"env_id": env_id, "schemas": schemas}
+
+
+class StubEnvironments:
+    """Serialized environments and their ETags, generated on first request"""
+
+    def __init__(self, n_schemas: int, n_fields: int):
+        self.n_schemas = n_schemas
+        self.n_fields = n_fields
+        self._lock = threading.Lock()
+        self._environments: Dict[str, Tuple[str, Dict[str, Any], bytes]] = {}
+
+    def get(self, env_id: str) -> Tuple[str, Dict[str, Any], bytes]:
+        with self._lock:
+            if env_id not in self._environments:
+                schema = _mock_database_schema(env_id)
+                if not schema["schemas"]:
+                    schema = synthetic_environment(env_id, self.n_schemas, self.n_fields)
+                body = json.dumps(schema).encode("utf-8")
+                self._environments[env_id] = (f'"{hashlib.md5(body).hexdigest()}"', schema, body)
+            return self._environments[env_id]
+
+
+def make_handler(environments: StubEnvironments, latency: float):
+    class MickStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, like the real API behind a proxy
+
+        def _send(self, status: int, body: bytes = b"", etag: Optional[str] = None):
+            self.send_response(status)
+            if etag:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            if parts[-2:] == ["environments", "schemas"]:
+                query = parse_qs(url.query)
+                env_ids = [env_id for env_id in ",".join(query.get("env_ids", [])).split(",") if env_id]
+                known = dict(item.split(":", 1) for item in ",".join(query.get("etags", [])).split(",") if ":" in item)
+                response = {}
+                for env_id in env_ids:
+                    etag, schema, _ = environments.get(env_id)
+                    response[env_id] = {"etag": etag, "schema": None if known.get(env_id) == etag else schema}
+                self._send(200, json.dumps({"environments": response}).encode("utf-8"))
+            elif len(parts) >= 3 and parts[-3] == "environments" and parts[-1] == "schema":
+                etag, _, body = environments.get(parts[-2])
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, etag=etag)
+                else:
+                    self._send(200, body, etag)
+            else:
+                self._send(404, b'{"detail": "Not found"}')
+
+        def log_message(self, format, *args):
+            pass
+
+    return MickStubHandler
+
+
+def start_stub_server(port: int = 0, n_schemas: int = 50, n_fields: int = 10,
+                      latency_ms: float = 0.0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve the stub from a daemon thread; returns the server and its API base URL"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(StubEnvironments(n_schemas, n_fields), latency_ms / 1000))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--schemas", type=int, default=50, help="Schemas per synthetic environment")
+    parser.add_argument("--fields", type=int, default=10, help="Fields per synthetic schema")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every request")
+    args = parser.parse_args()
+    server, base_url = start_stub_server(args.port, args.schemas, args.fields, args.latency_ms)
+    print(f"Mick stub serving at {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,235 @@
+"""
+Local stand-in for the n8n schema-matching webhook, with configurable latency and failure profiles.
+
+Accepts the multipart POST N8NProvider.send_excel_file makes (file, env_id, job_id, env_schema) on any
+path and answers in the same [{"output": [...]}] format. Answers come from the ground truth: the request's
+columns are looked up in the ground truth table sharing most of them (other tables, then exact field
+names in the sent schema, for the rest). With --accuracy below 1, that share of columns is answered
+with a random other field of the sent schema instead.
+
+Every random choice (latency, failure, wrong answers) is drawn from a generator seeded by --seed, the
+env_id and the md5 of the uploaded workbook, so the same tables get the same answers in every run (job ids
+are timestamps or uuids and don't repeat). A job_id seen before is a retry and adds its attempt number,
+so a retried job gets a fresh draw. GET /stats returns request and outcome counters.
+
+Latency profiles (milliseconds), plus --per-column-ms for every column in the request:
+    fixed:<ms>    uniform:<low>:<high>    exponential:<mean>    lognormal:<median>:<sigma>
+
+Usage (from the backend directory), then set N8N_URL to the printed URL:
+    python -m perf.n8n_stub_server --port 5678 --latency lognormal:800:0.6 --per-column-ms 50 \\
+        --error-rate 0.02 --timeout-rate 0.01 --accuracy 0.9
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+import zlib
+from collections import Counter
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.benchmarking.ground_truth import ground_truth_index
+
+
+class StubProfile(NamedTuple):
+    """How the stub behaves; rates are per request and exclusive (error, then timeout, then malformed)"""
+    latency: str = "fixed:0"
+    per_column_ms: float = 0.0
+    error_rate: float = 0.0  # HTTP 500
+    timeout_rate: float = 0.0  # No answer for hang_s, so the client times out
+    malformed_rate: float = 0.0  # HTTP 200 with a body that is not JSON
+    accuracy: float = 1.0  # Share of columns answered from the ground truth
+    seed: int = 0
+    hang_s: float = 3600.0
+
+
+def latency_sampler(spec: str) -> Callable[[np.random.Generator], float]:
+    """A function drawing one latency in seconds from a profile like "lognormal:800:0.6" """
+    kind, *values = spec.split(":")
+    params = [float(value) / 1000 for value in values]
+    if kind == "fixed" and len(params) == 1:
+        return lambda rng: params[0]
+    if kind == "uniform" and len(params) == 2:
+        return lambda rng: float(rng.uniform(params[0], params[1]))
+    if kind == "exponential" and len(params) == 1:
+        return lambda rng: float(rng.exponential(params[0]))
+    if kind == "lognormal" and len(params) == 2:
+        # The sigma is unitless, undo the millisecond conversion
+        median, sigma = params[0], params[1] * 1000
+        return lambda rng: float(median * np.exp(sigma * rng.standard_normal()))
+    raise ValueError(f"Invalid latency profile {spec}, expected fixed:<ms>, uniform:<low>:<high>, "
+                     f"exponential:<mean> or lognormal:<median>:<sigma>")
+
+
+def parse_form(content_type: str, body: bytes) -> Dict[str, Tuple[Optional[str], bytes]]:
+    """The fields of a multipart/form-data body, {name: (filename, content)}"""
+    message = BytesParser(policy=default_policy).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body)
+    form = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name:
+            form[name] = (part.get_filename(), part.get_payload(decode=True) or b"")
+    return form
+
+
+def _schema_fields(env_schema: Dict[str, Any]) -> List[Tuple[str, str]]:
+    return [(schema.get("schema_name"), field.get("field_name"))
+            for schema in env_schema.get("schemas", []) for field in schema.get("fields") or []]
+
+
+def answer_columns(columns: List[str], env_schema: Dict[str, Any], accuracy: float,
+                   rng: np.random.Generator) -> List[Dict[str, str]]:
+    """n8n-style results for the columns, from the ground truth table that shares most of them"""
+    tables = ground_truth_index.tables()
+    requested = set(columns)
+    best_table = max(tables.values(), key=lambda rows: len(requested & {row.original_column for row in rows}), default=[])
+    expected = {row.original_column: row for row in best_table}
+    entries = {column: row for (_, column), row in ground_truth_index.entries().items()}
+    fields = _schema_fields(env_schema)
+    by_name = {field_name: (schema_name, field_name) for schema_name, field_name in reversed(fields)}
+
+    output = []
+    for column in columns:
+        row = expected.get(column) or entries.get(column)
+        if row is not None:
+            fitted = (row.fitted_schema, row.fitted_column)
+        else:
+            fitted = by_name.get(column, ("", ""))
+        if accuracy < 1.0 and fields and rng.random() >= accuracy:
+            others = [field for field in fields if field != fitted]
+            if others:
+                fitted = others[int(rng.integers(len(others)))]
+        output.append({"original_column": column, "fitted_schema": fitted[0], "fitted_column": fitted[1],
+                       "explanation": f"Stub answer for column '{column}'."})
+    return output
+
+
+class StubState:
+    """Seen job ids and outcome counters, shared by the handler threads"""
+
+    def __init__(self, profile: StubProfile):
+        self.profile = profile
+        self.latency = latency_sampler(profile.latency)
+        self._lock = threading.Lock()
+        self._attempts: Counter = Counter()
+        self.stats: Counter = Counter()
+
+    def rng_for(self, job_id: str, env_id: str, workbook: bytes) -> np.random.Generator:
+        """The generator of one request: seeded by the request's content, plus the attempt number on retries"""
+        with self._lock:
+            retries = self._attempts[job_id] if job_id else 0
+            self._attempts[job_id] += 1
+        key = f"{self.profile.seed}:{env_id}:{hashlib.md5(workbook).hexdigest()}"
+        if retries:
+            key += f":{retries}"
+        return np.random.default_rng(zlib.crc32(key.encode("utf-8")))
+
+    def count(self, **increments: int):
+        with self._lock:
+            self.stats.update(increments)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+
+def make_handler(state: StubState):
+    profile = state.profile
+
+    class N8NStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/stats"):
+                self._send(200, json.dumps(state.snapshot()).encode("utf-8"))
+            else:
+                self._send(404, b'{"message": "Not found"}')
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            form = parse_form(self.headers.get("Content-Type", ""), body)
+            job_id = form.get("job_id", (None, b""))[1].decode("utf-8")
+            env_id = form.get("env_id", (None, b""))[1].decode("utf-8")
+            rng = state.rng_for(job_id, env_id, form.get("file", (None, b""))[1])
+            try:
+                env_schema = json.loads(form["env_schema"][1]) if "env_schema" in form else {}
+                columns = [str(column) for column in pd.read_excel(BytesIO(form["file"][1]), nrows=0).columns]
+            except Exception as e:
+                state.count(requests=1, bad_requests=1)
+                self._send(400, json.dumps({"message": f"Invalid request: {e}"}).encode("utf-8"))
+                return
+
+            outcome = rng.random()
+            delay = state.latency(rng) + profile.per_column_ms / 1000 * len(columns)
+            state.count(requests=1, columns=len(columns))
+            if outcome < profile.error_rate:
+                time.sleep(delay)
+                state.count(errors=1)
+                self._send(500, b'{"message": "Error in workflow"}')
+            elif outcome < profile.error_rate + profile.timeout_rate:
+                state.count(timeouts=1)
+                time.sleep(profile.hang_s)
+                try:
+                    self._send(504, b'{"message": "Workflow timed out"}')
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client gave up, as intended
+            elif outcome < profile.error_rate + profile.timeout_rate + profile.malformed_rate:
+                time.sleep(delay)
+                state.count(malformed=1)
+                self._send(200, b"<html>Workflow could not be started</html>", "text/html")
+            else:
+                output = answer_columns(columns, env_schema, profile.accuracy, rng)
+                time.sleep(delay)
+                state.count(ok=1)
+                self._send(200, json.dumps([{"output": output}]).encode("utf-8"))
+
+        def log_message(self, format, *args):
+            pass
+
+    return N8NStubHandler
+
+
+def start_stub_server(port: int = 0, profile: StubProfile = StubProfile()) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve the stub from a daemon thread; returns the server and its webhook URL"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(StubState(profile)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/webhook/schema-matching"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=5678)
+    parser.add_argument("--latency", default="fixed:0", help="Latency profile per request, see above")
+    parser.add_argument("--per-column-ms", type=float, default=0.0, help="Latency added per column in the request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with HTTP 500")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Share of requests left hanging for --hang-s")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of requests answered with a non-JSON body")
+    parser.add_argument("--accuracy", type=float, default=1.0, help="Share of columns answered from the ground truth")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hang-s", type=float, default=3600.0)
+    args = parser.parse_args()
+    profile = StubProfile(args.latency, args.per_column_ms, args.error_rate, args.timeout_rate, args.malformed_rate,
+                          args.accuracy, args.seed, args.hang_s)
+    latency_sampler(profile.latency)  # Fail early on an invalid profile
+    server, url = start_stub_server(args.port, profile)
+    print(f"n8n stub serving at {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
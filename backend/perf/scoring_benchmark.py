@@ -0,0 +1,141 @@
+"""
+Benchmark the vectorized scoring engine against the per-row reference loop.
+
+Generates synthetic ground truth and prediction rows (including wrong matches, columns missing
+from the ground truth, tables without ground truth and NULL fields), checks that both
+implementations return identical statistics, and reports timings.
+
+Usage (from the backend directory):
+    python -m perf.scoring_benchmark --predictions 1000000
+"""
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List, Tuple
+
+from src.utils.models import MatchResultsModel
+from src.benchmarking.scoring import results_frame, ground_truth_frame, score_results_frame, score_match_lists
+
+
+def generate_corpus(n_predictions: int, n_tables: int, n_columns: int, seed: int = 0):
+    """Synthetic (gt_tables, gt_mapping, db_results) with roughly 70% correct predictions"""
+    rng = random.Random(seed)
+    gt_tables: Dict[str, List[MatchResultsModel]] = {}
+    gt_mapping: Dict[Tuple[str, str], MatchResultsModel] = {}
+    for t in range(n_tables):
+        table_name = f"table_{t}"
+        rows = []
+        for c in range(n_columns):
+            gt = MatchResultsModel(original_column=f"col_{c}", fitted_column=f"field_{c % 17}",
+                                   fitted_schema=f"schema_{t % 11}", explanation="ground truth")
+            rows.append(gt)
+            gt_mapping[(table_name, gt.original_column)] = gt
+        gt_tables[table_name] = rows
+
+    explanations = [f"The column looks like field {i} because of its values" for i in range(50)]
+    db_results = []
+    for i in range(n_predictions):
+        # A few tables have no ground truth file at all
+        t = rng.randrange(n_tables + max(1, n_tables // 20))
+        table_name = f"table_{t}"
+        # Some columns are not part of the ground truth
+        c = rng.randrange(n_columns + max(1, n_columns // 10))
+        roll = rng.random()
+        fitted_column = f"field_{c % 17}" if roll < 0.8 else f"field_{rng.randrange(17)}"
+        fitted_schema = f"schema_{t % 11}" if roll < 0.9 else f"schema_{rng.randrange(11)}"
+        explanation = None if roll > 0.999 else rng.choice(explanations)
+        db_results.append((f"job_{i // 50}", table_name, "synthetic_pipeline", f"env{t % 3}",
+                           f"col_{c}", fitted_column, fitted_schema, explanation))
+    return gt_tables, gt_mapping, db_results
+
+
+def reference_score(db_results: List[tuple], gt_tables: Dict[str, Any], gt_mapping: Dict[Tuple[str, str], MatchResultsModel]):
+    """The per-row scoring loop the vectorized engine replaced, with the same semantics"""
+    total_predictions = 0
+    total_accuracy = 0.0
+    total_schema_accuracy = 0.0
+    all_wrong_matches = []
+    for job_id, table_name, _, env_id, original_column, fitted_column, fitted_schema, explanation in db_results:
+        if table_name not in gt_tables:
+            continue
+        try:
+            prediction = MatchResultsModel(original_column=original_column, fitted_column=fitted_column,
+                                           fitted_schema=fitted_schema, explanation=explanation)
+        except Exception:
+            continue
+        if (table_name, original_column) in gt_mapping:
+            expected = gt_mapping[(table_name, original_column)]
+            pred_fitted_col = str(prediction.fitted_column) if prediction.fitted_column is not None else ""
+            pred_fitted_schema = str(prediction.fitted_schema) if prediction.fitted_schema is not None else ""
+            exp_fitted_col = str(expected.fitted_column) if expected.fitted_column is not None else ""
+            exp_fitted_schema = str(expected.fitted_schema) if expected.fitted_schema is not None else ""
+            is_correct = pred_fitted_col == exp_fitted_col and pred_fitted_schema == exp_fitted_schema
+            if not is_correct:
+                all_wrong_matches.append({
+                    'job_id': job_id, 'table_name': table_name, 'env_id': env_id,
+                    'original_column': original_column,
+                    'predicted_fitted_column': pred_fitted_col, 'predicted_fitted_schema': pred_fitted_schema,
+                    'expected_fitted_column': exp_fitted_col, 'expected_fitted_schema': exp_fitted_schema,
+                    'explanation': prediction.explanation
+                })
+            total_predictions += 1
+            total_accuracy += 1.0 if is_correct else 0.0
+            total_schema_accuracy += 1.0 if pred_fitted_schema == exp_fitted_schema else 0.0
+        else:
+            total_predictions += 1
+            all_wrong_matches.append({
+                'job_id': job_id, 'table_name': table_name, 'env_id': env_id,
+                'original_column': original_column,
+                'predicted_fitted_column': str(fitted_column), 'predicted_fitted_schema': str(fitted_schema),
+                'expected_fitted_column': "NOT_FOUND", 'expected_fitted_schema': "NOT_FOUND",
+                'explanation': prediction.explanation
+            })
+    return {
+        "accuracy": total_accuracy / total_predictions if total_predictions else 0.0,
+        "schema_accuracy": total_schema_accuracy / total_predictions if total_predictions else 0.0,
+        "wrong_matches": all_wrong_matches
+    }
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(n_predictions: int, n_tables: int, n_columns: int, skip_reference: bool):
+    gt_tables, gt_mapping, db_results = generate_corpus(n_predictions, n_tables, n_columns)
+    report: Dict[str, Any] = {"predictions": n_predictions, "ground_truth_columns": len(gt_mapping)}
+
+    gt_frame, report["ground_truth_frame_s"] = timed(ground_truth_frame, gt_mapping)
+    predictions, report["results_frame_s"] = timed(results_frame, db_results)
+    vectorized, report["vectorized_score_s"] = timed(score_results_frame, predictions, gt_frame, gt_tables.keys())
+    report["accuracy"] = vectorized["accuracy"]
+    report["wrong_matches"] = len(vectorized["wrong_matches"])
+
+    if not skip_reference:
+        reference, report["reference_score_s"] = timed(reference_score, db_results, gt_tables, gt_mapping)
+        report["identical"] = reference == vectorized
+        report["speedup"] = round(report["reference_score_s"] / report["vectorized_score_s"], 1)
+
+        # Positional metrics used by benchmark runs
+        sample = min(n_predictions, 100000)
+        predicted = [MatchResultsModel(original_column=row[4], fitted_column=row[5], fitted_schema=row[6],
+                                       explanation="") for row in db_results[:sample]]
+        expected = [gt_mapping.get((row[1], row[4]), predicted[i]) for i, row in enumerate(db_results[:sample])]
+        _, report["match_lists_score_s"] = timed(score_match_lists, predicted, expected)
+
+    print(json.dumps({k: round(v, 4) if isinstance(v, float) else v for k, v in report.items()}, indent=2))
+    if report.get("identical") is False:
+        raise SystemExit("Vectorized scoring differs from the reference implementation")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--predictions", type=int, default=1000000, help="Number of synthetic prediction rows")
+    parser.add_argument("--tables", type=int, default=200, help="Number of tables with ground truth")
+    parser.add_argument("--columns", type=int, default=40, help="Ground truth columns per table")
+    parser.add_argument("--skip-reference", action="store_true", help="Only time the vectorized engine")
+    args = parser.parse_args()
+    main(args.predictions, args.tables, args.columns, args.skip_reference)
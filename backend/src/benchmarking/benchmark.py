@@ -1,19 +1,42 @@
+import math
 import os
-from typing import List
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Collection, Dict, List, NamedTuple, Optional, Sequence, Tuple
 import pandas as pd
 from pathlib import Path
 
 from src.utils.models import MatchResultsModel
-from src.utils.constants import EXCEL_FILES_DIR, GROUND_TRUTH_DIR, RESULTS_DIR
-from src.utils.func_utils import load_excel_file, load_json, create_directory_if_not_exists
-from src.providers.postgress import postgres_provider
-from src.pipeline.pipelines.n8n_pipeline import N8NPipeline
+from src.utils.constants import EXCEL_FILES_DIR, GROUND_TRUTH_DIR, RESULTS_DIR, DEFAULT_PIPELINE_TYPE, RESULT_FLUSH_TIMEOUT
+from src.utils.func_utils import load_excel_file, create_directory_if_not_exists
+from src.providers.result_buffer import result_buffer
+from src.providers.schema_registry import schema_registry
+from src.pipeline.registry import pipeline_registry
 from src.benchmarking.pipeline_statistics import calculate_metrics_for_results
+from src.benchmarking.ground_truth import ground_truth_index
 from src.utils.logging_setup import get_logger
+from src.utils.timing import JobTimings
 
 logger = get_logger(__name__)
 
 
+class PipelineVariant(NamedTuple):
+    """One pipeline of a multi-pipeline (A/B) benchmark run"""
+    pipeline_name: str
+    pipeline_route: Optional[str] = None
+    pipeline_type: str = DEFAULT_PIPELINE_TYPE
+
+
+class BenchmarkOutput(NamedTuple):
+    """Result rows, per-job timings and the schema versions used by one benchmark() call"""
+    # (job_id, table_name, pipeline_name, env_id, original_column, fitted_column, fitted_schema, explanation)
+    rows: List[tuple]
+    job_timings: List[JobTimings]
+    # {content_hash: (env_id, schema)} of the environment schemas the jobs ran against
+    schema_versions: Dict[str, Tuple[str, Dict[str, Any]]]
+
+
 def get_excels_gt(excel_dir: str = None) -> List[MatchResultsModel]:
     """
     Retrieve ground truth Excel file mappings.
@@ -36,29 +59,48 @@ def get_excels_gt(excel_dir: str = None) -> List[MatchResultsModel]:
     
     for excel_file in excel_files:
         base_name = Path(excel_file).stem
-        gt_file = os.path.join(GROUND_TRUTH_DIR, f"{base_name}_gt.json")
+        ground_truth = ground_truth_index.get_table(base_name)
         
-        if os.path.exists(gt_file):
-            try:
-                gt_data = load_json(gt_file)
-                # Convert ground truth data to MatchResultsModel objects
-                for item in gt_data:
-                    if isinstance(item, dict):
-                        match_result = MatchResultsModel(**item)
-                        ground_truth_mappings.append(match_result)
-            except Exception as e:
-                logger.error(f"Error loading ground truth file {gt_file}: {str(e)}")
+        if ground_truth is not None:
+            ground_truth_mappings.extend(ground_truth)
         else:
-            logger.warning(f"Ground truth file not found for {excel_file}: {gt_file}")
+            logger.warning(f"Ground truth not found for {excel_file}: {base_name}_gt.json in {GROUND_TRUTH_DIR}")
     
     return ground_truth_mappings
 
 
-def benchmark(pipeline_name: str, env_id: str = "default_env", excel_dir: str = None, n8n_route: str = None, timeout: int = 600):
+def _excel_files(target_dir: str, tables: Optional[Collection[str]] = None) -> List[str]:
+    """The Excel files in a directory, only those with the given base names if tables is set"""
+    excel_files = [f for f in os.listdir(target_dir) if f.endswith(('.xlsx', '.xls'))]
+    if tables is not None:
+        excel_files = [f for f in excel_files if Path(f).stem in tables]
+    return excel_files
+
+
+def _flush_results(description: str, row_count: int, dead_lettered_before: int):
+    """Wait (up to RESULT_FLUSH_TIMEOUT) until the queued results are written to the database or spilled, and log which happened"""
+    flushed = result_buffer.flush(RESULT_FLUSH_TIMEOUT)
+    backlog = result_buffer.backlog()
+    dead_lettered = backlog["dead_lettered"] - dead_lettered_before
+    if not flushed:
+        logger.warning(f"{description}. {row_count} results queued, but they were not written within "
+                       f"{RESULT_FLUSH_TIMEOUT:g} seconds; they stay queued in the write buffer.")
+    elif backlog["spilled"]:
+        logger.warning(f"{description}. {row_count} results queued, but PostgreSQL is unreachable: {backlog['spilled']} "
+                       f"result batches are spilled to {result_buffer.spill_file} and will be replayed.")
+    elif dead_lettered:
+        logger.warning(f"{description}. {row_count} results queued, {dead_lettered} result batches were rejected by "
+                       f"PostgreSQL and moved to {result_buffer.dead_letter_file}.")
+    else:
+        logger.info(f"{description}. {row_count} results saved to database.")
+
+
+def benchmark(pipeline_name: str, env_id: str = "default_env", excel_dir: str = None, n8n_route: str = None, timeout: int = 600,
+              tables: Optional[Collection[str]] = None, pipeline_type: str = DEFAULT_PIPELINE_TYPE) -> BenchmarkOutput:
     """
     Accepts a pipeline name, gets the correct pipeline.
     Runs the pipeline on all Excel files in the specified directory.
-    Saves the results to PostgreSQL (statistics calculation will be done separately).
+    Queues the results for PostgreSQL through the write-behind buffer (statistics calculation will be done separately).
     
     Args:
         pipeline_name: Name of the pipeline to run (also used as the name saved in database)
@@ -66,16 +108,19 @@ def benchmark(pipeline_name: str, env_id: str = "default_env", excel_dir: str =
         excel_dir: Directory containing Excel files to process. If None, uses default EXCEL_FILES_DIR
         n8n_route: The route to use for the n8n pipeline
         timeout: Timeout in seconds for pipeline execution (default 600 seconds = 10 minutes)
+        tables: If given, only the Excel files with these base names are run (selective re-benchmarking)
+        pipeline_type: Registered pipeline type to run; files are processed concurrently up to its max_concurrency
+    
+    Returns:
+        BenchmarkOutput with the result rows of this run, for computing run breakdowns, the
+        load/encode/network/parse/persist timings of every job and the schema versions they used
     """
-    logger.info(f"Starting benchmark for pipeline: {pipeline_name}, environment: {env_id}")
+    logger.info(f"Starting benchmark for pipeline: {pipeline_name} ({pipeline_type}), environment: {env_id}")
+    dead_lettered_before = result_buffer.backlog()["dead_lettered"]
     
     try:
-        # Connect to database
-        postgres_provider.connect()
-        
-        # Get the pipeline - create with custom name, route, and timeout
-        from src.pipeline.pipelines.n8n_pipeline import N8NPipeline
-        pipeline = N8NPipeline(name=pipeline_name, n8n_route=n8n_route, timeout=timeout)
+        # Get the pipeline type - instances are created per job with the custom name, route, and timeout
+        spec = pipeline_registry.get(pipeline_type)
         
         # Determine which directory to process Excel files from
         target_dir = excel_dir if excel_dir else EXCEL_FILES_DIR
@@ -83,20 +128,22 @@ def benchmark(pipeline_name: str, env_id: str = "default_env", excel_dir: str =
         # Check if the directory exists
         if not os.path.exists(target_dir):
             logger.warning(f"Directory {target_dir} does not exist")
-            return
+            return BenchmarkOutput([], [], {})
         
         # Get all Excel files to process from the target directory
-        excel_files = [f for f in os.listdir(target_dir) if f.endswith(('.xlsx', '.xls'))]
+        excel_files = _excel_files(target_dir, tables)
         
         if not excel_files:
             logger.warning(f"No Excel files found in {target_dir}")
-            return
+            return BenchmarkOutput([], [], {})
         
         all_results = []
+        job_timings = []
+        schema_versions = {}
         ground_truth_data = get_excels_gt(excel_dir=target_dir)
         
-        # Run pipeline on each Excel file
-        for idx, excel_file in enumerate(excel_files):
+        def run_file(idx: int, excel_file: str) -> Optional[Tuple[JobTimings, List[tuple]]]:
+            """Run the pipeline on one Excel file, holding one of the pipeline type's concurrency slots"""
             logger.info(f"Processing file {idx+1}/{len(excel_files)}: {excel_file}")
             
             file_path = os.path.join(target_dir, excel_file)
@@ -104,57 +151,237 @@ def benchmark(pipeline_name: str, env_id: str = "default_env", excel_dir: str =
             
             logger.info(f"Processing file: {excel_file} with environment: {env_id}")
             
+            timings = None
             try:
-                # Load the Excel file
-                table_df = load_excel_file(file_path)
-                
                 # Generate a unique job ID for this run
                 job_id = f"benchmark_{pipeline_name}_{env_id}_{base_name}_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}"
+                # Derive table_name from the base_name or use a default
+                table_name = base_name if base_name else f"benchmark_table_{job_id}"
+                timings = JobTimings(job_id, pipeline_name, env_id, table_name)
                 
-                # Fetch the database schema for the environment
-                from src.providers.mick import get_database_schema
-                env_schema = get_database_schema(env_id)
+                # Load the Excel file
+                with timings.phase("load"):
+                    table_df = load_excel_file(file_path)
+                
+                # Fetch the database schema for the environment (cached by the schema registry)
+                registered = schema_registry.get(env_id)
+                env_schema = registered.schema
+                timings.schema_hash = registered.content_hash
                 
-                # Run the pipeline with the environment schema
-                pipeline.job_id = job_id
+                # Run a pipeline instance of its own, so concurrent jobs don't share job state
+                pipeline = spec.create(pipeline_name, job_id, n8n_route=n8n_route, timeout=timeout)
+                pipeline.timings = timings
                 logger.info(f"Starting pipeline execution for job {job_id}")
                 
-                results = pipeline.run(env_id, table_df, env_schema)
+                with spec.slot(n8n_route):
+                    results = pipeline.run(env_id, table_df, env_schema)
                 
                 logger.info(f"Pipeline execution completed for job {job_id}, got {len(results)} results")
                 
-                # Save individual results - derive table_name from the base_name or use a default
-                table_name = base_name if base_name else f"benchmark_table_{job_id}"
-                for result in results:
-                    postgres_provider.save_pipeline_result(job_id, table_name, pipeline_name, env_id, result)
-                    all_results.append({
-                        'job_id': job_id,
-                        'result': result
-                    })
+                # Queue results for saving
+                timings.rows = len(results)
+                with timings.phase("persist"):
+                    result_buffer.submit(job_id, table_name, pipeline_name, env_id, results)
+                rows = [(job_id, table_name, pipeline_name, env_id, result.original_column,
+                         result.fitted_column, result.fitted_schema, result.explanation) for result in results]
+                schema_versions[registered.content_hash] = (env_id, env_schema)
                 
                 logger.info(f"Completed processing {excel_file}, got {len(results)} results")
+                return timings, rows
                 
             except Exception as e:
                 logger.error(f"Error processing {excel_file} in environment {env_id}: {str(e)}")
                 import traceback
                 traceback.print_exc()
-                continue
+                # Failed jobs still report the phases they got through
+                return (timings, []) if timings is not None else None
+        
+        # Run pipeline on each Excel file, as many at once as the pipeline type allows; results keep file order
+        with ThreadPoolExecutor(max_workers=min(spec.max_concurrency, len(excel_files))) as executor:
+            for outcome in executor.map(run_file, range(len(excel_files)), excel_files):
+                if outcome is not None:
+                    job_timings.append(outcome[0])
+                    all_results.extend(outcome[1])
         
         # Note: Statistics/metrics calculation will be handled separately during statistics retrieval
         # Results are already saved per individual pipeline run in the database
         if all_results:
-            logger.info(f"Pipeline processing completed for {pipeline_name} in environment {env_id}. {len(all_results)} results saved to database.")
+            # Wait until this run's results are in the database (or spilled locally if it is down)
+            _flush_results(f"Pipeline processing completed for {pipeline_name} in environment {env_id}",
+                           len(all_results), dead_lettered_before)
         else:
             logger.warning(f"No results generated for pipeline {pipeline_name} in environment {env_id}")
-        
-        # Disconnect from database
-        postgres_provider.disconnect()
+        return BenchmarkOutput(all_results, job_timings, schema_versions)
         
     except Exception as e:
         logger.error(f"Error during benchmark for pipeline {pipeline_name} in environment {env_id}: {str(e)}")
         import traceback
         traceback.print_exc()
-        if postgres_provider.connection:
-            postgres_provider.disconnect()
         # Re-raise the exception to properly propagate errors
         raise
+
+
+def benchmark_variants(variants: Sequence[PipelineVariant], env_id: str = "default_env", excel_dir: str = None,
+                       timeout: int = 600, tables: Optional[Collection[str]] = None) -> Dict[str, BenchmarkOutput]:
+    """
+    Run several pipelines over the same tables of an environment, e.g. to compare n8n routes.
+    Every Excel file is listed and loaded once and the environment schema fetched once; pipelines with
+    the same encoding_key (all routes of the n8n pipeline) share one encoded request per table. Each
+    table is then fanned out to all variants concurrently, every job holding a slot of its pipeline
+    type for its route, so the variants' limits apply independently. Only as many tables are loaded
+    ahead as the workers can run, and a table's encoded requests are closed once all its jobs finished.
+    
+    Args:
+        variants: The pipelines to run, with distinct pipeline names
+        env_id: Environment ID to use for the pipelines
+        excel_dir: Directory containing Excel files to process. If None, uses default EXCEL_FILES_DIR
+        timeout: Timeout in seconds for each pipeline job
+        tables: If given, only the Excel files with these base names are run
+    
+    Returns:
+        {pipeline_name: BenchmarkOutput}, as benchmark() would return for each variant. Load and encode
+        times of shared work count in full for every variant, so job latencies stay comparable.
+    """
+    names = [variant.pipeline_name for variant in variants]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Pipeline names of a multi-pipeline run must be distinct, got {names}")
+    specs = {variant.pipeline_name: pipeline_registry.get(variant.pipeline_type) for variant in variants}
+    logger.info(f"Starting multi-pipeline benchmark of {', '.join(names)} in environment: {env_id}")
+    dead_lettered_before = result_buffer.backlog()["dead_lettered"]
+    
+    target_dir = excel_dir if excel_dir else EXCEL_FILES_DIR
+    if not os.path.exists(target_dir):
+        logger.warning(f"Directory {target_dir} does not exist")
+        return {name: BenchmarkOutput([], [], {}) for name in names}
+    excel_files = _excel_files(target_dir, tables)
+    if not excel_files:
+        logger.warning(f"No Excel files found in {target_dir}")
+        return {name: BenchmarkOutput([], [], {}) for name in names}
+    
+    registered = schema_registry.get(env_id)
+    env_schema = registered.schema
+    # Enough workers for every variant to use all of its slots
+    slot_keys = {(variant.pipeline_type, specs[variant.pipeline_name].slot_key(variant.pipeline_route)):
+                 specs[variant.pipeline_name].max_concurrency for variant in variants}
+    max_workers = min(sum(slot_keys.values()), len(excel_files) * len(variants))
+    # Tables loaded and encoded ahead of their jobs: enough to keep the workers busy, plus one being prepared
+    tables_in_flight = threading.BoundedSemaphore(math.ceil(max_workers / len(variants)) + 1)
+    
+    def run_job(variant: PipelineVariant, pipeline, timings: JobTimings, table_name: str, table_df: pd.DataFrame,
+                encoded: Any) -> Tuple[JobTimings, List[tuple]]:
+        spec = specs[variant.pipeline_name]
+        try:
+            logger.info(f"Starting pipeline execution for job {timings.job_id}")
+            with spec.slot(variant.pipeline_route):
+                if encoded is not None:
+                    results = pipeline.run(env_id, table_df, env_schema, encoded=encoded)
+                else:
+                    results = pipeline.run(env_id, table_df, env_schema)
+            timings.rows = len(results)
+            with timings.phase("persist"):
+                result_buffer.submit(timings.job_id, table_name, variant.pipeline_name, env_id, results)
+            return timings, [(timings.job_id, table_name, variant.pipeline_name, env_id, result.original_column,
+                              result.fitted_column, result.fitted_schema, result.explanation) for result in results]
+        except Exception as e:
+            logger.error(f"Error running {variant.pipeline_name} on {table_name} in environment {env_id}: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return timings, []
+    
+    def release_table(table_futures: List[Future], table_encoded: List[Any]):
+        """Close the table's encoded requests and free its place once all of its jobs are done"""
+        remaining = [len(table_futures)]
+        lock = threading.Lock()
+        
+        def release(_=None):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] > 0:
+                    return
+            for encoded in table_encoded:
+                encoded_requests.pop(id(encoded), None)
+                encoded.close()
+            tables_in_flight.release()
+        
+        if not table_futures:
+            remaining[0] = 1
+            release()
+        for future in table_futures:
+            future.add_done_callback(release)
+    
+    encoded_requests: Dict[int, Any] = {}  # The encoded requests not closed yet, by id
+    futures: Dict[str, List[Future]] = {name: [] for name in names}
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for idx, excel_file in enumerate(excel_files):
+                tables_in_flight.acquire()
+                logger.info(f"Processing file {idx+1}/{len(excel_files)}: {excel_file}")
+                table_name = Path(excel_file).stem
+                load_start = time.perf_counter()
+                try:
+                    table_df = load_excel_file(os.path.join(target_dir, excel_file))
+                except Exception as e:
+                    logger.error(f"Error loading {excel_file} in environment {env_id}: {str(e)}")
+                    tables_in_flight.release()
+                    continue
+                load_seconds = time.perf_counter() - load_start
+                
+                # encoding_key -> (request, encode seconds); None when encoding failed
+                shared: Dict[tuple, Optional[Tuple[Any, float]]] = {}
+                table_encoded, table_futures = [], []
+                for variant in variants:
+                    job_id = f"benchmark_{variant.pipeline_name}_{env_id}_{table_name}_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}"
+                    timings = JobTimings(job_id, variant.pipeline_name, env_id, table_name)
+                    timings.schema_hash = registered.content_hash
+                    timings.seconds["load"] += load_seconds
+                    pipeline = specs[variant.pipeline_name].create(variant.pipeline_name, job_id,
+                                                                   n8n_route=variant.pipeline_route, timeout=timeout)
+                    pipeline.timings = timings
+                    key = pipeline.encoding_key()
+                    if key is not None and key not in shared:
+                        encode_timings = JobTimings(job_id, variant.pipeline_name, env_id, table_name)
+                        pipeline.timings = encode_timings
+                        try:
+                            shared[key] = (pipeline.encode(env_id, table_df, env_schema), encode_timings.seconds["encode"])
+                            encoded_requests[id(shared[key][0])] = shared[key][0]
+                            table_encoded.append(shared[key][0])
+                        except Exception as e:
+                            logger.error(f"Error encoding {excel_file} for {variant.pipeline_name}: {str(e)}")
+                            shared[key] = None
+                        pipeline.timings = timings
+                    encoded = None
+                    if key is not None:
+                        if shared[key] is None:
+                            failed = Future()
+                            failed.set_result((timings, []))
+                            futures[variant.pipeline_name].append(failed)
+                            continue
+                        encoded, encode_seconds = shared[key]
+                        timings.seconds["encode"] += encode_seconds
+                    future = executor.submit(run_job, variant, pipeline, timings, table_name, table_df, encoded)
+                    futures[variant.pipeline_name].append(future)
+                    table_futures.append(future)
+                release_table(table_futures, table_encoded)
+            
+            outputs = {}
+            for name in names:
+                rows, job_timings = [], []
+                for future in futures[name]:
+                    timings, job_rows = future.result()
+                    job_timings.append(timings)
+                    rows.extend(job_rows)
+                versions = {registered.content_hash: (env_id, env_schema)} if rows else {}
+                outputs[name] = BenchmarkOutput(rows, job_timings, versions)
+    finally:
+        # Normally closed table by table already; covers a run interrupted while submitting
+        for encoded in list(encoded_requests.values()):
+            encoded.close()
+    
+    if any(output.rows for output in outputs.values()):
+        # Wait until this run's results are in the database (or spilled locally if it is down)
+        _flush_results(f"Multi-pipeline benchmark results of environment {env_id}",
+                       sum(len(output.rows) for output in outputs.values()), dead_lettered_before)
+    logger.info(f"Multi-pipeline benchmark completed in environment {env_id}: "
+                + ", ".join(f"{name} {len(outputs[name].rows)} results" for name in names))
+    return outputs
+
@@ -0,0 +1,133 @@
+from statistics import NormalDist
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.utils.constants import BOOTSTRAP_RESAMPLES, BOOTSTRAP_CONFIDENCE
+
+# Fixed seed so repeated requests for unchanged statistics return identical intervals
+BOOTSTRAP_SEED = 0
+
+
+def _resampled_means(values: np.ndarray, counts: np.ndarray, n_resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Means of n_resamples bootstrap resamples of a sample holding counts[i] copies of values[i].
+    How often each distinct value is drawn in one resample is multinomial, so drawing those counts
+    is the same resampling as drawing indices, at O(distinct values) instead of O(sample size) per resample.
+    """
+    n = int(counts.sum())
+    draws = rng.multinomial(n, counts / n, size=n_resamples)
+    return draws @ values / n
+
+
+def bootstrap_means(sample: np.ndarray, n_resamples: int = BOOTSTRAP_RESAMPLES,
+                    rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Means of n_resamples bootstrap resamples of a per-prediction (or per-item) score array"""
+    rng = rng if rng is not None else np.random.default_rng(BOOTSTRAP_SEED)
+    values, counts = np.unique(np.asarray(sample, dtype=float), return_counts=True)
+    return _resampled_means(values, counts, n_resamples, rng)
+
+
+def _interval(resampled: np.ndarray, confidence: float) -> Tuple[float, float]:
+    alpha = (1.0 - confidence) / 2
+    low, high = np.quantile(resampled, [alpha, 1.0 - alpha])
+    return float(low), float(high)
+
+
+def proportion_interval(successes: int, total: int, confidence: float = BOOTSTRAP_CONFIDENCE,
+                        n_resamples: int = BOOTSTRAP_RESAMPLES) -> Optional[Tuple[float, float]]:
+    """
+    Percentile bootstrap interval of an accuracy from its counts alone, equivalent to resampling
+    the 0/1 correctness array. None when there is nothing to resample.
+    """
+    if not total:
+        return None
+    rng = np.random.default_rng(BOOTSTRAP_SEED)
+    values = np.array([0.0, 1.0])
+    counts = np.array([total - successes, successes])
+    return _interval(_resampled_means(values, counts, n_resamples, rng), confidence)
+
+
+def wilson_interval(successes: int, total: int, confidence: float = BOOTSTRAP_CONFIDENCE) -> Optional[Tuple[float, float]]:
+    """
+    Wilson score interval of an accuracy from its counts, treating every prediction as independent.
+    Never zero width, even at 0% or 100% accuracy. None when total is 0.
+    """
+    if not total:
+        return None
+    z = NormalDist().inv_cdf(1.0 - (1.0 - confidence) / 2)
+    p = successes / total
+    center = (p + z * z / (2 * total)) / (1 + z * z / total)
+    half_width = z * np.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / (1 + z * z / total)
+    return float(center - half_width), float(center + half_width)
+
+
+def paired_bootstrap(scores_a: np.ndarray, scores_b: np.ndarray, confidence: float = BOOTSTRAP_CONFIDENCE,
+                     n_resamples: int = BOOTSTRAP_RESAMPLES) -> Dict[str, Any]:
+    """
+    Paired bootstrap of the accuracy difference between two pipelines scored on the same items.
+    Returns the observed mean difference (a - b), its percentile interval and a two-sided p-value
+    for "no difference".
+    """
+    differences = np.asarray(scores_a, dtype=float) - np.asarray(scores_b, dtype=float)
+    if not len(differences):
+        return {"items": 0, "difference": 0.0, "ci_low": None, "ci_high": None, "p_value": None}
+    resampled = bootstrap_means(differences, n_resamples)
+    low, high = _interval(resampled, confidence)
+    # Share of resamples on either side of zero; ties count towards both sides
+    p_value = min(1.0, 2 * min(float(np.mean(resampled <= 0)), float(np.mean(resampled >= 0))))
+    return {
+        "items": int(len(differences)),
+        "difference": float(differences.mean()),
+        "ci_low": low,
+        "ci_high": high,
+        "p_value": p_value
+    }
+
+
+def _cluster_resamples(n_clusters: int, n_resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """How often each cluster is drawn in each resample of the clusters, shape (n_resamples, n_clusters)"""
+    return rng.multinomial(n_clusters, np.full(n_clusters, 1.0 / n_clusters), size=n_resamples)
+
+
+def shrink_interval(estimate: float, low: float, high: float, sampled_fraction: float) -> Tuple[float, float]:
+    """Finite population correction: the interval closes as the sample approaches the whole population"""
+    factor = float(np.sqrt(max(0.0, 1.0 - sampled_fraction)))
+    return float(estimate - (estimate - low) * factor), float(estimate + (high - estimate) * factor)
+
+
+def ratio_interval(successes: np.ndarray, totals: np.ndarray, confidence: float = BOOTSTRAP_CONFIDENCE,
+                   n_resamples: int = BOOTSTRAP_RESAMPLES, sampled_fraction: float = 0.0) -> Optional[Tuple[float, float]]:
+    """
+    Percentile interval of sum(successes) / sum(totals) from resampling whole clusters (e.g. tables,
+    whose columns are not independent). sampled_fraction is the share of all clusters in the sample.
+    None when there is nothing to resample.
+    """
+    successes, totals = np.asarray(successes, dtype=float), np.asarray(totals, dtype=float)
+    if not len(totals) or not totals.sum():
+        return None
+    draws = _cluster_resamples(len(totals), n_resamples, np.random.default_rng(BOOTSTRAP_SEED))
+    drawn_totals = draws @ totals
+    resampled = (draws @ successes)[drawn_totals > 0] / drawn_totals[drawn_totals > 0]
+    low, high = _interval(resampled, confidence)
+    return shrink_interval(successes.sum() / totals.sum(), low, high, sampled_fraction)
+
+
+def paired_ratio_difference(successes_a: np.ndarray, totals_a: np.ndarray, successes_b: np.ndarray, totals_b: np.ndarray,
+                            confidence: float = BOOTSTRAP_CONFIDENCE, n_resamples: int = BOOTSTRAP_RESAMPLES,
+                            sampled_fraction: float = 0.0) -> Dict[str, Any]:
+    """
+    Paired cluster bootstrap of the accuracy difference (a - b) between two pipelines scored on the same
+    clusters, resampling clusters for both at once. Same keys as paired_bootstrap.
+    """
+    arrays = [np.asarray(values, dtype=float) for values in (successes_a, totals_a, successes_b, totals_b)]
+    if not len(arrays[1]) or not arrays[1].sum() or not arrays[3].sum():
+        return {"items": 0, "difference": 0.0, "ci_low": None, "ci_high": None, "p_value": None}
+    draws = _cluster_resamples(len(arrays[1]), n_resamples, np.random.default_rng(BOOTSTRAP_SEED))
+    drawn_a, drawn_b = draws @ arrays[1], draws @ arrays[3]
+    valid = (drawn_a > 0) & (drawn_b > 0)
+    resampled = (draws @ arrays[0])[valid] / drawn_a[valid] - (draws @ arrays[2])[valid] / drawn_b[valid]
+    difference = arrays[0].sum() / arrays[1].sum() - arrays[2].sum() / arrays[3].sum()
+    low, high = shrink_interval(difference, *_interval(resampled, confidence), sampled_fraction)
+    p_value = min(1.0, 2 * min(float(np.mean(resampled <= 0)), float(np.mean(resampled >= 0))))
+    return {"items": int(len(arrays[1])), "difference": float(difference), "ci_low": low, "ci_high": high, "p_value": p_value}
@@ -0,0 +1,112 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.benchmarking.ground_truth import GroundTruthIndex, ground_truth_index
+from src.benchmarking.scoring import results_frame, indexed_ground_truth, score_predictions
+from src.providers.postgress import postgres_session
+from src.utils.logging_setup import get_logger
+from src.utils.timing import JobTimings
+
+logger = get_logger(__name__)
+
+# Per-prediction outcome columns summed for every breakdown
+OUTCOME_COLUMNS = ["correct", "schema_correct", "column_correct", "nothing_compatible", "nothing_compatible_correct"]
+BREAKDOWN_DIMENSIONS = {"env": "env_id", "table": "table_name", "schema": "expected_schema"}
+
+
+def _metrics(sums: pd.Series, total_tests: int) -> Dict[str, Any]:
+    """Accuracy metrics from summed outcome columns, in the shape save_benchmark_results expects"""
+    if not total_tests:
+        return {"accuracy": 0.0, "schema_accuracy": 0.0, "column_accuracy": 0.0,
+                "nothing_compatible_accuracy": 0.0, "total_tests": 0}
+    nothing_compatible = int(sums["nothing_compatible"])
+    return {
+        "accuracy": int(sums["correct"]) / total_tests,  # Column+schema accuracy
+        "schema_accuracy": int(sums["schema_correct"]) / total_tests,
+        "column_accuracy": int(sums["column_correct"]) / total_tests,
+        # Accuracy on ground truth columns that have no compatible field (empty expected column)
+        "nothing_compatible_accuracy": (int(sums["nothing_compatible_correct"]) / nothing_compatible
+                                        if nothing_compatible else 0.0),
+        "total_tests": total_tests
+    }
+
+
+def _group_metrics(outcomes: pd.DataFrame, key: str) -> Dict[str, Dict[str, Any]]:
+    grouped = outcomes.groupby(key, sort=True, dropna=False)
+    sums = grouped[OUTCOME_COLUMNS].sum()
+    sizes = grouped.size()
+    return {name: _metrics(sums.loc[name], int(sizes.loc[name])) for name in sums.index}
+
+
+def compute_breakdowns(db_results: List[tuple], index: GroundTruthIndex = ground_truth_index) -> Dict[str, Any]:
+    """
+    Overall, per-env, per-table and per-(expected) schema metrics plus a schema confusion matrix
+    for stored result rows, from a single scoring pass.
+    Each row is (job_id, table_name, pipeline_name, env_id, original_column, fitted_column, fitted_schema, explanation).
+    """
+    predictions = results_frame(db_results)
+    gt_table_names, gt_frame = indexed_ground_truth(index)
+    scored = score_predictions(predictions, gt_frame, gt_table_names)
+
+    def column(name: str) -> np.ndarray:
+        return predictions[name].to_numpy(dtype=object)[scored.rows]
+
+    nothing_compatible = scored.expected_columns == ""
+    outcomes = pd.DataFrame({
+        "env_id": column("env_id"),
+        "table_name": column("table_name"),
+        "expected_schema": scored.expected_schemas,
+        "predicted_schema": column("fitted_schema"),
+        "correct": scored.correct,
+        "schema_correct": scored.schema_correct,
+        "column_correct": scored.column_correct,
+        "nothing_compatible": nothing_compatible,
+        "nothing_compatible_correct": nothing_compatible & scored.correct,
+    })
+
+    breakdowns: Dict[str, Any] = {
+        dimension: _group_metrics(outcomes, key) for dimension, key in BREAKDOWN_DIMENSIONS.items()
+    }
+    overall = _metrics(outcomes[OUTCOME_COLUMNS].sum(), len(outcomes))
+    # Every environment weighs the same, however many columns it was tested on
+    env_accuracies = [metrics["accuracy"] for metrics in breakdowns["env"].values()]
+    overall["env_accuracy"] = sum(env_accuracies) / len(env_accuracies) if env_accuracies else 0.0
+    breakdowns["overall"] = overall
+
+    confusion = outcomes.groupby(["expected_schema", "predicted_schema"], sort=True, dropna=False).size()
+    breakdowns["schema_confusion"] = [
+        {"expected_schema": expected, "predicted_schema": predicted, "count": int(count)}
+        for (expected, predicted), count in confusion.items()
+    ]
+
+    logger.info(f"Computed breakdowns over {len(outcomes)} scored predictions")
+    return breakdowns
+
+
+def record_benchmark_run(benchmark_run_id: str, pipeline_name: str, db_results: List[tuple],
+                         job_timings: Sequence[JobTimings] = (),
+                         schema_versions: Optional[Dict[str, Tuple[str, Dict[str, Any]]]] = None,
+                         run_kind: str = "full") -> Optional[Dict[str, Any]]:
+    """
+    Compute the breakdowns of a finished benchmark run from its result rows and persist them together
+    with the phase timings of its jobs, so historical breakdowns are lookups instead of rescans.
+    The schema versions the jobs ran against are stored for selective re-benchmarking.
+    run_kind marks runs over a subset of the tables ("selective" or "quick") apart from "full" ones.
+    The pipeline's earlier results of the tables the run produced results for are marked as superseded
+    (but kept), so the cumulative statistics count each table once, with its latest predictions.
+    """
+    breakdowns = compute_breakdowns(db_results) if db_results else None
+    # (env_id, table_name) -> job_id of the tables this run produced results for
+    table_jobs = {(row[3], row[1]): row[0] for row in db_results}
+    with postgres_session() as provider:
+        if breakdowns is not None:
+            provider.save_benchmark_breakdowns(benchmark_run_id, pipeline_name, breakdowns, run_kind, len(table_jobs))
+        if schema_versions:
+            provider.save_schema_versions(schema_versions)
+        if job_timings:
+            provider.save_job_timings(benchmark_run_id, job_timings)
+        provider.mark_superseded_results(pipeline_name, [(env_id, table_name, job_id)
+                                                         for (env_id, table_name), job_id in table_jobs.items()])
+    return breakdowns
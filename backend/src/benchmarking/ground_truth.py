@@ -0,0 +1,104 @@
+import hashlib
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.models import MatchResultsModel
+from src.utils.constants import GROUND_TRUTH_DIR
+from src.utils.func_utils import load_json
+from src.utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+GROUND_TRUTH_SUFFIX = "_gt.json"
+
+
+class GroundTruthIndex:
+    """
+    In-memory index of all `<table>_gt.json` files in the ground truth directory.
+    Maps (table_name, original_column) -> expected MatchResultsModel. Files are parsed once and
+    re-parsed only when their mtime changes (or they are added/removed), checked on every access.
+    """
+
+    def __init__(self, ground_truth_dir: str = GROUND_TRUTH_DIR):
+        self.ground_truth_dir = ground_truth_dir
+        self._lock = threading.Lock()
+        # file name -> mtime (ns) of the version currently loaded
+        self._mtimes: Dict[str, int] = {}
+        # (table name -> ground truth rows in file order, (table, column) -> expected), swapped as one tuple
+        self._snapshot: Tuple[Dict[str, List[MatchResultsModel]], Dict[Tuple[str, str], MatchResultsModel]] = ({}, {})
+        self._version = ""
+
+    def _scan(self) -> Dict[str, int]:
+        """Return the current mtime of every ground truth file"""
+        if not os.path.isdir(self.ground_truth_dir):
+            return {}
+        mtimes = {}
+        with os.scandir(self.ground_truth_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(GROUND_TRUTH_SUFFIX) and entry.is_file():
+                    mtimes[entry.name] = entry.stat().st_mtime_ns
+        return mtimes
+
+    def refresh(self):
+        """Reload the files that were added, changed or removed since the last load"""
+        mtimes = self._scan()
+        if mtimes == self._mtimes:
+            return
+        with self._lock:
+            if mtimes == self._mtimes:
+                return
+            tables = {}
+            for file_name, mtime in mtimes.items():
+                table_name = file_name[:-len(GROUND_TRUTH_SUFFIX)]
+                if self._mtimes.get(file_name) == mtime and table_name in self._snapshot[0]:
+                    tables[table_name] = self._snapshot[0][table_name]
+                    continue
+                gt_file_path = os.path.join(self.ground_truth_dir, file_name)
+                try:
+                    gt_data = load_json(gt_file_path)
+                    tables[table_name] = [MatchResultsModel(**item) for item in gt_data if isinstance(item, dict)]
+                    logger.info(f"Loaded ground truth for {table_name} ({len(tables[table_name])} columns)")
+                except Exception as e:
+                    logger.error(f"Error loading ground truth file {gt_file_path}: {str(e)}")
+
+            entries = {}
+            for table_name, ground_truth in tables.items():
+                for gt in ground_truth:
+                    entries[(table_name, gt.original_column)] = gt
+
+            # Swap in complete new structures so concurrent readers never see a partial index
+            self._snapshot = (tables, entries)
+            self._mtimes = mtimes
+            self._version = hashlib.md5(repr(sorted(mtimes.items())).encode('utf-8')).hexdigest()
+
+    @property
+    def version(self) -> str:
+        """Token that changes whenever any ground truth file is added, modified or removed"""
+        self.refresh()
+        return self._version
+
+    def snapshot(self) -> Tuple[Dict[str, List[MatchResultsModel]], Dict[Tuple[str, str], MatchResultsModel]]:
+        """Consistent (tables, entries) pair; use this when both are needed for one computation"""
+        self.refresh()
+        return self._snapshot
+
+    def entries(self) -> Dict[Tuple[str, str], MatchResultsModel]:
+        """The full (table_name, original_column) -> expected mapping"""
+        return self.snapshot()[1]
+
+    def tables(self) -> Dict[str, List[MatchResultsModel]]:
+        """Ground truth rows per table, for every table whose file loaded successfully"""
+        return self.snapshot()[0]
+
+    def get_table(self, table_name: str) -> Optional[List[MatchResultsModel]]:
+        """Ground truth rows for a table, or None if it has no (loadable) ground truth file"""
+        return self.tables().get(table_name)
+
+    def get_expected(self, table_name: str, original_column: str) -> Optional[MatchResultsModel]:
+        """Expected match for a column, or None if the column is not in the table's ground truth"""
+        return self.entries().get((table_name, original_column))
+
+
+# Global instance for easy access
+ground_truth_index = GroundTruthIndex()
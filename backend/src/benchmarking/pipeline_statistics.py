@@ -1,14 +1,23 @@
-from typing import List, Dict, Any
+import hashlib
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 from src.utils.models import MatchResultsModel
-from src.providers.postgress import postgres_provider
+from src.providers.postgress import postgres_session
 from src.utils.logging_setup import get_logger
-from src.utils.func_utils import load_json
-from src.utils.constants import GROUND_TRUTH_DIR
-import os
-from pathlib import Path
+from src.benchmarking.scoring import score_result_rows, score_match_lists
+from src.benchmarking.ground_truth import ground_truth_index
+from src.benchmarking.statistics_cache import pipeline_statistics_cache
+from src.benchmarking.bootstrap import proportion_interval, paired_bootstrap
+from src.providers.async_postgress import async_postgres_provider
+from src.utils.constants import STATISTICS_MEMO_SIZE
+from starlette.concurrency import run_in_threadpool
 
 logger = get_logger(__name__)
 
+# Last statistics payload per (pipeline or None for all pipelines, summary), served until its version changes;
+# least recently used entries are dropped beyond STATISTICS_MEMO_SIZE, as any pipeline name can be requested
+_statistics_memo: "OrderedDict[Tuple[Optional[str], bool], Tuple[str, Dict[str, Any]]]" = OrderedDict()
+
 
 def calculate_accuracy(predicted: MatchResultsModel, expected: MatchResultsModel) -> float:
     """
@@ -28,161 +37,217 @@ def calculate_schema_accuracy(predicted: MatchResultsModel, expected: MatchResul
         return 1.0
     return 0.0
 
+def score_pipeline_results(db_results: List[tuple]) -> Dict[str, Any]:
+    """
+    Score stored pipeline result rows against ground truth.
+    Each row is (job_id, table_name, pipeline_name, env_id, original_column, fitted_column, fitted_schema, explanation).
+    Returns only: column+schema accuracy, schema accuracy, and wrong matches
+    """
+    return score_result_rows(db_results)
+
+
 def calculate_pipeline_statistics_with_wrong_matches(pipeline_name: str):
     """
     Calculate statistics for a pipeline by comparing database results with ground truth
     Returns only: column+schema accuracy, schema accuracy, and wrong matches
     """
-    # Use a try-finally block to ensure the database connection is always closed
-    postgres_provider.connect()
-    
+    # The session closes its own connection, even if there's an exception
     try:
-        logger.info(f"Calculating statistics with wrong matches for pipeline: {pipeline_name}")
-        
-        # Get all pipeline results for the specified pipeline
-        with postgres_provider.connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT job_id, table_name, pipeline_name, env_id, original_column, 
-                       fitted_column, fitted_schema, explanation
-                FROM pipeline_results 
-                WHERE pipeline_name = %s
-                ORDER BY job_id, timestamp
-            """, (pipeline_name,))
-            db_results = cursor.fetchall()
-        
-        if not db_results:
-            logger.warning(f"No pipeline results found in database for pipeline: {pipeline_name}")
-            return {
-                "accuracy": 0.0,  # This is column+schema accuracy
-                "schema_accuracy": 0.0,
-                "wrong_matches": []
-            }
-        
-        # Calculate overall metrics across all jobs and collect wrong matches only
-        total_predictions = 0
-        total_accuracy = 0.0  # This is column+schema accuracy
-        total_schema_accuracy = 0.0
-        all_wrong_matches = []
-        
-        # Process each prediction against ground truth
-        for row in db_results:
-            job_id, table_name, pipeline_name_db, env_id, original_column, fitted_column, fitted_schema, explanation = row
+        with postgres_session() as provider:
+            logger.info(f"Calculating statistics with wrong matches for pipeline: {pipeline_name}")
             
-            # Load ground truth for this table
-            gt_file_path = os.path.join(GROUND_TRUTH_DIR, f"{table_name}_gt.json")
-            if os.path.exists(gt_file_path):
-                try:
-                    gt_data = load_json(gt_file_path)
-                    ground_truth = [MatchResultsModel(**item) for item in gt_data]
-                    
-                    # Create a mapping of original columns to ground truth for easier lookup
-                    gt_mapping = {}
-                    for gt in ground_truth:
-                        gt_mapping[gt.original_column] = gt
-                    
-                    # Create MatchResultsModel from database result
-                    prediction = MatchResultsModel(
-                        original_column=original_column,
-                        fitted_column=fitted_column,
-                        fitted_schema=fitted_schema,
-                        explanation=explanation
-                    )
-                    
-                    # Process prediction against ground truth
-                    if original_column in gt_mapping:
-                        expected = gt_mapping[original_column]
-                        
-                        # Check for correct match (add explicit string conversion to handle potential type mismatches)
-                        pred_fitted_col = str(prediction.fitted_column) if prediction.fitted_column is not None else ""
-                        pred_fitted_schema = str(prediction.fitted_schema) if prediction.fitted_schema is not None else ""
-                        exp_fitted_col = str(expected.fitted_column) if expected.fitted_column is not None else ""
-                        exp_fitted_schema = str(expected.fitted_schema) if expected.fitted_schema is not None else ""
-                        
-                        # Check for correct match
-                        is_correct = (pred_fitted_col == exp_fitted_col and 
-                                     pred_fitted_schema == exp_fitted_schema)
-                        
-                        # Only add to wrong matches if it's incorrect
-                        if not is_correct:
-                            wrong_match = {
-                                'job_id': job_id,
-                                'table_name': table_name,
-                                'env_id': env_id,
-                                'original_column': original_column,
-                                'predicted_fitted_column': pred_fitted_col,
-                                'predicted_fitted_schema': pred_fitted_schema,
-                                'expected_fitted_column': exp_fitted_col,
-                                'expected_fitted_schema': exp_fitted_schema,
-                                'explanation': prediction.explanation
-                            }
-                            all_wrong_matches.append(wrong_match)
-                        
-                        # Accumulate metrics
-                        total_predictions += 1
-                        total_accuracy += 1.0 if is_correct else 0.0
-                        total_schema_accuracy += 1.0 if pred_fitted_schema == exp_fitted_schema else 0.0
-                    else:
-                        logger.debug(f"Original column '{original_column}' not found in ground truth mapping for table '{table_name}'")
-                        # Still count this as an incorrect prediction since no ground truth exists for this column
-                        total_predictions += 1
-                        # Both accuracies remain at 0.0 for this entry
-                        wrong_match = {
-                            'job_id': job_id,
-                            'table_name': table_name,
-                            'env_id': env_id,
-                            'original_column': original_column,
-                            'predicted_fitted_column': str(fitted_column) if fitted_column is not None else "",
-                            'predicted_fitted_schema': str(fitted_schema) if fitted_schema is not None else "",
-                            'expected_fitted_column': "NOT_FOUND",
-                            'expected_fitted_schema': "NOT_FOUND",
-                            'explanation': prediction.explanation if 'prediction' in locals() else explanation
-                        }
-                        all_wrong_matches.append(wrong_match)
-                        
-                except Exception as e:
-                    logger.error(f"Error processing ground truth for {table_name}: {str(e)}")
-                    continue
-            else:
-                logger.warning(f"Ground truth file not found for {table_name}: {gt_file_path}")
-                # If ground truth file doesn't exist, we can't evaluate accuracy, so skip
-                continue
-        
-        # Calculate final averages
-        if total_predictions > 0:
-            final_metrics = {
-                "accuracy": total_accuracy / total_predictions,  # Column+schema accuracy
-                "schema_accuracy": total_schema_accuracy / total_predictions,
-            }
-        else:
-            final_metrics = {
-                "accuracy": 0.0,
-                "schema_accuracy": 0.0,
-            }
+            # Get the current results of the specified pipeline, with explanation keys instead of the texts
+            with provider.connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT j.name, t.name, p.name, e.name, r.original_column,
+                           r.fitted_column, r.fitted_schema, r.explanation_key
+                    FROM pipeline_result_rows r
+                    JOIN result_pipelines p ON p.id = r.pipeline_key
+                    LEFT JOIN result_jobs j ON j.id = r.job_key
+                    LEFT JOIN result_tables t ON t.id = r.table_key
+                    LEFT JOIN result_envs e ON e.id = r.env_key
+                    WHERE p.name = %s AND r.superseded_by IS NULL
+                    ORDER BY j.name, r.timestamp
+                """, (pipeline_name,))
+                db_results = cursor.fetchall()
         
-        # Return only the required 3 metrics
-        final_metrics['wrong_matches'] = all_wrong_matches
-        return final_metrics
+            if not db_results:
+                logger.warning(f"No pipeline results found in database for pipeline: {pipeline_name}")
+            
+            statistics = score_pipeline_results(db_results)
+            # Only the wrong matches show their explanation, so only their texts are fetched
+            explanations = provider.get_explanations(list({wrong_match["explanation"] for wrong_match in statistics["wrong_matches"]}))
+        for wrong_match in statistics["wrong_matches"]:
+            wrong_match["explanation"] = explanations.get(wrong_match["explanation"])
+        return statistics
         
     except Exception as e:
         logger.error(f"Error calculating statistics for pipeline {pipeline_name}: {str(e)}")
         # Re-raise the exception to properly propagate errors
         raise
-    finally:
-        # Always disconnect from the database, even if there's an exception
-        try:
-            postgres_provider.disconnect()
-        except:
-            # If disconnect fails, log it but don't raise another exception
-            logger.warning("Could not disconnect from database in finally block")
+
+
+def _cached_statistics(pipeline_name: str, summary: bool = False) -> Dict[str, Any]:
+    """
+    Cached statistics (or summary) of a pipeline with bootstrap confidence intervals
+    on both accuracies ([low, high], or None without scored predictions)
+    """
+    statistics = pipeline_statistics_cache.summary(pipeline_name) if summary else pipeline_statistics_cache.statistics(pipeline_name)
+    correct, schema_correct, total_predictions = pipeline_statistics_cache.counts(pipeline_name)
+    statistics["accuracy_ci"] = proportion_interval(correct, total_predictions)
+    statistics["schema_accuracy_ci"] = proportion_interval(schema_correct, total_predictions)
+    return statistics
+
+
+def _pending_after_ids(gt_version: str, watermark_counts: Dict[str, Tuple[int, int]]) -> Dict[str, int]:
+    """Pipelines whose cached statistics are stale, mapped to the id after which rows must be fetched"""
+    after_ids = {}
+    for pipeline_name, (rows_at_or_below, max_id) in watermark_counts.items():
+        after_id = pipeline_statistics_cache.fetch_after(pipeline_name, gt_version, rows_at_or_below, max_id)
+        if after_id is not None:
+            after_ids[pipeline_name] = after_id
+    return after_ids
+
+
+def _resolve_explanations(provider, pipeline_names: List[str]):
+    """Fetch the explanation texts of the pipelines' newly cached wrong matches"""
+    missing = pipeline_statistics_cache.unresolved_explanations(pipeline_names)
+    if missing:
+        pipeline_statistics_cache.resolve_explanations(provider.get_explanations(missing))
 
 
 def get_pipeline_statistics(pipeline_name: str) -> Dict[str, float]:
     """
     Query results after running benchmarks on a pipeline.
-    Calculate statistics by comparing database results with ground truth.
+    Calculate statistics by comparing database results with ground truth, folding only rows
+    stored since the last call into the cached totals.
     Returns only: column+schema accuracy, schema accuracy, and wrong matches
     """
-    return calculate_pipeline_statistics_with_wrong_matches(pipeline_name)
+    try:
+        with postgres_session() as provider:
+            gt_version = ground_truth_index.version
+            watermark = pipeline_statistics_cache.watermark(pipeline_name, gt_version)
+            watermark_counts = provider.get_pipeline_result_watermarks({pipeline_name: watermark})
+            after_ids = _pending_after_ids(gt_version, {pipeline_name: watermark_counts.get(pipeline_name, (0, 0))})
+            if after_ids:
+                rows = provider.get_pipeline_result_rows_since(after_ids)
+                pipeline_statistics_cache.absorb(gt_version, after_ids, rows)
+                _resolve_explanations(provider, list(after_ids))
+        return _cached_statistics(pipeline_name)
+    
+    except Exception as e:
+        logger.error(f"Error calculating statistics for pipeline {pipeline_name}: {str(e)}")
+        raise
+
+
+async def _refresh_statistics_async(pipeline_name: Optional[str] = None) -> List[str]:
+    """
+    Fold newly stored rows into the cached statistics of one pipeline, or of every pipeline with stored
+    results, querying through the async pool and scoring in a worker thread. Returns the pipeline names.
+    One grouped query finds the stale pipelines, one query fetches their new rows and a single scoring
+    pass folds them in, however many pipelines exist.
+    """
+    gt_version = await run_in_threadpool(lambda: ground_truth_index.version)
+    if pipeline_name is None:
+        watermarks = pipeline_statistics_cache.watermarks(gt_version)
+        watermark_counts = await async_postgres_provider.get_pipeline_result_watermarks(watermarks, all_pipelines=True)
+    else:
+        watermark = pipeline_statistics_cache.watermark(pipeline_name, gt_version)
+        watermark_counts = await async_postgres_provider.get_pipeline_result_watermarks({pipeline_name: watermark})
+        watermark_counts = {pipeline_name: watermark_counts.get(pipeline_name, (0, 0))}
+    after_ids = _pending_after_ids(gt_version, watermark_counts)
+    if after_ids:
+        rows = await async_postgres_provider.get_pipeline_result_rows_since(after_ids)
+        await run_in_threadpool(pipeline_statistics_cache.absorb, gt_version, after_ids, rows)
+        missing = await run_in_threadpool(pipeline_statistics_cache.unresolved_explanations, list(after_ids))
+        if missing:
+            pipeline_statistics_cache.resolve_explanations(await async_postgres_provider.get_explanations(missing))
+    return list(watermark_counts)
+
+
+async def get_pipeline_statistics_async(pipeline_name: str, summary: bool = False) -> Dict[str, Any]:
+    """
+    Same as get_pipeline_statistics, but queries through the async pool and scores in a worker thread.
+    With summary set, returns only the metrics and counts instead of the wrong matches.
+    Also reports the p50/p95/p99 job latency (None if no job timings were recorded).
+    """
+    await _refresh_statistics_async(pipeline_name)
+    latencies = await async_postgres_provider.get_job_latency_percentiles([pipeline_name])
+    # The confidence intervals are bootstrapped, so they are computed off the event loop
+    statistics = await run_in_threadpool(_cached_statistics, pipeline_name, summary)
+    statistics["latency"] = latencies.get(pipeline_name)
+    return statistics
+
+
+async def get_all_pipeline_statistics_async(summary: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Statistics (or summaries) and job latency percentiles of every pipeline with stored results"""
+    pipeline_names = await _refresh_statistics_async()
+    latencies = await async_postgres_provider.get_job_latency_percentiles()
+    all_statistics = await run_in_threadpool(
+        lambda: {pipeline_name: _cached_statistics(pipeline_name, summary) for pipeline_name in pipeline_names})
+    for pipeline_name, statistics in all_statistics.items():
+        statistics["latency"] = latencies.get(pipeline_name)
+    return all_statistics
+
+
+async def compare_pipelines_async(pipeline_a: str, pipeline_b: str) -> Dict[str, Any]:
+    """
+    Paired bootstrap of the accuracy difference between two pipelines over the items
+    (env, table, original column) both were scored on
+    """
+    await _refresh_statistics_async(pipeline_a)
+    await _refresh_statistics_async(pipeline_b)
+    scores_a, scores_b = pipeline_statistics_cache.paired_item_accuracies(pipeline_a, pipeline_b)
+    comparison = await run_in_threadpool(paired_bootstrap, scores_a, scores_b)
+    return {"pipeline_a": pipeline_a, "pipeline_b": pipeline_b, **comparison}
+
+
+async def get_wrong_matches_page_async(pipeline_name: str, offset: int, limit: int,
+                                       filters: Dict[str, str]) -> Tuple[int, List[Dict[str, Any]]]:
+    """(total matching, page) of a pipeline's wrong matches, filtered on wrong match fields"""
+    await _refresh_statistics_async(pipeline_name)
+    return await run_in_threadpool(pipeline_statistics_cache.wrong_matches_page, pipeline_name, offset, limit, filters)
+
+
+async def get_statistics_version(pipeline_name: Optional[str] = None) -> str:
+    """
+    Cheap token identifying the current statistics of one pipeline, or of all pipelines: the ground
+    truth version plus the result deletion counter, highest result id and highest job timing id
+    """
+    gt_version = await run_in_threadpool(lambda: ground_truth_index.version)
+    deletions, max_id, max_timing_id = await async_postgres_provider.get_pipeline_results_version(pipeline_name)
+    return hashlib.md5(f"{gt_version}:{deletions}:{max_id}:{max_timing_id}".encode('utf-8')).hexdigest()
+
+
+async def get_memoized_statistics(version: str, pipeline_name: Optional[str] = None,
+                                  summary: bool = False) -> Tuple[Optional[str], Dict[str, Any]]:
+    """
+    Statistics (or summaries) of one pipeline, or of all pipelines, computed at most once per version
+    (as returned by get_statistics_version), with the version they match. The version is read again
+    after computing; when results were stored meanwhile the payload may cover part of them, so it is
+    returned with None instead of a version and not memoized.
+    """
+    key = (pipeline_name, summary)
+    memo = _statistics_memo.get(key)
+    if memo is not None and memo[0] == version:
+        _statistics_memo.move_to_end(key)
+        return memo
+    if pipeline_name is None:
+        statistics = await get_all_pipeline_statistics_async(summary)
+    else:
+        statistics = await get_pipeline_statistics_async(pipeline_name, summary)
+    if await get_statistics_version(pipeline_name) != version:
+        return None, statistics
+    _statistics_memo[key] = (version, statistics)
+    _statistics_memo.move_to_end(key)
+    while len(_statistics_memo) > STATISTICS_MEMO_SIZE:
+        _statistics_memo.popitem(last=False)
+    return version, statistics
+
+
+def clear_statistics_memo():
+    """Forget all memoized statistics payloads"""
+    _statistics_memo.clear()
 
 
 def calculate_metrics_for_results(predicted_results: List[MatchResultsModel], expected_results: List[MatchResultsModel]) -> Dict[str, float]:
@@ -196,74 +261,35 @@ def calculate_metrics_for_results(predicted_results: List[MatchResultsModel], ex
         predicted_results = predicted_results[:min_length]
         expected_results = expected_results[:min_length]
     
-    if not predicted_results:
-        return {
-            "accuracy": 0.0,
-            "schema_accuracy": 0.0,
-            "total_predictions": 0
-        }
-    
-    total_predictions = len(predicted_results)
-    total_accuracy = 0.0  # This is column+schema accuracy
-    total_schema_accuracy = 0.0
-    
-    for predicted, expected in zip(predicted_results, expected_results):
-        # Check for correct match (add explicit string conversion to handle potential type mismatches)
-        pred_fitted_col = str(predicted.fitted_column) if predicted.fitted_column is not None else ""
-        pred_fitted_schema = str(predicted.fitted_schema) if predicted.fitted_schema is not None else ""
-        exp_fitted_col = str(expected.fitted_column) if expected.fitted_column is not None else ""
-        exp_fitted_schema = str(expected.fitted_schema) if expected.fitted_schema is not None else ""
-        
-        # Calculate column+schema accuracy
-        is_correct = (pred_fitted_col == exp_fitted_col and 
-                     pred_fitted_schema == exp_fitted_schema)
-        
-        total_accuracy += 1.0 if is_correct else 0.0
-        total_schema_accuracy += 1.0 if pred_fitted_schema == exp_fitted_schema else 0.0
-    
-    # Calculate final averages
-    final_metrics = {
-        "accuracy": total_accuracy / total_predictions if total_predictions > 0 else 0.0,  # Column+schema accuracy
-        "schema_accuracy": total_schema_accuracy / total_predictions if total_predictions > 0 else 0.0,
-        "total_predictions": total_predictions
-    }
-    
-    return final_metrics
+    return score_match_lists(predicted_results, expected_results)
 
 
 def get_all_pipeline_statistics_with_wrong_matches() -> Dict[str, Dict]:
     """
     Get statistics with wrong matches for all pipelines by comparing database results with ground truth.
+    Uses the same two queries and single scoring pass as get_all_pipeline_statistics_async.
     Returns only: column+schema accuracy, schema accuracy, and wrong matches for each pipeline
     """
-    # Use a try-finally block to ensure the database connection is always closed
-    postgres_provider.connect()
-    
+    # The session closes its own connection, even if there's an exception
     try:
         logger.info("Getting statistics with wrong matches for all pipelines")
         
-        with postgres_provider.connection.cursor() as cursor:
-            cursor.execute("SELECT DISTINCT pipeline_name FROM pipeline_results")
-            db_pipeline_names = [row[0] for row in cursor.fetchall()]
-        
-        logger.info(f"Found {len(db_pipeline_names)} distinct pipeline names in database: {db_pipeline_names}")
-        
-        all_stats = {}
-        for pipeline_name in db_pipeline_names:
-            stats = calculate_pipeline_statistics_with_wrong_matches(pipeline_name)
-            if stats:  # Only add if we have results
-                all_stats[pipeline_name] = stats
+        with postgres_session() as provider:
+            gt_version = ground_truth_index.version
+            watermarks = pipeline_statistics_cache.watermarks(gt_version)
+            watermark_counts = provider.get_pipeline_result_watermarks(watermarks, all_pipelines=True)
+            logger.info(f"Found {len(watermark_counts)} distinct pipeline names in database: {list(watermark_counts)}")
+            
+            after_ids = _pending_after_ids(gt_version, watermark_counts)
+            if after_ids:
+                rows = provider.get_pipeline_result_rows_since(after_ids)
+                pipeline_statistics_cache.absorb(gt_version, after_ids, rows)
+                _resolve_explanations(provider, list(after_ids))
         
+        all_stats = {pipeline_name: _cached_statistics(pipeline_name) for pipeline_name in watermark_counts}
         logger.info(f"Retrieved statistics with wrong matches for {len(all_stats)} pipelines")
         return all_stats
         
     except Exception as e:
         logger.error(f"Error getting statistics with wrong matches for all pipelines: {str(e)}")
         return {}
-    finally:
-        # Always disconnect from the database, even if there's an exception
-        try:
-            postgres_provider.disconnect()
-        except:
-            # If disconnect fails, log it but don't raise another exception
-            logger.warning("Could not disconnect from database in finally block")
\ No newline at end of file
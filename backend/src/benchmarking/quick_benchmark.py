@@ -0,0 +1,192 @@
+import math
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.providers.postgress import postgres_session
+from src.benchmarking.benchmark import BenchmarkOutput, benchmark
+from src.benchmarking.bootstrap import paired_ratio_difference, ratio_interval, shrink_interval, wilson_interval
+from src.benchmarking.scoring import indexed_ground_truth, results_frame, score_predictions
+from src.utils.constants import (
+    EXCEL_FILES_DIR,
+    DEFAULT_PIPELINE_TYPE,
+    BOOTSTRAP_CONFIDENCE,
+    QUICK_BENCHMARK_PRECISION,
+    QUICK_BENCHMARK_MIN_TABLES,
+    QUICK_BENCHMARK_BATCH_SIZE,
+)
+from src.utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+class QuickBenchmarkOutput(NamedTuple):
+    """The benchmark() outputs of the sampled tables and the report of the sampling"""
+    outputs: List[BenchmarkOutput]
+    report: Dict[str, Any]
+
+
+def table_outcomes(db_results: List[tuple]) -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """
+    (column+schema correct, scored predictions) per (env_id, table_name) of stored-format result rows,
+    as tables of different environments can share a name
+    """
+    if not db_results:
+        return {}
+    predictions = results_frame(db_results)
+    gt_table_names, gt_frame = indexed_ground_truth()
+    scored = score_predictions(predictions, gt_frame, gt_table_names)
+    outcomes = pd.DataFrame({"env_id": predictions["env_id"].to_numpy(dtype=object)[scored.rows],
+                             "table_name": predictions["table_name"].to_numpy(dtype=object)[scored.rows],
+                             "correct": scored.correct.astype(int)})
+    grouped = outcomes.groupby(["env_id", "table_name"], dropna=False)["correct"].agg(["sum", "size"])
+    return {(env_id, table_name): (int(item_correct), int(item_total))
+            for (env_id, table_name), item_correct, item_total in zip(grouped.index, grouped["sum"], grouped["size"])}
+
+
+def stratified_order(env_tables: Dict[str, List[str]], seed: int = 0) -> List[Tuple[str, str]]:
+    """
+    All (env_id, table_name) pairs in a random order where every prefix holds each environment in
+    (about) its share of the corpus: tables are shuffled within their environment and interleaved by
+    their relative position in it.
+    """
+    rng = np.random.default_rng(seed)
+    keyed = []
+    for env_index, env_id in enumerate(sorted(env_tables)):
+        tables = sorted(env_tables[env_id])
+        for rank, table_index in enumerate(rng.permutation(len(tables))):
+            keyed.append(((rank + 0.5) / len(tables), env_index, env_id, tables[table_index]))
+    return [(env_id, table_name) for _, _, env_id, table_name in sorted(keyed)]
+
+
+def _reference_outcomes(reference_pipeline: str, env_id: str, table_names: Sequence[str]) -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """Per-table outcomes of the latest benchmarked job of the reference pipeline on each table"""
+    with postgres_session() as provider:
+        latest_jobs = provider.get_latest_table_jobs(reference_pipeline, env_id, table_names)
+        rows = provider.get_job_result_rows([job["job_id"] for job in latest_jobs.values()])
+    return table_outcomes(rows)
+
+
+def quick_benchmark(pipeline_name: str, n8n_route: str = None, timeout: int = 600, pipeline_type: str = DEFAULT_PIPELINE_TYPE,
+                    reference_pipeline: Optional[str] = None, precision: float = QUICK_BENCHMARK_PRECISION,
+                    min_tables: int = QUICK_BENCHMARK_MIN_TABLES, batch_size: int = QUICK_BENCHMARK_BATCH_SIZE,
+                    max_fraction: float = 1.0, seed: int = 0, excel_dir: str = None) -> QuickBenchmarkOutput:
+    """
+    Benchmark a pipeline on a stratified sample of the tables of all environment directories, in rounds
+    of batch_size tables run through benchmark(). After every round the running column+schema accuracy
+    gets a cluster bootstrap interval (tables are resampled whole, with a finite population correction),
+    widened to at least the Wilson interval of the pooled column counts, as a few tables that are all
+    right (or all wrong) give a bootstrap interval of zero width. Sampling stops once at least min_tables
+    were run and
+      - the interval's half width is at most precision, or
+      - the paired difference to reference_pipeline (its latest benchmarked jobs on the same tables)
+        has an interval excluding zero; as this is checked after every round, each check uses a
+        Bonferroni share of the error rate, 1 - confidence, over all rounds that can be checked,
+    or when max_fraction of the corpus (or all of it) was run.
+
+    Returns:
+        QuickBenchmarkOutput with the benchmark() outputs, for recording the run, and a report with the
+        estimate, why sampling stopped, how much of the corpus was needed and the per-round history
+    """
+    base_dir = Path(excel_dir if excel_dir else EXCEL_FILES_DIR)
+    env_dirs = {d.name: d for d in base_dir.iterdir() if d.is_dir()} if base_dir.exists() else {}
+    if not env_dirs and base_dir.exists():
+        env_dirs = {"default_env": base_dir}
+    env_tables = {env_id: [f.stem for f in list(env_dir.glob("*.xlsx")) + list(env_dir.glob("*.xls"))]
+                  for env_id, env_dir in env_dirs.items()}
+    env_tables = {env_id: tables for env_id, tables in env_tables.items() if tables}
+    order = stratified_order(env_tables, seed)
+    total_tables = len(order)
+    budget = min(total_tables, max(1, math.ceil(max_fraction * total_tables))) if total_tables else 0
+    # Rounds ending after min_tables and before the budget, at each of which sampling may stop
+    looks = max(1, len([end for end in range(batch_size, budget, batch_size) if end >= min_tables]))
+    look_confidence = 1.0 - (1.0 - BOOTSTRAP_CONFIDENCE) / looks
+    logger.info(f"Quick benchmark of {pipeline_name}: up to {budget} of {total_tables} tables, "
+                f"stopping at +/-{precision:.3f}" + (f" or when different from {reference_pipeline}" if reference_pipeline else ""))
+
+    outputs: List[BenchmarkOutput] = []
+    # Keyed by (env_id, table_name)
+    outcomes: Dict[Tuple[str, str], Tuple[int, int]] = {}
+    reference_outcomes: Dict[Tuple[str, str], Tuple[int, int]] = {}
+    history: List[Dict[str, Any]] = []
+    stop_reason = "corpus exhausted"
+    interval, comparison = None, None
+    position = 0
+    while position < budget:
+        batch = order[position:min(position + batch_size, budget)]
+        position += len(batch)
+        by_env: Dict[str, List[str]] = {}
+        for env_id, table_name in batch:
+            by_env.setdefault(env_id, []).append(table_name)
+        for env_id, table_names in by_env.items():
+            output = benchmark(pipeline_name, env_id, excel_dir=str(env_dirs[env_id]), n8n_route=n8n_route, timeout=timeout,
+                               tables=set(table_names), pipeline_type=pipeline_type)
+            outputs.append(output)
+            outcomes.update(table_outcomes(output.rows))
+            if reference_pipeline:
+                reference_outcomes.update(_reference_outcomes(reference_pipeline, env_id, table_names))
+
+        sampled_fraction = position / total_tables
+        successes = np.array([outcomes[table][0] for table in outcomes], dtype=float)
+        totals = np.array([outcomes[table][1] for table in outcomes], dtype=float)
+        accuracy = float(successes.sum() / totals.sum()) if totals.sum() else None
+        interval = ratio_interval(successes, totals, sampled_fraction=sampled_fraction)
+        floor = wilson_interval(int(successes.sum()), int(totals.sum()))
+        if interval and floor:
+            floor = shrink_interval(accuracy, *floor, sampled_fraction)
+            interval = (min(interval[0], floor[0]), max(interval[1], floor[1]))
+        entry = {"tables": position, "columns": int(totals.sum()), "accuracy": accuracy,
+                 "ci_low": interval[0] if interval else None, "ci_high": interval[1] if interval else None}
+        if reference_pipeline:
+            common = [table for table in outcomes if table in reference_outcomes]
+            comparison = paired_ratio_difference([outcomes[table][0] for table in common], [outcomes[table][1] for table in common],
+                                                 [reference_outcomes[table][0] for table in common],
+                                                 [reference_outcomes[table][1] for table in common],
+                                                 confidence=look_confidence, sampled_fraction=sampled_fraction)
+            entry.update({"difference": comparison["difference"], "difference_ci_low": comparison["ci_low"],
+                          "difference_ci_high": comparison["ci_high"]})
+        history.append(entry)
+        logger.info(f"Quick benchmark of {pipeline_name} after {position} tables: {entry}")
+
+        if position < min_tables or position >= budget:
+            continue
+        if interval and (interval[1] - interval[0]) / 2 <= precision:
+            stop_reason = "precise enough"
+            break
+        if comparison and comparison["ci_low"] is not None and comparison["items"] >= min_tables:
+            if comparison["ci_low"] > 0:
+                stop_reason = f"better than {reference_pipeline}"
+                break
+            if comparison["ci_high"] < 0:
+                stop_reason = f"worse than {reference_pipeline}"
+                break
+    else:
+        if budget < total_tables:
+            stop_reason = "sample budget reached"
+
+    sampled_envs: Dict[str, int] = {}
+    for env_id, _ in order[:position]:
+        sampled_envs[env_id] = sampled_envs.get(env_id, 0) + 1
+    final = history[-1] if history else {}
+    report = {
+        "stop_reason": stop_reason if total_tables else "no tables",
+        "tables_run": position,
+        "tables_total": total_tables,
+        "corpus_fraction": position / total_tables if total_tables else 0.0,
+        "columns_scored": final.get("columns", 0),
+        "accuracy": final.get("accuracy"),
+        "ci_low": final.get("ci_low"),
+        "ci_high": final.get("ci_high"),
+        "confidence": BOOTSTRAP_CONFIDENCE,
+        "precision": precision,
+        "tables_per_env": {env_id: {"run": sampled_envs.get(env_id, 0), "total": len(tables)}
+                           for env_id, tables in sorted(env_tables.items())},
+        "reference": {"pipeline_name": reference_pipeline, **comparison, "confidence": look_confidence, "looks": looks}
+                     if reference_pipeline and comparison else None,
+        "history": history
+    }
+    logger.info(f"Quick benchmark of {pipeline_name} stopped ({report['stop_reason']}) after "
+                f"{position} of {total_tables} tables")
+    return QuickBenchmarkOutput(outputs, report)
@@ -0,0 +1,112 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from src.providers.postgress import postgres_session
+from src.providers.schema_registry import RegisteredSchema, schema_registry
+from src.benchmarking.ground_truth import ground_truth_index
+from src.utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+class SchemaDiff(NamedTuple):
+    """What changed between two versions of an environment schema, by schema and field name"""
+    added_schemas: Set[str]
+    removed_schemas: Set[str]
+    changed_schemas: Set[str]  # Schema-level attributes changed, or fields added/removed/changed
+    changed_fields: Set[Tuple[str, str]]  # (schema_name, field_name) added, removed or changed, under old and new names
+
+
+def _keyed(items: Iterable[Dict[str, Any]], id_key: str, name_key: str) -> Dict[str, Dict[str, Any]]:
+    """Items by their id, or by their name when they have none"""
+    return {str(item.get(id_key) or item.get(name_key)): item for item in items}
+
+
+def diff_schemas(old: Dict[str, Any], new: Dict[str, Any]) -> SchemaDiff:
+    """
+    Diff two versions of an environment schema. Schemas and fields are matched by id (name when missing),
+    so a rename is a change of that schema or field, reported under both names.
+    """
+    old_schemas = _keyed(old.get("schemas", []), "schema_id", "schema_name")
+    new_schemas = _keyed(new.get("schemas", []), "schema_id", "schema_name")
+    added = {new_schemas[key].get("schema_name") for key in new_schemas.keys() - old_schemas.keys()}
+    removed = {old_schemas[key].get("schema_name") for key in old_schemas.keys() - new_schemas.keys()}
+    changed: Set[str] = set()
+    changed_fields: Set[Tuple[str, str]] = set()
+
+    for key in old_schemas.keys() & new_schemas.keys():
+        old_schema, new_schema = old_schemas[key], new_schemas[key]
+        names = {old_schema.get("schema_name"), new_schema.get("schema_name")}
+        old_fields = _keyed(old_schema.get("fields") or [], "field_id", "field_name")
+        new_fields = _keyed(new_schema.get("fields") or [], "field_id", "field_name")
+        for field_key in old_fields.keys() | new_fields.keys():
+            old_field, new_field = old_fields.get(field_key), new_fields.get(field_key)
+            if old_field != new_field:
+                field_names = {field.get("field_name") for field in (old_field, new_field) if field}
+                changed_fields.update((schema_name, field_name) for schema_name in names for field_name in field_names)
+        attributes_changed = ({k: v for k, v in old_schema.items() if k != "fields"}
+                              != {k: v for k, v in new_schema.items() if k != "fields"})
+        if attributes_changed or any(schema_name in names for schema_name, _ in changed_fields):
+            changed.update(names)
+
+    return SchemaDiff(added, removed, changed, changed_fields)
+
+
+def _touches(diff: SchemaDiff, mappings: Iterable[Tuple[str, str]]) -> Optional[str]:
+    """Why (fitted_schema, fitted_column) mappings are affected by a diff, None when they are not"""
+    for schema_name, column in mappings:
+        if schema_name in diff.removed_schemas:
+            return f"schema {schema_name} was removed"
+        if (schema_name, column) in diff.changed_fields:
+            return f"field {schema_name}.{column} changed"
+    for schema_name, _ in mappings:
+        if schema_name in diff.changed_schemas:
+            return f"schema {schema_name} changed"
+    return None
+
+
+def affected_tables(pipeline_name: str, env_id: str, table_names: List[str],
+                    current: Optional[RegisteredSchema] = None) -> Dict[str, str]:
+    """
+    The tables of an environment that need re-running for a pipeline after schema changes, {table_name: reason}.
+    A table is affected when its latest job has no recorded schema version, or ran against a version whose
+    diff to the current schema touches a schema or field in the table's ground truth or in that job's
+    predictions. Changes to schemas a table neither expects nor predicts are assumed not to affect it, but
+    added schemas can attract any column, so they affect every table of the environment.
+    Tables never run before, or whose latest job failed or stored no result rows, are always included.
+    current defaults to the registered schema of env_id.
+    """
+    current = current if current is not None else schema_registry.get(env_id)
+    with postgres_session() as provider:
+        latest_jobs = provider.get_latest_table_jobs(pipeline_name, env_id, table_names)
+        stored = provider.get_schema_versions({job["schema_hash"] for job in latest_jobs.values()
+                                              if job["schema_hash"] and job["schema_hash"] != current.content_hash})
+        predictions = provider.get_job_predictions([job["job_id"] for job in latest_jobs.values()])
+
+    diffs: Dict[str, SchemaDiff] = {}
+    affected: Dict[str, str] = {}
+    for table_name in table_names:
+        job = latest_jobs.get(table_name)
+        if job is None:
+            affected[table_name] = "never benchmarked"
+            continue
+        if not predictions.get(job["job_id"]):
+            affected[table_name] = "last run stored no results"
+            continue
+        schema_hash = job["schema_hash"]
+        if schema_hash == current.content_hash:
+            continue
+        if not schema_hash or schema_hash not in stored:
+            affected[table_name] = "schema version of the last run is unknown"
+            continue
+        if schema_hash not in diffs:
+            diffs[schema_hash] = diff_schemas(stored[schema_hash], current.schema)
+        diff = diffs[schema_hash]
+        if diff.added_schemas:
+            affected[table_name] = f"schemas added: {', '.join(sorted(diff.added_schemas))}"
+            continue
+        ground_truth = [(item.fitted_schema, item.fitted_column) for item in ground_truth_index.get_table(table_name) or []]
+        reason = _touches(diff, ground_truth) or _touches(diff, predictions.get(job["job_id"], []))
+        if reason:
+            affected[table_name] = reason
+    logger.info(f"{len(affected)} of {len(table_names)} tables of environment {env_id} need re-running for {pipeline_name}")
+    return affected
@@ -0,0 +1,195 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.utils.models import MatchResultsModel
+from src.benchmarking.ground_truth import GroundTruthIndex, ground_truth_index
+
+# Column order of stored result rows, as selected by the providers
+RESULT_COLUMNS = [
+    "job_id", "table_name", "pipeline_name", "env_id", "original_column",
+    "fitted_column", "fitted_schema", "explanation"
+]
+# A row is only scored if it forms a valid MatchResultsModel, i.e. none of these are NULL
+REQUIRED_RESULT_COLUMNS = ["original_column", "fitted_column", "fitted_schema", "explanation"]
+JOIN_COLUMNS = ["table_name", "original_column"]
+NOT_FOUND = "NOT_FOUND"
+
+_frame_cache_lock = threading.Lock()
+_frame_cache: Tuple[Optional[dict], Optional[pd.DataFrame]] = (None, None)
+
+
+def empty_statistics() -> Dict[str, Any]:
+    """Statistics of a pipeline with nothing to score"""
+    return {
+        "accuracy": 0.0,  # This is column+schema accuracy
+        "schema_accuracy": 0.0,
+        "wrong_matches": []
+    }
+
+
+def results_frame(db_results: Iterable[tuple]) -> pd.DataFrame:
+    """Load stored result rows into a columnar frame"""
+    return pd.DataFrame(list(db_results), columns=RESULT_COLUMNS, dtype=object)
+
+
+def ground_truth_frame(gt_mapping: Dict[Tuple[str, str], MatchResultsModel]) -> pd.DataFrame:
+    """Build a frame of expected matches indexed by (table_name, original_column)"""
+    frame = pd.DataFrame.from_records(
+        [(table_name, original_column, gt.fitted_column, gt.fitted_schema)
+         for (table_name, original_column), gt in gt_mapping.items()],
+        columns=JOIN_COLUMNS + ["expected_fitted_column", "expected_fitted_schema"]
+    )
+    return frame.set_index(JOIN_COLUMNS)
+
+
+def indexed_ground_truth(index: GroundTruthIndex = ground_truth_index) -> Tuple[Sequence[str], pd.DataFrame]:
+    """
+    Table names with ground truth and the ground truth frame for the index's current snapshot.
+    The frame is rebuilt only when the index reloads.
+    """
+    global _frame_cache
+    gt_tables, gt_mapping = index.snapshot()
+    with _frame_cache_lock:
+        cached_mapping, cached_frame = _frame_cache
+        if cached_mapping is not gt_mapping:
+            cached_frame = ground_truth_frame(gt_mapping)
+            _frame_cache = (gt_mapping, cached_frame)
+    return list(gt_tables.keys()), cached_frame
+
+
+class ScoredPredictions(NamedTuple):
+    """Per-prediction outcome arrays for the scored rows of a predictions frame"""
+    rows: np.ndarray  # Positions of the scored rows in the predictions frame
+    correct: np.ndarray  # Column+schema correct
+    schema_correct: np.ndarray
+    column_correct: np.ndarray
+    expected_columns: np.ndarray  # NOT_FOUND where the column has no ground truth
+    expected_schemas: np.ndarray
+
+    @property
+    def total_predictions(self) -> int:
+        return len(self.rows)
+
+
+def score_predictions(predictions: pd.DataFrame, gt_frame: pd.DataFrame, gt_table_names: Iterable[str]) -> ScoredPredictions:
+    """
+    Score predictions against ground truth with one hash join and boolean masks.
+    Rows of tables without ground truth are skipped; rows whose column is missing from its table's
+    ground truth count as wrong with NOT_FOUND expectations.
+    """
+    # Only rows of tables with ground truth that form a valid MatchResultsModel are scored
+    if predictions.empty:
+        scored_mask = np.zeros(0, dtype=bool)
+    else:
+        scored_mask = (predictions["table_name"].isin(list(gt_table_names)).to_numpy()
+                       & predictions[REQUIRED_RESULT_COLUMNS].notna().all(axis=1).to_numpy())
+    rows = np.flatnonzero(scored_mask)
+
+    def column(name: str) -> np.ndarray:
+        return predictions[name].to_numpy(dtype=object)[rows]
+
+    # Hash join on (table_name, original_column); -1 marks columns missing from their table's ground truth
+    if len(rows):
+        positions = gt_frame.index.get_indexer(pd.MultiIndex.from_arrays([column("table_name"), column("original_column")]))
+    else:
+        positions = np.zeros(0, dtype=np.intp)
+    found = positions >= 0
+
+    def expected(name: str) -> np.ndarray:
+        # Appending NOT_FOUND makes position -1 resolve to it
+        values = gt_frame[name].fillna("").to_numpy(dtype=object)
+        return np.append(values, np.array([NOT_FOUND], dtype=object))[positions]
+
+    expected_columns = expected("expected_fitted_column")
+    expected_schemas = expected("expected_fitted_schema")
+
+    schema_correct = found & (column("fitted_schema") == expected_schemas)
+    column_correct = found & (column("fitted_column") == expected_columns)
+    correct = schema_correct & column_correct
+    return ScoredPredictions(rows, correct, schema_correct, column_correct, expected_columns, expected_schemas)
+
+
+def collect_wrong_matches(predictions: pd.DataFrame, scored: ScoredPredictions) -> List[Dict[str, Any]]:
+    """Wrong-match dicts for the incorrectly predicted rows, in prediction order"""
+    wrong = ~scored.correct
+    wrong_rows = scored.rows[wrong]
+
+    def column(name: str) -> list:
+        return predictions[name].to_numpy(dtype=object)[wrong_rows].tolist()
+
+    # Build the dicts straight from column lists; DataFrame.to_dict boxes every cell
+    return [
+        {
+            'job_id': job_id,
+            'table_name': table_name,
+            'env_id': env_id,
+            'original_column': original_column,
+            'predicted_fitted_column': predicted_column,
+            'predicted_fitted_schema': predicted_schema,
+            'expected_fitted_column': expected_column,
+            'expected_fitted_schema': expected_schema,
+            'explanation': explanation
+        }
+        for job_id, table_name, env_id, original_column, predicted_column, predicted_schema,
+            expected_column, expected_schema, explanation in zip(
+                column("job_id"),
+                column("table_name"),
+                column("env_id"),
+                column("original_column"),
+                column("fitted_column"),
+                column("fitted_schema"),
+                scored.expected_columns[wrong].tolist(),
+                scored.expected_schemas[wrong].tolist(),
+                column("explanation"),
+            )
+    ]
+
+
+def score_results_frame(predictions: pd.DataFrame, gt_frame: pd.DataFrame, gt_table_names: Iterable[str]) -> Dict[str, Any]:
+    """Accuracy, schema accuracy and wrong matches (in prediction order) of a predictions frame"""
+    scored = score_predictions(predictions, gt_frame, gt_table_names)
+    if not scored.total_predictions:
+        return empty_statistics()
+    return {
+        "accuracy": int(scored.correct.sum()) / scored.total_predictions,  # Column+schema accuracy
+        "schema_accuracy": int(scored.schema_correct.sum()) / scored.total_predictions,
+        "wrong_matches": collect_wrong_matches(predictions, scored),
+    }
+
+
+def score_result_rows(db_results: List[tuple], index: GroundTruthIndex = ground_truth_index) -> Dict[str, Any]:
+    """Score stored result rows against the shared ground truth index"""
+    if not db_results:
+        return empty_statistics()
+    gt_table_names, gt_frame = indexed_ground_truth(index)
+    return score_results_frame(results_frame(db_results), gt_frame, gt_table_names)
+
+
+def score_match_lists(predicted_results: List[MatchResultsModel], expected_results: List[MatchResultsModel]) -> Dict[str, float]:
+    """Positional comparison of two equally long result lists"""
+    total_predictions = len(predicted_results)
+    if not total_predictions:
+        return {
+            "accuracy": 0.0,
+            "schema_accuracy": 0.0,
+            "total_predictions": 0
+        }
+
+    def as_strings(values: List[Any]) -> np.ndarray:
+        return pd.Series(values, dtype=object).fillna("").astype(str).to_numpy()
+
+    predicted_columns = as_strings([predicted.fitted_column for predicted in predicted_results])
+    predicted_schemas = as_strings([predicted.fitted_schema for predicted in predicted_results])
+    expected_columns = as_strings([expected.fitted_column for expected in expected_results])
+    expected_schemas = as_strings([expected.fitted_schema for expected in expected_results])
+
+    schema_correct = predicted_schemas == expected_schemas
+    correct = schema_correct & (predicted_columns == expected_columns)
+    return {
+        "accuracy": int(correct.sum()) / total_predictions,  # Column+schema accuracy
+        "schema_accuracy": int(schema_correct.sum()) / total_predictions,
+        "total_predictions": total_predictions
+    }
@@ -0,0 +1,259 @@
+import heapq
+import threading
+from datetime import datetime
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.benchmarking.ground_truth import GroundTruthIndex, ground_truth_index
+from src.benchmarking.scoring import results_frame, indexed_ground_truth, score_predictions, collect_wrong_matches
+from src.utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+def _sort_key(row: tuple) -> tuple:
+    """ORDER BY job_id, timestamp, id (NULLs last, as in PostgreSQL) for an (id, timestamp, job_id, ...) row"""
+    row_id, timestamp, job_id = row[0], row[1], row[2]
+    return (job_id is None, job_id or "", timestamp is None, timestamp or datetime.min, row_id)
+
+
+class _PipelineState:
+    """Running totals of one pipeline, covering every stored row with id <= watermark"""
+
+    def __init__(self, gt_version: str):
+        self.gt_version = gt_version
+        self.watermark = 0
+        self.row_count = 0  # Rows absorbed, including rows that were skipped while scoring
+        self.total_predictions = 0
+        self.correct = 0
+        self.schema_correct = 0
+        self.wrong_matches: List[Tuple[tuple, Dict[str, Any]]] = []  # (sort key, wrong match)
+        # (env_id, table_name, original_column) -> [correct, scored], for paired comparisons between pipelines
+        self.item_outcomes: Dict[Tuple[str, str, str], List[int]] = {}
+
+
+class PipelineStatisticsCache:
+    """
+    Per-pipeline statistics that only fold in rows newer than the highest pipeline_results id
+    already absorbed (the watermark).
+
+    A pipeline is rescanned from scratch when the ground truth changes, or when the number of stored
+    rows at or below its watermark no longer matches what was absorbed (rows were deleted, or a row
+    with a lower id committed late). Callers drive the queries so both providers can use it:
+
+        watermark = cache.watermark(name, gt_version)
+        rows_at_or_below, max_id = provider.get_pipeline_result_watermarks({name: watermark}).get(name, (0, 0))
+        after_id = cache.fetch_after(name, gt_version, rows_at_or_below, max_id)
+        if after_id is not None:
+            cache.absorb(gt_version, {name: after_id}, provider.get_pipeline_result_rows_since({name: after_id}))
+        stats = cache.statistics(name)
+
+    The provider queries and absorb() take several pipelines at once, so the whole leaderboard costs
+    two queries and one scoring pass however many pipelines there are.
+
+    The fetched rows carry explanation keys instead of the texts, which only the wrong matches need;
+    after absorbing, callers look up the texts of the keys still missing:
+
+        cache.resolve_explanations(provider.get_explanations(cache.unresolved_explanations([name])))
+    """
+
+    def __init__(self, index: GroundTruthIndex = ground_truth_index):
+        self.index = index
+        self._lock = threading.Lock()
+        self._states: Dict[str, _PipelineState] = {}
+        self._explanations: Dict[int, str] = {}  # Explanation key -> text, for the cached wrong matches
+
+    def _valid_state(self, pipeline_name: str, gt_version: str) -> Optional[_PipelineState]:
+        state = self._states.get(pipeline_name)
+        if state is None or state.gt_version != gt_version:
+            return None
+        return state
+
+    def watermark(self, pipeline_name: str, gt_version: str) -> int:
+        """Highest absorbed id, or 0 if the pipeline must be scored from scratch"""
+        with self._lock:
+            state = self._valid_state(pipeline_name, gt_version)
+            return state.watermark if state else 0
+
+    def watermarks(self, gt_version: str) -> Dict[str, int]:
+        """Highest absorbed id of every pipeline with valid cached statistics"""
+        with self._lock:
+            return {name: state.watermark for name, state in self._states.items() if state.gt_version == gt_version}
+
+    def fetch_after(self, pipeline_name: str, gt_version: str, rows_at_or_below: int, max_id: int) -> Optional[int]:
+        """
+        The id after which rows have to be fetched and absorbed (0 for a full rescan),
+        or None when the cached statistics are already current
+        """
+        with self._lock:
+            state = self._valid_state(pipeline_name, gt_version)
+            if state is None:
+                return 0
+            if rows_at_or_below != state.row_count:
+                logger.info(f"Stored rows changed below the watermark of {pipeline_name}, rescanning")
+                return 0
+            if max_id > state.watermark:
+                return state.watermark
+            return None
+
+    def absorb(self, gt_version: str, after_ids: Dict[str, int], rows: List[tuple]):
+        """
+        Fold (id, timestamp, *result row) tuples into the totals of the pipelines in after_ids, where each
+        pipeline's rows have id > after_ids[pipeline]. An after_id of 0 replaces that pipeline's cached state.
+        All pipelines are scored together in one vectorized pass.
+        """
+        # Score outside the lock; only the merge needs it
+        predictions = results_frame([row[2:] for row in rows])
+        gt_table_names, gt_frame = indexed_ground_truth(self.index)
+        scored = score_predictions(predictions, gt_frame, gt_table_names)
+
+        # Split the single pass back into per-pipeline totals
+        codes, names = pd.factorize(predictions["pipeline_name"], use_na_sentinel=False)
+        n_pipelines = len(names)
+        row_counts = np.bincount(codes, minlength=n_pipelines)
+        max_ids = np.zeros(n_pipelines, dtype=np.int64)
+        np.maximum.at(max_ids, codes, np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)))
+        scored_codes = codes[scored.rows]
+        totals = np.bincount(scored_codes, minlength=n_pipelines)
+        correct = np.bincount(scored_codes, weights=scored.correct, minlength=n_pipelines)
+        schema_correct = np.bincount(scored_codes, weights=scored.schema_correct, minlength=n_pipelines)
+
+        # Per-item outcomes, so pipelines can be compared on the items both were scored on
+        item_sums = pd.DataFrame({
+            "code": scored_codes,
+            "env_id": predictions["env_id"].to_numpy(dtype=object)[scored.rows],
+            "table_name": predictions["table_name"].to_numpy(dtype=object)[scored.rows],
+            "original_column": predictions["original_column"].to_numpy(dtype=object)[scored.rows],
+            "correct": scored.correct,
+        }).groupby(["code", "env_id", "table_name", "original_column"], sort=False, dropna=False)["correct"].agg(["sum", "size"])
+        new_items: Dict[str, List[Tuple[Tuple[str, str, str], int, int]]] = {}
+        for (code, env_id, table_name, original_column), item_correct, item_total in zip(
+                item_sums.index, item_sums["sum"].tolist(), item_sums["size"].tolist()):
+            new_items.setdefault(names[code], []).append(((env_id, table_name, original_column), item_correct, item_total))
+
+        wrong_rows = scored.rows[~scored.correct].tolist()
+        new_wrong: Dict[str, List[Tuple[tuple, Dict[str, Any]]]] = {}
+        for row_index, wrong_match in zip(wrong_rows, collect_wrong_matches(predictions, scored)):
+            new_wrong.setdefault(names[codes[row_index]], []).append((_sort_key(rows[row_index]), wrong_match))
+        positions = {name: code for code, name in enumerate(names)}
+
+        with self._lock:
+            for pipeline_name, after_id in after_ids.items():
+                state = self._valid_state(pipeline_name, gt_version)
+                if after_id == 0:
+                    state = _PipelineState(gt_version)
+                elif state is None or state.watermark != after_id:
+                    # Another caller already moved this pipeline on; the next call picks up anything missed
+                    continue
+                code = positions.get(pipeline_name)
+                if code is not None:
+                    state.watermark = max(after_id, int(max_ids[code]))
+                    state.row_count += int(row_counts[code])
+                    state.total_predictions += int(totals[code])
+                    state.correct += int(correct[code])
+                    state.schema_correct += int(schema_correct[code])
+                    pipeline_wrong = sorted(new_wrong.get(pipeline_name, []), key=itemgetter(0))
+                    state.wrong_matches = list(heapq.merge(state.wrong_matches, pipeline_wrong, key=itemgetter(0)))
+                    for item, item_correct, item_total in new_items.get(pipeline_name, []):
+                        outcome = state.item_outcomes.setdefault(item, [0, 0])
+                        outcome[0] += int(item_correct)
+                        outcome[1] += int(item_total)
+                self._states[pipeline_name] = state
+            logger.info(f"Absorbed {len(rows)} rows into statistics of {len(after_ids)} pipelines")
+
+    def unresolved_explanations(self, pipeline_names: List[str]) -> List[int]:
+        """Explanation keys of the pipelines' wrong matches whose text has not been resolved yet"""
+        with self._lock:
+            missing = set()
+            for pipeline_name in pipeline_names:
+                state = self._states.get(pipeline_name)
+                if state is not None:
+                    missing.update(wrong_match["explanation"] for _, wrong_match in state.wrong_matches
+                                   if wrong_match["explanation"] not in self._explanations)
+            return list(missing)
+
+    def resolve_explanations(self, explanations: Dict[int, str]):
+        """Store explanation texts by key, as returned by the providers' get_explanations"""
+        with self._lock:
+            self._explanations.update(explanations)
+
+    def _with_explanation(self, wrong_match: Dict[str, Any]) -> Dict[str, Any]:
+        """A copy of a cached wrong match with its explanation key replaced by the text"""
+        return {**wrong_match, "explanation": self._explanations.get(wrong_match["explanation"])}
+
+    def statistics(self, pipeline_name: str) -> Dict[str, Any]:
+        """Column+schema accuracy, schema accuracy and wrong matches from the cached totals"""
+        with self._lock:
+            state = self._states.get(pipeline_name)
+            if state is None or not state.total_predictions:
+                return {"accuracy": 0.0, "schema_accuracy": 0.0, "wrong_matches": []}
+            return {
+                "accuracy": state.correct / state.total_predictions,  # Column+schema accuracy
+                "schema_accuracy": state.schema_correct / state.total_predictions,
+                "wrong_matches": [self._with_explanation(wrong_match) for _, wrong_match in state.wrong_matches]
+            }
+
+    def summary(self, pipeline_name: str) -> Dict[str, Any]:
+        """Headline metrics and counts only, without copying the wrong matches"""
+        with self._lock:
+            state = self._states.get(pipeline_name)
+            if state is None or not state.total_predictions:
+                return {"accuracy": 0.0, "schema_accuracy": 0.0, "total_predictions": 0, "wrong_matches_count": 0}
+            return {
+                "accuracy": state.correct / state.total_predictions,  # Column+schema accuracy
+                "schema_accuracy": state.schema_correct / state.total_predictions,
+                "total_predictions": state.total_predictions,
+                "wrong_matches_count": len(state.wrong_matches)
+            }
+
+    def counts(self, pipeline_name: str) -> Tuple[int, int, int]:
+        """(column+schema correct, schema correct, scored predictions) of a pipeline"""
+        with self._lock:
+            state = self._states.get(pipeline_name)
+            if state is None:
+                return 0, 0, 0
+            return state.correct, state.schema_correct, state.total_predictions
+
+    def paired_item_accuracies(self, pipeline_a: str, pipeline_b: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-item accuracies of two pipelines over the items both were scored on, in matching order"""
+        with self._lock:
+            state_a = self._states.get(pipeline_a)
+            state_b = self._states.get(pipeline_b)
+            outcomes_a = dict(state_a.item_outcomes) if state_a is not None else {}
+            outcomes_b = dict(state_b.item_outcomes) if state_b is not None else {}
+        items = [item for item in outcomes_a if item in outcomes_b]
+        scores_a = np.array([outcomes_a[item][0] / outcomes_a[item][1] for item in items], dtype=float)
+        scores_b = np.array([outcomes_b[item][0] / outcomes_b[item][1] for item in items], dtype=float)
+        return scores_a, scores_b
+
+    def wrong_matches_page(self, pipeline_name: str, offset: int, limit: int, filters: Dict[str, str]) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        (number of matching wrong matches, the page of them starting at offset), where a wrong match
+        matches when every key in filters has the given value
+        """
+        with self._lock:
+            state = self._states.get(pipeline_name)
+            wrong_matches = state.wrong_matches if state is not None else []
+        # The list is only ever replaced, never mutated, so it can be filtered outside the lock
+        if filters:
+            wrong_matches = [entry for entry in wrong_matches
+                             if all(entry[1][key] == value for key, value in filters.items())]
+        with self._lock:
+            page = [self._with_explanation(wrong_match) for _, wrong_match in wrong_matches[offset:offset + limit]]
+        return len(wrong_matches), page
+
+    def invalidate(self, pipeline_name: Optional[str] = None):
+        """Drop the cached statistics of one pipeline, or of all pipelines"""
+        with self._lock:
+            if pipeline_name is None:
+                self._states.clear()
+                self._explanations.clear()
+            else:
+                self._states.pop(pipeline_name, None)
+
+
+# Global instance for easy access
+pipeline_statistics_cache = PipelineStatisticsCache()
@@ -8,6 +8,8 @@ load_dotenv()  # Load environment variables from .env file
 from src.routes.routes import router as api_router
 from src.utils.logging_setup import setup_logging
 from src.providers.postgress import postgres_provider
+from src.providers.async_postgress import async_postgres_provider
+from src.providers.result_buffer import result_buffer
 from src.utils.constants import RESULTS_DIR, EXCEL_FILES_DIR, GROUND_TRUTH_DIR, POSTGRES_CONNECTION_STRING
 from src.utils.func_utils import create_directory_if_not_exists
 
@@ -33,18 +35,27 @@ async def lifespan(app: FastAPI):
     # Connect to PostgreSQL
     try:
         print(f"Attempting to connect to PostgreSQL with connection string: {POSTGRES_CONNECTION_STRING}")
+        # The first connection of the process creates/migrates the tables; request handlers use the async
+        # pool, and work in worker threads opens its own postgres_session
         postgres_provider.connect()
+        postgres_provider.disconnect()
         print("Connected to PostgreSQL database successfully")
+        await async_postgres_provider.connect()
+        print("Created async PostgreSQL connection pool")
     except Exception as e:
         print(f"Failed to connect to PostgreSQL: {str(e)}")
         # We might want to handle this differently based on requirements
     
+    # Start the write-behind buffer; it replays any locally spilled results once PostgreSQL is reachable
+    result_buffer.start()
+    
     yield  # This is where the application runs
     
     # Shutdown
     print("Shutting down Kimestry-Benchmark application...")
+    result_buffer.close(timeout=30)
     try:
-        postgres_provider.disconnect()
+        await async_postgres_provider.disconnect()
         print("Disconnected from PostgreSQL database")
     except Exception as e:
         print(f"Error during shutdown: {str(e)}")
@@ -1,14 +1,36 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, List, Optional
 import pandas as pd
 
 from src.utils.models import MatchResultsModel
+from src.utils.timing import JobTimings
 
 
 class AbstractPipeline(ABC):
+    # Jobs of this pipeline type that may run at once, and whether it calls a remote service
+    # (defaults for the pipeline registry; subclasses override them)
+    max_concurrency: int = 1
+    remote: bool = False
+
     def __init__(self, name: str, job_id: str):
         self.name = name
         self.job_id = job_id
+        # Set per job, like job_id, by callers that collect phase timings
+        self.timings: Optional[JobTimings] = None
+
+    def encoding_key(self) -> Optional[tuple]:
+        """
+        Pipelines returning the same key build identical requests for a table, so one encode() can be
+        shared between them (e.g. several routes of one pipeline type). None means nothing to share.
+        """
+        return None
+
+    def encode(self, env_id: str, table_df: pd.DataFrame, env_schema: dict = None) -> Any:
+        """
+        Build the request for a table once, to be passed to run(..., encoded=...) of every pipeline with
+        the same encoding_key. Only called when encoding_key is not None; the result must have close().
+        """
+        raise NotImplementedError
 
     @abstractmethod
     def run(self, env_id: str, table_df: pd.DataFrame, env_schema: dict = None) -> List[MatchResultsModel]:
@@ -0,0 +1,169 @@
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from src.providers.schema_registry import ContentCache, RegisteredSchema
+from src.utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+NGRAM_SIZE = 3
+
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+_CAMEL_CASE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def char_ngrams(text: str, n: int = NGRAM_SIZE) -> List[str]:
+    """Character n-grams of every word, padded with spaces so word starts and ends are distinct grams"""
+    words = _NON_ALPHANUMERIC.split(_CAMEL_CASE.sub(" ", text).lower())
+    grams = []
+    for word in words:
+        if not word:
+            continue
+        padded = f" {word} "
+        grams.extend(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+    return grams
+
+
+def field_texts(field: Dict[str, Any]) -> List[str]:
+    """The texts a field is retrieved by: its name, each column name it was mapped from and its description"""
+    texts = [str(field.get("field_name") or "")]
+    texts.extend(str(name) for name in field.get("mapping_history") or [])
+    texts.append(str(field.get("description") or ""))
+    return [text for text in texts if text]
+
+
+class CandidateIndex:
+    """
+    Character n-gram TF-IDF index over the fields of one environment schema.
+    Every field name, mapping history entry and description is its own document, so an exact alias
+    match is not diluted by the rest of the field. Scores are computed for all query columns at once
+    with postings arrays and one bincount, so query cost grows with the matching postings.
+    """
+
+    def __init__(self, registered: RegisteredSchema):
+        self.content_hash = registered.content_hash
+        schemas = registered.schema.get("schemas", [])
+        self.n_schemas = len(schemas)
+
+        documents: List[List[str]] = []
+        document_schemas: List[int] = []
+        document_fields: List[int] = []
+        # (schema_name, field_name) of every field, in schema order like FieldConstraints.fields
+        self.fields: List[Tuple[str, str]] = []
+        for schema_index, schema in enumerate(schemas):
+            for field in schema.get("fields") or []:
+                for text in field_texts(field):
+                    documents.append(char_ngrams(text))
+                    document_schemas.append(schema_index)
+                    document_fields.append(len(self.fields))
+                self.fields.append((schema.get("schema_name"), field.get("field_name")))
+        self.n_documents = len(documents)
+        self.document_schemas = np.array(document_schemas, dtype=np.intp)
+        self.document_fields = np.array(document_fields, dtype=np.intp)
+
+        self.vocabulary: Dict[str, int] = {}
+        doc_ids, term_ids, counts = [], [], []
+        for doc_id, grams in enumerate(documents):
+            for gram, count in Counter(grams).items():
+                doc_ids.append(doc_id)
+                term_ids.append(self.vocabulary.setdefault(gram, len(self.vocabulary)))
+                counts.append(count)
+        doc_ids = np.array(doc_ids, dtype=np.intp)
+        term_ids = np.array(term_ids, dtype=np.intp)
+        counts = np.array(counts, dtype=float)
+
+        # Smoothed idf and sublinear tf, as in the usual TF-IDF weighting
+        document_frequency = np.bincount(term_ids, minlength=len(self.vocabulary))
+        self.idf = np.log((1 + self.n_documents) / (1 + document_frequency)) + 1
+        weights = (1 + np.log(counts)) * self.idf[term_ids]
+        norms = np.sqrt(np.bincount(doc_ids, weights=weights ** 2, minlength=self.n_documents))
+        weights = weights / norms[doc_ids]
+
+        # Postings sorted by term: documents and weights of term t are [indptr[t], indptr[t + 1])
+        order = np.argsort(term_ids, kind="stable")
+        self.posting_docs = doc_ids[order]
+        self.posting_weights = weights[order]
+        self.indptr = np.concatenate([[0], np.cumsum(document_frequency)])
+
+    def document_scores(self, queries: List[str]) -> np.ndarray:
+        """Cosine similarity of every query to every document, shape (len(queries), n_documents)"""
+        query_ids, term_ids, query_weights = [], [], []
+        # Grams never seen in the index still count towards the query norm, with the largest idf
+        unseen_idf = np.log(1 + self.n_documents) + 1
+        for query_id, query in enumerate(queries):
+            grams = Counter(char_ngrams(query))
+            known = [(self.vocabulary[gram], count) for gram, count in grams.items() if gram in self.vocabulary]
+            if not known:
+                continue
+            unseen = np.array([count for gram, count in grams.items() if gram not in self.vocabulary], dtype=float)
+            terms = np.array([term for term, _ in known], dtype=np.intp)
+            weights = (1 + np.log(np.array([count for _, count in known], dtype=float))) * self.idf[terms]
+            norm = np.sqrt((weights ** 2).sum() + (((1 + np.log(unseen)) * unseen_idf) ** 2).sum())
+            query_ids.append(np.full(len(terms), query_id, dtype=np.intp))
+            term_ids.append(terms)
+            query_weights.append(weights / norm)
+        if not query_ids or not self.n_documents:
+            return np.zeros((len(queries), self.n_documents))
+        query_ids = np.concatenate(query_ids)
+        term_ids = np.concatenate(term_ids)
+        query_weights = np.concatenate(query_weights)
+
+        # Expand every (query, term) entry into that term's postings without a Python loop
+        starts = self.indptr[term_ids]
+        lengths = self.indptr[term_ids + 1] - starts
+        entry = np.repeat(np.arange(len(term_ids)), lengths)
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        products = query_weights[entry] * self.posting_weights[positions]
+        cells = query_ids[entry] * self.n_documents + self.posting_docs[positions]
+        return np.bincount(cells, weights=products, minlength=len(queries) * self.n_documents).reshape(
+            len(queries), self.n_documents)
+
+    def _best_documents(self, column_names: Iterable[str], groups: np.ndarray, n_groups: int) -> np.ndarray:
+        """Per column, the best document similarity within each group of documents, shape (columns, n_groups)"""
+        queries = [str(name) for name in column_names]
+        scores = np.zeros((len(queries), n_groups))
+        if self.n_documents:
+            # Every column at once in one unbuffered maximum
+            np.maximum.at(scores.T, groups, self.document_scores(queries).T)
+        return scores
+
+    def field_scores(self, column_names: Iterable[str]) -> np.ndarray:
+        """Similarity of every column to every field (its best text), shape (columns, len(self.fields))"""
+        return self._best_documents(column_names, self.document_fields, len(self.fields))
+
+    def schema_scores(self, column_names: Iterable[str]) -> np.ndarray:
+        """Per schema, the sum over columns of the column's best field similarity in that schema"""
+        return self._best_documents(column_names, self.document_schemas, self.n_schemas).sum(axis=0)
+
+    def top_schemas(self, column_names: Iterable[str], k: int) -> List[int]:
+        """Indices of the k best-scoring schemas, in their original order (all schemas if k covers them)"""
+        if k <= 0 or k >= self.n_schemas:
+            return list(range(self.n_schemas))
+        scores = self.schema_scores(column_names)
+        # Stable sort keeps the original order among equal scores
+        best = np.argsort(-scores, kind="stable")[:k]
+        return sorted(best.tolist())
+
+
+def _build_index(registered: RegisteredSchema) -> CandidateIndex:
+    index = CandidateIndex(registered)
+    logger.info(f"Built candidate index for environment {registered.env_id} "
+                f"({index.n_schemas} schemas, {index.n_documents} documents, {len(index.vocabulary)} n-grams)")
+    return index
+
+
+_indexes = ContentCache(_build_index)
+
+
+def candidate_index(registered: RegisteredSchema) -> CandidateIndex:
+    """The retrieval index of a registered schema, built once per schema content"""
+    return _indexes.get(registered)
+
+
+def candidate_schema_json(registered: RegisteredSchema, column_names: Iterable[str], k: int) -> Tuple[str, List[int]]:
+    """Serialized environment schema with only the top-k candidate schemas for a table's columns"""
+    schema_indices = candidate_index(registered).top_schemas(column_names, k)
+    return registered.subset_json(schema_indices), schema_indices
@@ -0,0 +1,113 @@
+import re
+from typing import Any, Dict, List, NamedTuple
+
+import pandas as pd
+
+from src.providers.schema_registry import ContentCache, RegisteredSchema
+from src.pipeline.field_constraints import field_constraints
+from src.utils.constants import FAST_PATH_SAMPLE_SIZE
+from src.utils.models import MatchResultsModel
+from src.utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+EXPLANATION_SOURCE = "fast-path matcher"
+
+_CAMEL_CASE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_SEPARATORS = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(name: Any) -> str:
+    """Case- and separator-insensitive form of a column or field name: 'Contact-Email' and 'contactEmail' -> 'contact_email'"""
+    return _SEPARATORS.sub("_", _CAMEL_CASE.sub("_", str(name)).lower()).strip("_")
+
+
+class FieldCandidate(NamedTuple):
+    schema_name: str
+    field_name: str
+    source: str  # "field name" or "mapping history"
+    checks: str  # Constraints the sample values are checked against, e.g. "regex and value options"
+
+
+class FastPathResult(NamedTuple):
+    results: List[MatchResultsModel]
+    unresolved_columns: List[Any]
+
+
+class FastPathMatcher:
+    """
+    Resolves columns whose normalized name is a field name or mapping history entry of exactly one field
+    (after checking sample values against that field's regex and value options with the compiled
+    field constraints), without calling n8n.
+    Names shared by several fields are resolved only when the sample values rule out all but one of them.
+    """
+
+    def __init__(self, registered: RegisteredSchema):
+        self.constraints = field_constraints(registered)
+        self.names: Dict[str, List[FieldCandidate]] = {}
+        for schema in registered.schema.get("schemas", []):
+            for field in schema.get("fields") or []:
+                checks = " and ".join(name for name, present in (("regex", field.get("regex")),
+                                                                 ("value options", field.get("value_options"))) if present)
+                aliases = [(field.get("field_name"), "field name")]
+                aliases.extend((name, "mapping history") for name in field.get("mapping_history") or [])
+                for alias, source in aliases:
+                    key = normalize_name(alias or "")
+                    if not key:
+                        continue
+                    candidates = self.names.setdefault(key, [])
+                    # The same field under two aliases normalizing alike is one candidate; keep the field name source
+                    if not any(c.schema_name == schema.get("schema_name") and c.field_name == field.get("field_name")
+                               for c in candidates):
+                        candidates.append(FieldCandidate(schema.get("schema_name"), field.get("field_name"), source, checks))
+
+    def match(self, table_df: pd.DataFrame, sample_size: int = FAST_PATH_SAMPLE_SIZE) -> FastPathResult:
+        """Results for the columns resolved locally, and the columns left for the pipeline, in table order"""
+        candidates_by_column = [self.names.get(normalize_name(column)) for column in table_df.columns]
+        # Sample values are only checked for columns with a name match
+        named = [position for position, candidates in enumerate(candidates_by_column) if candidates]
+        matrix = self.constraints.compatibility(table_df.iloc[:, named], sample_size) if named else None
+        matrix_rows = {position: row for row, position in enumerate(named)}
+
+        results, unresolved = [], []
+        for position, column in enumerate(table_df.columns):
+            candidates = candidates_by_column[position]
+            if not candidates:
+                unresolved.append(column)
+                continue
+            row = matrix_rows[position]
+            # A candidate is accepted when every sample value satisfies its constraints
+            accepted = [candidate for candidate in candidates
+                        if matrix.score(row, candidate.schema_name, candidate.field_name) == 1.0]
+            if len(accepted) != 1:
+                unresolved.append(column)
+                continue
+            match = accepted[0]
+            sampled = int(matrix.samples[row])
+            evidence = f"; {sampled} sample values satisfy its {match.checks}" if match.checks and sampled else ""
+            results.append(MatchResultsModel(
+                original_column=str(column),
+                fitted_column=match.field_name,
+                fitted_schema=match.schema_name,
+                explanation=(f"Resolved by the {EXPLANATION_SOURCE}: column '{column}' maps to '{match.field_name}' field "
+                             f"in {match.schema_name} schema based on {match.source}{evidence}.")
+            ))
+        return FastPathResult(results, unresolved)
+
+
+def merge_results(table_df: pd.DataFrame, local_results: List[MatchResultsModel],
+                  pipeline_results: List[MatchResultsModel]) -> List[MatchResultsModel]:
+    """Local and pipeline results in table column order; local results win for columns both returned"""
+    resolved = {result.original_column for result in local_results}
+    merged = local_results + [result for result in pipeline_results if result.original_column not in resolved]
+    position = {str(column): index for index, column in enumerate(table_df.columns)}
+    return sorted(merged, key=lambda result: position.get(result.original_column, len(position)))
+
+
+_matchers = ContentCache(FastPathMatcher)
+
+
+def fast_path_matcher(registered: RegisteredSchema) -> FastPathMatcher:
+    """The fast-path matcher of a registered schema, built once per schema content"""
+    return _matchers.get(registered)
+
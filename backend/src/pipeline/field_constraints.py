@@ -0,0 +1,123 @@
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.providers.schema_registry import ContentCache, RegisteredSchema
+from src.utils.constants import FAST_PATH_SAMPLE_SIZE
+from src.utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+def column_samples(table_df: pd.DataFrame, sample_size: int = FAST_PATH_SAMPLE_SIZE) -> Tuple[pd.Series, np.ndarray]:
+    """
+    Up to sample_size distinct non-null values of every column as strings, stacked into one Series,
+    with the position of each value's column. Lets every constraint run once over all columns.
+    """
+    samples, codes = [], []
+    for position, column in enumerate(table_df.columns):
+        sample = table_df.iloc[:, position].dropna().astype(str).drop_duplicates().head(sample_size)
+        samples.append(sample.to_numpy(dtype=object))
+        codes.append(np.full(len(sample), position, dtype=np.intp))
+    values = pd.Series(np.concatenate(samples) if samples else np.array([], dtype=object), dtype=object)
+    return values, np.concatenate(codes) if codes else np.array([], dtype=np.intp)
+
+
+class CompatibilityMatrix(NamedTuple):
+    """
+    scores[c, f]: share of column c's sample values that satisfy field f's regex and value options
+    (1.0 when f has no constraints, or c has no values to check). constrained[f] tells whether field f
+    has any constraint; samples[c] is the number of values checked for column c.
+    """
+    columns: List[str]
+    fields: List[Tuple[str, str]]  # (schema_name, field_name)
+    field_positions: Dict[Tuple[str, str], int]
+    scores: np.ndarray
+    constrained: np.ndarray
+    samples: np.ndarray
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.scores, index=self.columns,
+                            columns=pd.MultiIndex.from_tuples(self.fields, names=["schema_name", "field_name"]))
+
+    def score(self, column_position: int, schema_name: str, field_name: str) -> Optional[float]:
+        """Compatibility of the column at a position with one field, None for an unknown field"""
+        field_position = self.field_positions.get((schema_name, field_name))
+        return None if field_position is None else float(self.scores[column_position, field_position])
+
+
+class FieldConstraints:
+    """
+    Precompiled regex and value-option constraints of every field of one environment schema.
+    Identical regexes and option sets are evaluated once, each with a single vectorized
+    str.fullmatch / isin over the stacked samples of all columns.
+    """
+
+    def __init__(self, registered: RegisteredSchema):
+        field_keys: List[Tuple[str, str]] = []
+        pattern_ids: List[int] = []
+        option_ids: List[int] = []
+        pattern_index: Dict[str, int] = {}
+        self.patterns: List[re.Pattern] = []
+        option_sets: Dict[frozenset, int] = {}
+        for schema in registered.schema.get("schemas", []):
+            for field in schema.get("fields") or []:
+                field_keys.append((schema.get("schema_name"), field.get("field_name")))
+                regex = field.get("regex")
+                if regex and regex not in pattern_index:
+                    try:
+                        self.patterns.append(re.compile(regex))
+                        pattern_index[regex] = len(self.patterns) - 1
+                    except re.error as e:
+                        logger.warning(f"Ignoring invalid regex of field {field.get('field_name')} in environment {registered.env_id}: {e}")
+                        pattern_index[regex] = -1
+                pattern_ids.append(pattern_index[regex] if regex else -1)
+                options = field.get("value_options")
+                option_set = frozenset(str(option).lower() for option in options) if options else None
+                if option_set is not None:
+                    option_ids.append(option_sets.setdefault(option_set, len(option_sets)))
+                else:
+                    option_ids.append(-1)
+        self.fields = field_keys
+        # First occurrence wins if two fields of a schema share a name
+        self.field_positions: Dict[Tuple[str, str], int] = {}
+        for position, key in enumerate(field_keys):
+            self.field_positions.setdefault(key, position)
+        self.option_sets = list(option_sets)
+        self.pattern_ids = np.array(pattern_ids, dtype=np.intp)
+        self.option_ids = np.array(option_ids, dtype=np.intp)
+        self.constrained = (self.pattern_ids >= 0) | (self.option_ids >= 0)
+
+    def compatibility(self, table_df: pd.DataFrame, sample_size: int = FAST_PATH_SAMPLE_SIZE) -> CompatibilityMatrix:
+        """Column x field compatibility of a table's sample values with every field's constraints"""
+        values, codes = column_samples(table_df, sample_size)
+        n_columns, n_fields = len(table_df.columns), len(self.fields)
+        samples = np.bincount(codes, minlength=n_columns)
+
+        # One pass per distinct constraint: rows are constraints, columns are sampled values
+        pattern_pass = np.ones((len(self.patterns) + 1, len(values)), dtype=bool)
+        for pattern_id, pattern in enumerate(self.patterns):
+            pattern_pass[pattern_id] = values.str.fullmatch(pattern).fillna(False).to_numpy(dtype=bool)
+        lowered = values.str.lower()
+        option_pass = np.ones((len(self.option_sets) + 1, len(values)), dtype=bool)
+        for option_id, option_set in enumerate(self.option_sets):
+            option_pass[option_id] = lowered.isin(option_set).to_numpy(dtype=bool)
+
+        # Row -1 of each pass matrix is "no constraint", so unconstrained fields pass every value
+        passes = pattern_pass[self.pattern_ids] & option_pass[self.option_ids]
+        cells = (codes[np.newaxis, :] + np.arange(n_fields)[:, np.newaxis] * n_columns).ravel()
+        passed = np.bincount(cells, weights=passes.ravel(), minlength=n_fields * n_columns).reshape(n_fields, n_columns).T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores = np.where(samples[:, np.newaxis] > 0, passed / samples[:, np.newaxis], 1.0)
+        return CompatibilityMatrix([str(column) for column in table_df.columns], self.fields, self.field_positions,
+                                   scores, self.constrained, samples)
+
+
+_constraints = ContentCache(FieldConstraints)
+
+
+def field_constraints(registered: RegisteredSchema) -> FieldConstraints:
+    """The compiled field constraints of a registered schema, built once per schema content"""
+    return _constraints.get(registered)
@@ -0,0 +1,43 @@
+from typing import List
+import pandas as pd
+
+from src.pipeline.abstract_pipeline import AbstractPipeline
+from src.pipeline.fast_path import fast_path_matcher
+from src.providers.schema_registry import schema_registry
+from src.utils.models import MatchResultsModel
+from src.utils.constants import LOCAL_PIPELINE_CONCURRENCY
+from src.utils.timing import timed_phase
+from src.utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+def no_match(column, reason: str) -> MatchResultsModel:
+    """A result for a column that fits no field, in the ground truth's format for such columns"""
+    return MatchResultsModel(original_column=str(column), fitted_column="", fitted_schema="", explanation=reason)
+
+
+class FastPathPipeline(AbstractPipeline):
+    """
+    In-process pipeline that only uses the fast-path matcher: columns named like a field or one of its
+    mapping history entries (with sample values passing the field's constraints) are matched, every
+    other column is reported as having no match. A baseline for what the LLM adds.
+    """
+    max_concurrency = LOCAL_PIPELINE_CONCURRENCY
+
+    def __init__(self, name: str = "fast_path", job_id: str = ""):
+        super().__init__(name, job_id)
+
+    def run(self, env_id: str, table_df: pd.DataFrame, env_schema: dict = None) -> List[MatchResultsModel]:
+        if not env_schema:
+            return [no_match(column, "No environment schema to match against.") for column in table_df.columns]
+        with timed_phase(self.timings, "parse"):
+            local_results, unresolved_columns = fast_path_matcher(schema_registry.for_schema(env_id, env_schema)).match(table_df)
+            results = {result.original_column: result for result in local_results}
+            output = [results.get(str(column)) or no_match(column, f"Column '{column}' matches no field name or mapping history exactly.")
+                      for column in table_df.columns]
+        if self.timings is not None:
+            self.timings.table_columns += len(table_df.columns)
+            self.timings.local_columns += len(table_df.columns)
+        logger.info(f"Fast path pipeline matched {len(local_results)} of {len(table_df.columns)} columns for job {self.job_id}")
+        return output
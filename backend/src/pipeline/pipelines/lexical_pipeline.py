@@ -0,0 +1,60 @@
+from typing import List
+import numpy as np
+import pandas as pd
+
+from src.pipeline.abstract_pipeline import AbstractPipeline
+from src.pipeline.candidate_retrieval import candidate_index
+from src.pipeline.fast_path import fast_path_matcher, merge_results
+from src.pipeline.field_constraints import field_constraints
+from src.pipeline.pipelines.fast_path_pipeline import no_match
+from src.providers.schema_registry import schema_registry
+from src.utils.models import MatchResultsModel
+from src.utils.constants import LOCAL_PIPELINE_CONCURRENCY, LEXICAL_MATCH_THRESHOLD
+from src.utils.timing import timed_phase
+from src.utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+class LexicalPipeline(AbstractPipeline):
+    """
+    In-process pipeline without an LLM: exact names go through the fast-path matcher, every other
+    column is matched to the field maximizing (n-gram similarity of the column name to the field's
+    name, mapping history and description) x (share of sample values passing the field's constraints).
+    Columns scoring below the threshold get no match.
+    """
+    max_concurrency = LOCAL_PIPELINE_CONCURRENCY
+
+    def __init__(self, name: str = "lexical", job_id: str = "", threshold: float = LEXICAL_MATCH_THRESHOLD):
+        super().__init__(name, job_id)
+        self.threshold = threshold
+
+    def run(self, env_id: str, table_df: pd.DataFrame, env_schema: dict = None) -> List[MatchResultsModel]:
+        if not env_schema:
+            return [no_match(column, "No environment schema to match against.") for column in table_df.columns]
+        with timed_phase(self.timings, "parse"):
+            registered = schema_registry.for_schema(env_id, env_schema)
+            local_results, unresolved_columns = fast_path_matcher(registered).match(table_df)
+            matched = []
+            if unresolved_columns:
+                remaining = table_df[unresolved_columns]
+                index = candidate_index(registered)
+                # Both matrices list the fields in schema order, so they multiply cell by cell
+                scores = index.field_scores(unresolved_columns) * field_constraints(registered).compatibility(remaining).scores
+                best = scores.argmax(axis=1) if scores.shape[1] else np.zeros(len(unresolved_columns), dtype=np.intp)
+                for row, column in enumerate(unresolved_columns):
+                    score = float(scores[row, best[row]]) if scores.shape[1] else 0.0
+                    if score < self.threshold:
+                        matched.append(no_match(column, f"Column '{column}' is not similar enough to any field (best score {score:.2f})."))
+                        continue
+                    schema_name, field_name = index.fields[best[row]]
+                    matched.append(MatchResultsModel(
+                        original_column=str(column), fitted_column=field_name, fitted_schema=schema_name,
+                        explanation=(f"Column '{column}' maps to '{field_name}' field in {schema_name} schema by name "
+                                     f"similarity and sample values (score {score:.2f}).")
+                    ))
+            results = merge_results(table_df, local_results, matched)
+        if self.timings is not None:
+            self.timings.table_columns += len(table_df.columns)
+            self.timings.local_columns += len(table_df.columns)
+        return results
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, NamedTuple, Optional
 import pandas as pd
 import tempfile
 import os
@@ -6,6 +6,11 @@ import os
 from src.pipeline.abstract_pipeline import AbstractPipeline
 from src.utils.models import MatchResultsModel
 from src.providers.n8n import n8n_provider
+from src.providers.schema_registry import schema_registry
+from src.pipeline.candidate_retrieval import candidate_schema_json
+from src.pipeline.fast_path import fast_path_matcher, merge_results
+from src.utils.constants import SCHEMA_CANDIDATES_TOP_K, FAST_PATH_MATCHING, N8N_MAX_CONCURRENCY
+from src.utils.timing import timed_phase
 from src.utils.logging_setup import get_logger
 
 logger = get_logger(__name__)
@@ -15,38 +20,91 @@ class N8NPipeline(AbstractPipeline):
     """
     This pipeline inherits from AbstractPipeline.
     In the run method, it sends the Excel file to the n8n webhook for processing.
+    Columns the fast-path matcher resolves locally are left out of the request.
     """
+    max_concurrency = N8N_MAX_CONCURRENCY
+    remote = True
     
-    def __init__(self, name: str = "n8n_pipeline", job_id: str = "", n8n_route: str = None, timeout: int = 600):
+    def __init__(self, name: str = "n8n_pipeline", job_id: str = "", n8n_route: str = None, timeout: int = 600,
+                 candidates_top_k: int = SCHEMA_CANDIDATES_TOP_K, fast_path: bool = FAST_PATH_MATCHING):
         super().__init__(name, job_id)
         self.n8n_route = n8n_route
         self.timeout = timeout
+        # Schemas sent per table, pre-selected locally by candidate retrieval (0 sends all of them)
+        self.candidates_top_k = candidates_top_k
+        self.fast_path = fast_path
         
-    def run(self, env_id: str, table_df: pd.DataFrame, env_schema: dict = None) -> List[MatchResultsModel]:
+    def encoding_key(self) -> Optional[tuple]:
+        # Requests depend only on the table and these settings, not on the name or route
+        return ("n8n", self.fast_path, self.candidates_top_k)
+
+    def encode(self, env_id: str, table_df: pd.DataFrame, env_schema: dict = None) -> "EncodedRequest":
+        """
+        Resolve what the fast path can and write the rest of the table to a temporary Excel file,
+        with the candidate schemas to send alongside. The caller closes the returned request.
+        """
+        local_results, request_df = [], table_df
+        if env_schema and self.fast_path:
+            with timed_phase(self.timings, "encode"):
+                registered = schema_registry.for_schema(env_id, env_schema)
+                local_results, unresolved_columns = fast_path_matcher(registered).match(table_df)
+                request_df = table_df[unresolved_columns]
+            logger.info(f"Fast path resolved {len(local_results)} of {len(table_df.columns)} columns for job {self.job_id}")
+        if len(request_df.columns) == 0 and local_results:
+            return EncodedRequest(local_results, request_df, None, None)
+        
+        # Create a temporary Excel file to send to n8n
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as temp_file:
+            temp_file_path = temp_file.name
+        try:
+            # Need to close the file handle before using pandas to write to it
+            with timed_phase(self.timings, "encode"):
+                request_df.to_excel(temp_file_path, index=False, engine='openpyxl')
+                env_schema_json = None
+                if env_schema and self.candidates_top_k > 0:
+                    registered = schema_registry.for_schema(env_id, env_schema)
+                    env_schema_json, schema_indices = candidate_schema_json(registered, request_df.columns, self.candidates_top_k)
+                    logger.info(f"Sending {len(schema_indices)} of {len(registered.schema_fragments)} candidate schemas for job {self.job_id}")
+        except Exception:
+            EncodedRequest(local_results, request_df, temp_file_path, None).close()
+            raise
+        return EncodedRequest(local_results, request_df, temp_file_path, env_schema_json)
+
+    def run(self, env_id: str, table_df: pd.DataFrame, env_schema: dict = None,
+            encoded: Optional["EncodedRequest"] = None) -> List[MatchResultsModel]:
         """
         Run the n8n pipeline by sending the table data to the n8n webhook.
         This method saves the DataFrame as an Excel file and uploads it to n8n.
+        A request from encode() can be passed in to share it between pipelines; it is then left open.
         """
         logger.info(f"Running n8n pipeline for environment {env_id}, job {self.job_id}")
         
-        temp_file_path = None
+        owns_request = encoded is None
         try:
-            # Create a temporary Excel file to send to n8n
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as temp_file:
-                temp_file_path = temp_file.name
-            # Need to close the file handle before using pandas to write to it
-            table_df.to_excel(temp_file_path, index=False, engine='openpyxl')
+            if owns_request:
+                encoded = self.encode(env_id, table_df, env_schema)
+            local_results = encoded.local_results
+            if self.timings is not None:
+                self.timings.table_columns += len(table_df.columns)
+                self.timings.local_columns += len(local_results)
+            if encoded.file_path is None:
+                logger.info(f"All columns resolved locally, skipping n8n for job {self.job_id}")
+                return local_results
             
             logger.info(f"Sending Excel file to n8n webhook for job {self.job_id}")
             
             # Send the Excel file to the n8n webhook with the environment schema
-            results = n8n_provider.send_excel_file(temp_file_path, env_id, self.job_id, env_schema, self.n8n_route, self.timeout)
+            results = n8n_provider.send_excel_file(encoded.file_path, env_id, self.job_id, env_schema, self.n8n_route, self.timeout,
+                                                   timings=self.timings, env_schema_json=encoded.env_schema_json)
             
+            # A failed or empty answer fails the whole job: returning only the locally resolved columns would
+            # score a failing route on the easy columns alone
             if results is not None:
                 logger.info(f"n8n pipeline completed for job {self.job_id}")
                 # Process the n8n response and convert to MatchResultsModel objects
                 if results:  # Check if results list is not empty
-                    fixed_results = [MatchResultsModel(**res) for res in results]
+                    with timed_phase(self.timings, "parse"):
+                        fixed_results = merge_results(table_df, local_results, [MatchResultsModel(**res) for res in results])
                     return fixed_results
                 else:
                     logger.warning(f"n8n pipeline returned empty result for job {self.job_id}")
@@ -62,10 +120,22 @@ class N8NPipeline(AbstractPipeline):
             # Re-raise the exception to properly propagate errors
             raise
         finally:
-            # Clean up the temporary file
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.remove(temp_file_path)
-                except Exception as e:
-                    # If we can't remove the file, it's not critical for functionality
-                    logger.warning(f"Could not remove temporary file {temp_file_path}: {str(e)}")
\ No newline at end of file
+            if owns_request and encoded is not None:
+                encoded.close()
+
+
+class EncodedRequest(NamedTuple):
+    """An n8n request for one table: the locally resolved columns and the Excel file of the rest"""
+    local_results: List[MatchResultsModel]
+    request_df: pd.DataFrame
+    file_path: Optional[str]  # None when every column was resolved locally
+    env_schema_json: Optional[str]
+
+    def close(self):
+        """Clean up the temporary file"""
+        if self.file_path and os.path.exists(self.file_path):
+            try:
+                os.remove(self.file_path)
+            except Exception as e:
+                # If we can't remove the file, it's not critical for functionality
+                logger.warning(f"Could not remove temporary file {self.file_path}: {str(e)}")
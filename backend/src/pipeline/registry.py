@@ -0,0 +1,150 @@
+import asyncio
+import importlib
+import inspect
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from importlib.metadata import entry_points
+from typing import Any, Dict, List, Optional, Type
+
+from src.pipeline.abstract_pipeline import AbstractPipeline
+from src.utils.constants import N8N_URL, PIPELINE_PLUGINS, PIPELINE_REQUEST_CONCURRENCY
+from src.utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+# Installed packages can contribute pipelines under this entry point group, e.g. in pyproject.toml:
+#   [project.entry-points."kimestry.pipelines"]
+#   my_matcher = "my_package.matcher:MyMatcherPipeline"
+ENTRY_POINT_GROUP = "kimestry.pipelines"
+
+
+class PipelineSpec:
+    """
+    A registered pipeline type: its class, whether it calls a remote service, how many benchmark jobs may
+    run at once and how many single requests may run at once
+    """
+
+    def __init__(self, pipeline_type: str, pipeline_class: Type[AbstractPipeline], max_concurrency: int, remote: bool,
+                 request_concurrency: int = PIPELINE_REQUEST_CONCURRENCY):
+        self.pipeline_type = pipeline_type
+        self.pipeline_class = pipeline_class
+        self.max_concurrency = max(1, max_concurrency)
+        self.request_concurrency = max(1, request_concurrency)
+        self.remote = remote
+        # Benchmark jobs and single requests have separate limits, so user uploads never queue behind a
+        # running benchmark; one semaphore per key (the n8n route of remote pipelines), so separate
+        # endpoints don't queue behind each other either
+        self._slots: Dict[Optional[str], threading.BoundedSemaphore] = {}
+        self._slots_lock = threading.Lock()
+        self._request_slots: Dict[Optional[str], asyncio.Semaphore] = {}
+
+    def create(self, name: str, job_id: str = "", **options: Any) -> AbstractPipeline:
+        """A new pipeline instance, passing only the options its constructor accepts"""
+        parameters = inspect.signature(self.pipeline_class.__init__).parameters
+        if not any(p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters.values()):
+            options = {key: value for key, value in options.items() if key in parameters}
+        return self.pipeline_class(name=name, job_id=job_id, **options)
+
+    def slot_key(self, route: Optional[str] = None) -> Optional[str]:
+        """
+        The key a job's slots are held under: the resolved route of remote pipelines (no route means
+        N8N_URL, as for the n8n provider), so both spellings share one limit; None for local pipelines
+        """
+        return (route or N8N_URL) if self.remote else None
+
+    @contextmanager
+    def slot(self, key: Optional[str] = None):
+        """Hold one of the pipeline type's concurrency slots (for key) for the duration of a job"""
+        with self._slots_lock:
+            slots = self._slots.setdefault(self.slot_key(key), threading.BoundedSemaphore(self.max_concurrency))
+        with slots:
+            yield
+
+    @asynccontextmanager
+    async def request_slot(self, key: Optional[str] = None):
+        """
+        Hold one of the pipeline type's single-request slots (for key) on the event loop, so requests
+        waiting for a slot don't hold a worker thread; dispatch to the threadpool inside it
+        """
+        slots = self._request_slots.setdefault(self.slot_key(key), asyncio.Semaphore(self.request_concurrency))
+        async with slots:
+            yield
+
+    def describe(self) -> Dict[str, Any]:
+        return {"pipeline_type": self.pipeline_type, "class": self.pipeline_class.__name__,
+                "max_concurrency": self.max_concurrency, "request_concurrency": self.request_concurrency,
+                "remote": self.remote,
+                "description": inspect.getdoc(self.pipeline_class) or ""}
+
+
+class PipelineRegistry:
+    """
+    Pipeline types by name. Built-in pipelines register on import; installed plugins are discovered
+    through the kimestry.pipelines entry points and the PIPELINE_PLUGINS setting ("module:Class,...").
+    Concurrency limits and the remote flag default to the pipeline class attributes.
+    """
+
+    def __init__(self):
+        self._specs: Dict[str, PipelineSpec] = {}
+        self._lock = threading.Lock()
+        self._discovered = False
+
+    def register(self, pipeline_type: str, pipeline_class: Type[AbstractPipeline],
+                 max_concurrency: Optional[int] = None, remote: Optional[bool] = None) -> PipelineSpec:
+        if not (inspect.isclass(pipeline_class) and issubclass(pipeline_class, AbstractPipeline)):
+            raise TypeError(f"Pipeline {pipeline_type} must be an AbstractPipeline subclass, got {pipeline_class!r}")
+        spec = PipelineSpec(pipeline_type, pipeline_class,
+                            max_concurrency if max_concurrency is not None else pipeline_class.max_concurrency,
+                            remote if remote is not None else pipeline_class.remote)
+        with self._lock:
+            if pipeline_type in self._specs and self._specs[pipeline_type].pipeline_class is not pipeline_class:
+                logger.warning(f"Pipeline type {pipeline_type} is registered again, replacing {self._specs[pipeline_type].pipeline_class.__name__}")
+            self._specs[pipeline_type] = spec
+        return spec
+
+    def _discover(self):
+        """Load entry point and PIPELINE_PLUGINS pipelines once; a broken plugin is logged and skipped"""
+        if self._discovered:
+            return
+        self._discovered = True
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                self.register(entry_point.name, entry_point.load())
+            except Exception as e:
+                logger.error(f"Could not load pipeline plugin {entry_point.name} ({entry_point.value}): {str(e)}")
+        for plugin in filter(None, (item.strip() for item in PIPELINE_PLUGINS.split(","))):
+            try:
+                module_name, _, attribute = plugin.partition(":")
+                pipeline_class = getattr(importlib.import_module(module_name), attribute)
+                self.register(getattr(pipeline_class, "pipeline_type", attribute), pipeline_class)
+            except Exception as e:
+                logger.error(f"Could not load pipeline plugin {plugin}: {str(e)}")
+
+    def get(self, pipeline_type: str) -> PipelineSpec:
+        """The spec of a pipeline type; raises KeyError naming the available types"""
+        self._discover()
+        spec = self._specs.get(pipeline_type)
+        if spec is None:
+            raise KeyError(f"Unknown pipeline type {pipeline_type}, available: {', '.join(sorted(self._specs))}")
+        return spec
+
+    def create(self, pipeline_type: str, name: str, job_id: str = "", **options: Any) -> AbstractPipeline:
+        return self.get(pipeline_type).create(name, job_id, **options)
+
+    def specs(self) -> List[PipelineSpec]:
+        self._discover()
+        return [self._specs[pipeline_type] for pipeline_type in sorted(self._specs)]
+
+
+def _register_builtin_pipelines(registry: PipelineRegistry):
+    from src.pipeline.pipelines.n8n_pipeline import N8NPipeline
+    from src.pipeline.pipelines.fast_path_pipeline import FastPathPipeline
+    from src.pipeline.pipelines.lexical_pipeline import LexicalPipeline
+    registry.register("n8n_pipeline", N8NPipeline)
+    registry.register("fast_path", FastPathPipeline)
+    registry.register("lexical", LexicalPipeline)
+
+
+# Global instance for easy access
+pipeline_registry = PipelineRegistry()
+_register_builtin_pipelines(pipeline_registry)
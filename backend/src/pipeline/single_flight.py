@@ -0,0 +1,60 @@
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from src.utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+def request_key(content: bytes, pipeline_type: str, pipeline_route: Optional[str], env_id: str,
+                schema_hash: str, timeout: int) -> Tuple[Any, ...]:
+    """
+    Requests with equal keys run the same pipeline on the same workbook against the same schema with the
+    same timeout, so no caller waits on an execution bounded by another caller's timeout
+    """
+    return (hashlib.md5(content).hexdigest(), pipeline_type, pipeline_route or "", env_id, schema_hash, timeout)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls on the event loop: the first caller for a key starts the call,
+    callers arriving while it is in flight await the same result (or exception). The call runs as its
+    own task, so a disconnecting caller doesn't cancel it for the others. Nothing is cached once it ends.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0  # Calls answered by another caller's execution
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """The result of func for key, and whether it came from an execution already in flight"""
+        self.calls += 1
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+            logger.info(f"Joining in-flight execution for {key[0] if isinstance(key, tuple) else key}")
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task), shared
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Marks the exception as retrieved when every caller went away before it was raised
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "executions": self.executions, "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight)}
+
+
+# Global instance for easy access
+pipeline_single_flight = SingleFlight()
@@ -0,0 +1,244 @@
+import asyncpg
+from typing import Dict, List, Any, Optional, Tuple
+from src.utils.constants import POSTGRES_CONNECTION_STRING, ASYNC_DB_POOL_MIN_SIZE, ASYNC_DB_POOL_MAX_SIZE
+from src.utils.logging_setup import get_logger
+from src.utils.timing import JobTimings, JOB_PHASES
+
+logger = get_logger(__name__)
+
+
+class DatabaseUnavailableError(ConnectionError):
+    """The async connection pool does not exist, e.g. because PostgreSQL was unreachable at startup"""
+
+
+class AsyncPostgreSQLProvider:
+    """
+    Non-blocking PostgreSQL reads for the FastAPI request handlers (result rows are written through the
+    result buffer; only small per-request records like job timings are written here).
+    Uses its own asyncpg connection pool; the synchronous PostgreSQLProvider stays in charge of
+    table creation/migration and is still used by the CLI and benchmark code.
+    """
+
+    def __init__(self, connection_string: str = POSTGRES_CONNECTION_STRING,
+                 min_size: int = ASYNC_DB_POOL_MIN_SIZE, max_size: int = ASYNC_DB_POOL_MAX_SIZE):
+        self.connection_string = connection_string
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool: Optional[asyncpg.Pool] = None
+
+    async def connect(self):
+        """Create the connection pool"""
+        try:
+            self.pool = await asyncpg.create_pool(self.connection_string, min_size=self.min_size, max_size=self.max_size)
+            logger.info(f"Created async PostgreSQL pool (min={self.min_size}, max={self.max_size})")
+        except Exception as e:
+            logger.error(f"Failed to create async PostgreSQL pool: {str(e)}")
+            raise
+
+    async def disconnect(self):
+        """Close the connection pool"""
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+            logger.info("Closed async PostgreSQL pool")
+
+    def _acquire(self):
+        """Acquire a pooled connection (async context manager); the single way queries reach the pool"""
+        if self.pool is None:
+            raise DatabaseUnavailableError("PostgreSQL is unavailable: the connection pool was not created")
+        return self.pool.acquire()
+
+    async def check_connection(self) -> bool:
+        """Run a trivial query to verify the database is reachable"""
+        async with self._acquire() as conn:
+            return await conn.fetchval("SELECT 1") == 1
+
+    async def get_pipeline_results_by_pipeline_name(self, pipeline_name: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Retrieve pipeline results for a specific pipeline name"""
+        async with self._acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT * FROM pipeline_results WHERE pipeline_name = $1 ORDER BY timestamp DESC LIMIT $2
+            """, pipeline_name, limit)
+        return [dict(row) for row in rows]
+
+    async def get_recent_pipeline_results(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Retrieve the most recent pipeline results across all pipelines"""
+        async with self._acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT * FROM pipeline_results ORDER BY timestamp DESC LIMIT $1
+            """, limit)
+        return [dict(row) for row in rows]
+
+    async def get_pipeline_result_watermarks(self, watermarks: Dict[str, int], all_pipelines: bool = False) -> Dict[str, Tuple[int, int]]:
+        """
+        Return {pipeline_name: (number of current rows with id <= its watermark, highest id)} in one grouped
+        query, current meaning not superseded by a later job. Covers the pipelines in `watermarks`, or every
+        pipeline with stored rows if all_pipelines is set (unlisted pipelines use watermark 0).
+        """
+        join = "LEFT JOIN" if all_pipelines else "JOIN"
+        async with self._acquire() as conn:
+            rows = await conn.fetch(f"""
+                SELECT p.name, COUNT(*) FILTER (WHERE r.id <= COALESCE(w.watermark, 0)), MAX(r.id)
+                FROM pipeline_result_rows r
+                JOIN result_pipelines p ON p.id = r.pipeline_key
+                {join} unnest($1::text[], $2::integer[]) AS w(name, watermark) ON w.name = p.name
+                WHERE r.superseded_by IS NULL
+                GROUP BY p.name
+            """, list(watermarks.keys()), list(watermarks.values()))
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    async def get_pipeline_result_rows_since(self, after_ids: Dict[str, int]) -> List[tuple]:
+        """
+        Retrieve (id, timestamp, *result row) tuples of the current (not superseded) rows with
+        id > after_ids[pipeline_name] for the given pipelines in one query, ready for scoring, with the
+        explanation key in the explanation slot (see get_explanations)
+        """
+        async with self._acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT r.id, r.timestamp, j.name, t.name, p.name, e.name, r.original_column,
+                       r.fitted_column, r.fitted_schema, r.explanation_key
+                FROM pipeline_result_rows r
+                JOIN result_pipelines p ON p.id = r.pipeline_key
+                JOIN unnest($1::text[], $2::integer[]) AS w(name, after_id) ON w.name = p.name
+                LEFT JOIN result_jobs j ON j.id = r.job_key
+                LEFT JOIN result_tables t ON t.id = r.table_key
+                LEFT JOIN result_envs e ON e.id = r.env_key
+                WHERE r.id > w.after_id AND r.superseded_by IS NULL
+                ORDER BY p.name, j.name COLLATE "C", r.timestamp, r.id
+            """, list(after_ids.keys()), list(after_ids.values()))
+        return [tuple(row) for row in rows]
+
+    async def get_explanations(self, explanation_keys: List[int]) -> Dict[int, str]:
+        """Retrieve {explanation key: explanation text} for the given keys"""
+        if not explanation_keys:
+            return {}
+        async with self._acquire() as conn:
+            rows = await conn.fetch("SELECT id, explanation FROM result_explanations WHERE id = ANY($1::integer[])",
+                                    list(explanation_keys))
+        return {row[0]: row[1] for row in rows}
+
+    async def get_pipeline_results_version(self, pipeline_name: Optional[str] = None) -> Tuple[int, int, int]:
+        """
+        Return (result row deletions, highest result id, highest job timing id) for the stored results of
+        one pipeline, or of all pipelines. Inserts raise the ids, and deletes and superseding updates bump
+        the trigger-maintained counter, so the triple identifies the state the statistics were computed from; all three are
+        index lookups rather than counts.
+        """
+        async with self._acquire() as conn:
+            if pipeline_name is None:
+                row = await conn.fetchrow("""
+                    SELECT (SELECT deletions FROM pipeline_result_deletions),
+                           (SELECT COALESCE(MAX(id), 0) FROM pipeline_result_rows),
+                           (SELECT COALESCE(MAX(id), 0) FROM pipeline_job_timings)
+                """)
+            else:
+                row = await conn.fetchrow("""
+                    SELECT (SELECT deletions FROM pipeline_result_deletions),
+                           (SELECT COALESCE(MAX(r.id), 0) FROM pipeline_result_rows r
+                            WHERE r.pipeline_key = (SELECT id FROM result_pipelines WHERE name = $1)),
+                           (SELECT COALESCE(MAX(t.id), 0) FROM pipeline_job_timings t WHERE t.pipeline_name = $1)
+                """, pipeline_name)
+        return row[0] or 0, row[1], row[2]
+
+    async def get_job_latency_percentiles(self, pipeline_names: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Return {pipeline_name: p50/p95/p99 of total and network seconds per job, plus job count, average
+        payload sizes and the fraction of columns resolved locally} from the recorded job timings,
+        for the given pipelines or all of them
+        """
+        async with self._acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT pipeline_name, COUNT(*) AS jobs,
+                       percentile_cont(ARRAY[0.5, 0.95, 0.99]) WITHIN GROUP (ORDER BY total_seconds) AS total_seconds,
+                       percentile_cont(ARRAY[0.5, 0.95, 0.99]) WITHIN GROUP (ORDER BY network_seconds) AS network_seconds,
+                       AVG(request_bytes)::float8 AS avg_request_bytes,
+                       AVG(response_bytes)::float8 AS avg_response_bytes,
+                       SUM(local_columns)::float8 / NULLIF(SUM(table_columns), 0) AS local_resolution_rate
+                FROM pipeline_job_timings
+                WHERE $1::text[] IS NULL OR pipeline_name = ANY($1::text[])
+                GROUP BY pipeline_name
+            """, pipeline_names)
+
+        def percentiles(values: List[float]) -> Dict[str, float]:
+            return dict(zip(("p50", "p95", "p99"), values))
+
+        return {
+            row['pipeline_name']: {
+                "jobs": row['jobs'],
+                "total_seconds": percentiles(row['total_seconds']),
+                "network_seconds": percentiles(row['network_seconds']),
+                "avg_request_bytes": row['avg_request_bytes'],
+                "avg_response_bytes": row['avg_response_bytes'],
+                "local_resolution_rate": row['local_resolution_rate']
+            }
+            for row in rows
+        }
+
+    async def get_benchmark_runs(self, pipeline_name: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Retrieve the most recent benchmark runs of a pipeline, each with its env, table and schema
+        breakdowns and schema confusion matrix
+        """
+        async with self._acquire() as conn:
+            runs = [dict(row) for row in await conn.fetch("""
+                SELECT * FROM benchmark_results WHERE pipeline_name = $1 ORDER BY timestamp DESC LIMIT $2
+            """, pipeline_name, limit)]
+            run_ids = [run['benchmark_run_id'] for run in runs]
+            env_rows = await conn.fetch("""
+                SELECT * FROM env_benchmark_results WHERE benchmark_run_id = ANY($1::text[]) ORDER BY env_id
+            """, run_ids)
+            breakdown_rows = await conn.fetch("""
+                SELECT * FROM benchmark_breakdowns WHERE benchmark_run_id = ANY($1::text[])
+                ORDER BY dimension, dimension_value
+            """, run_ids)
+            confusion_rows = await conn.fetch("""
+                SELECT * FROM benchmark_schema_confusion WHERE benchmark_run_id = ANY($1::text[])
+                ORDER BY expected_schema, predicted_schema
+            """, run_ids)
+
+        by_run = {run['benchmark_run_id']: run for run in runs}
+        for run in runs:
+            run.update({"env": [], "table": [], "schema": [], "schema_confusion": []})
+        for row in env_rows:
+            by_run[row['benchmark_run_id']]["env"].append(dict(row))
+        for row in breakdown_rows:
+            by_run[row['benchmark_run_id']][row['dimension']].append(dict(row))
+        for row in confusion_rows:
+            by_run[row['benchmark_run_id']]["schema_confusion"].append(dict(row))
+        return runs
+
+    async def save_job_timings(self, job_timings: List[JobTimings], benchmark_run_id: Optional[str] = None):
+        """Save the phase timings and payload sizes of jobs run outside a benchmark run (benchmark_run_id NULL)"""
+        async with self._acquire() as conn:
+            await conn.executemany("""
+                INSERT INTO pipeline_job_timings 
+                (benchmark_run_id, job_id, pipeline_name, env_id, table_name, load_seconds, encode_seconds, 
+                 network_seconds, parse_seconds, persist_seconds, total_seconds, request_bytes, response_bytes, result_rows,
+                 table_columns, local_columns, schema_hash)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17)
+            """, [(
+                benchmark_run_id, timings.job_id, timings.pipeline_name, timings.env_id, timings.table_name,
+                *(timings.seconds[phase] for phase in JOB_PHASES),
+                timings.total_seconds, timings.request_bytes, timings.response_bytes, timings.rows,
+                timings.table_columns, timings.local_columns, timings.schema_hash
+            ) for timings in job_timings])
+
+    async def clear_results(self) -> Tuple[int, int]:
+        """Delete all pipeline and benchmark results, returning the number of rows deleted from each"""
+        async with self._acquire() as conn:
+            async with conn.transaction():
+                pipeline_deleted = await conn.fetchval(
+                    "WITH deleted AS (DELETE FROM pipeline_result_rows RETURNING 1) SELECT COUNT(*) FROM deleted")
+                await conn.execute("DELETE FROM result_explanations")
+                benchmark_deleted = await conn.fetchval(
+                    "WITH deleted AS (DELETE FROM benchmark_results RETURNING 1) SELECT COUNT(*) FROM deleted")
+                await conn.execute("DELETE FROM env_benchmark_results")
+                await conn.execute("DELETE FROM benchmark_breakdowns")
+                await conn.execute("DELETE FROM benchmark_schema_confusion")
+                await conn.execute("DELETE FROM pipeline_job_timings")
+                await conn.execute("DELETE FROM schema_versions")
+        return pipeline_deleted, benchmark_deleted
+
+
+# Global instance for easy access
+async_postgres_provider = AsyncPostgreSQLProvider()
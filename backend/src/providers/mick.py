@@ -1,18 +1,128 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
 import requests
-from typing import Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 from src.utils.models import EnvModel
-from src.utils.constants import MICK_API_BASE_URL
+from src.utils.constants import (MICK_API_BASE_URL, MICK_MOCK_SCHEMAS, MICK_POOL_SIZE, MICK_CONNECT_TIMEOUT,
+                                 MICK_READ_TIMEOUT, MICK_RETRIES)
 from src.utils.logging_setup import get_logger
 
 logger = get_logger(__name__)
 
 
+class MickClient:
+    """
+    Pooled HTTP client for the Mick schema API.
+    Keeps one keep-alive connection pool, retries idempotent requests on connection errors and 5xx,
+    and revalidates cached schemas with If-None-Match so unchanged schemas are not transferred again.
+    """
+
+    def __init__(self, base_url: str = MICK_API_BASE_URL, pool_size: int = MICK_POOL_SIZE,
+                 timeout: Tuple[float, float] = (MICK_CONNECT_TIMEOUT, MICK_READ_TIMEOUT), retries: int = MICK_RETRIES):
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=Retry(total=retries, backoff_factor=0.2, status_forcelist=(502, 503, 504),
+                                                allowed_methods=frozenset({"GET"})))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        # env_id -> (etag, schema) of the last successful fetch
+        self._cache: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+
+    def _remember(self, env_id: str, etag: Optional[str], schema: Dict[str, Any]):
+        if etag:
+            with self._lock:
+                self._cache[env_id] = (etag, schema)
+
+    def get_schema(self, env_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Schema of one environment, None when Mick cannot be reached or does not know it.
+        A 304 answer returns the previously fetched dict itself, so callers can tell it is unchanged.
+        """
+        cached = self._cache.get(env_id)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        try:
+            response = self.session.get(f"{self.base_url}/environments/{env_id}/schema", headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to fetch schema of environment {env_id} from Mick: {str(e)}")
+            return None
+        if response.status_code == 304 and cached:
+            return cached[1]
+        if response.status_code != 200:
+            logger.error(f"Mick returned {response.status_code} for the schema of environment {env_id}")
+            return None
+        schema = response.json()
+        self._remember(env_id, response.headers.get("ETag"), schema)
+        return schema
+
+    def get_schemas(self, env_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Schemas of several environments in one request to the batch endpoint, {env_id: schema or None}.
+        Unchanged schemas (by their cached ETag) are returned from the cache; if the batch endpoint is
+        not available, the environments are fetched concurrently over the pool.
+        """
+        if not env_ids:
+            return {}
+        params = {"env_ids": ",".join(env_ids)}
+        etags = {env_id: self._cache[env_id][0] for env_id in env_ids if env_id in self._cache}
+        if etags:
+            params["etags"] = ",".join(f"{env_id}:{etag}" for env_id, etag in etags.items())
+        try:
+            response = self.session.get(f"{self.base_url}/environments/schemas", params=params, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to batch fetch schemas from Mick: {str(e)}")
+            return dict.fromkeys(env_ids)
+        if response.status_code in (404, 405, 501):
+            with ThreadPoolExecutor(max_workers=min(self.pool_size, len(env_ids))) as executor:
+                return dict(zip(env_ids, executor.map(self.get_schema, env_ids)))
+        if response.status_code != 200:
+            logger.error(f"Mick returned {response.status_code} for a batch of {len(env_ids)} schemas")
+            return dict.fromkeys(env_ids)
+
+        # {"environments": {env_id: {"etag": ..., "schema": ... or null when unchanged}}}
+        environments = response.json().get("environments", {})
+        schemas: Dict[str, Optional[Dict[str, Any]]] = {}
+        for env_id in env_ids:
+            entry = environments.get(env_id)
+            if entry is None:
+                schemas[env_id] = None
+            elif entry.get("schema") is None and env_id in self._cache and entry.get("etag") == self._cache[env_id][0]:
+                schemas[env_id] = self._cache[env_id][1]
+            else:
+                schemas[env_id] = entry.get("schema")
+                if schemas[env_id] is not None:
+                    self._remember(env_id, entry.get("etag"), schemas[env_id])
+        return schemas
+
+
 def get_database_schema(env_id: str) -> Optional[EnvModel]:
     """
     Retrieve database schema for a specific environment from the Mick API
+    (or from the built-in mock environments when MICK_MOCK_SCHEMAS is set)
     """
     logger.info(f"Requesting schema for environment {env_id}")
-    
+    if MICK_MOCK_SCHEMAS:
+        return _mock_database_schema(env_id)
+    return mick_client.get_schema(env_id)
+
+
+def get_database_schemas(env_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Retrieve the schemas of several environments at once, {env_id: schema or None}"""
+    logger.info(f"Requesting schemas for environments {', '.join(env_ids)}")
+    if MICK_MOCK_SCHEMAS:
+        return {env_id: _mock_database_schema(env_id) for env_id in env_ids}
+    return mick_client.get_schemas(env_ids)
+
+
+def _mock_database_schema(env_id: str) -> Dict[str, Any]:
+    """Hard-coded environments for development without a Mick server"""
     # Return different schemas based on environment
     if env_id == "env1":
         return {
@@ -189,4 +299,8 @@ def get_database_schema(env_id: str) -> Optional[EnvModel]:
         return {
             "env_id": env_id,
             "schemas": []
-        }
\ No newline at end of file
+        }
+
+
+# Global instance for easy access
+mick_client = MickClient()
@@ -1,7 +1,10 @@
 import requests
+import os
 from typing import Dict, Any, Optional, List
 from src.utils.logging_setup import get_logger
 from src.utils.constants import N8N_URL
+from src.utils.timing import JobTimings, timed_phase
+from src.providers.schema_registry import schema_registry
 
 logger = get_logger(__name__)
 
@@ -15,9 +18,12 @@ class N8NProvider:
         self.n8n_base_url = n8n_base_url
         self.session = requests.Session()
 
-    def send_excel_file(self, file_path: str, env_id: str, job_id: str, env_schema: dict = None, n8n_route: str = None, timeout: int = 600) -> Optional[Dict[str, Any]]:
+    def send_excel_file(self, file_path: str, env_id: str, job_id: str, env_schema: dict = None, n8n_route: str = None, timeout: int = 600,
+                        timings: Optional[JobTimings] = None, env_schema_json: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Send an Excel file to the n8n webhook endpoint
+        If timings is given, the schema encoding, network round trip and response parsing are recorded in it
+        If env_schema_json is given, it is sent as the schema instead of serializing env_schema
         """
         try:
             # Use the provided route if given, otherwise use the default
@@ -35,17 +41,26 @@ class N8NProvider:
                 }
                 
                 # If we have schema data, add it to the form as a JSON string
-                if env_schema:
-                    import json
-                    data['env_schema'] = json.dumps(env_schema)  # Convert the schema dict to a JSON string
+                if env_schema_json is not None:
+                    data['env_schema'] = env_schema_json
+                elif env_schema:
+                    with timed_phase(timings, "encode"):
+                        # Reuses the registry's serialization when env_schema is the registered schema
+                        data['env_schema'] = schema_registry.serialized(env_id, env_schema)
+                if timings is not None:
+                    timings.request_bytes += os.path.getsize(file_path) + len(data.get('env_schema', '').encode('utf-8'))
                 
                 logger.info(f"Sending file {filename} to n8n webhook at {target_url} for job {job_id} with timeout {timeout}s")
                 
                 # Add timeout to prevent hanging
-                response = self.session.post(target_url, files=files, data=data, timeout=timeout)
+                with timed_phase(timings, "network"):
+                    response = self.session.post(target_url, files=files, data=data, timeout=timeout)
+                if timings is not None:
+                    timings.response_bytes += len(response.content)
                 
                 if response.status_code in [200, 201]:
-                    response_json = response.json() if response.content else {}
+                    with timed_phase(timings, "parse"):
+                        response_json = response.json() if response.content else {}
                     logger.info(f"Excel file sent to n8n webhook successfully. Job ID: {job_id}")
                     
                     # Handle the response format: [{"output": [...]}] - a list containing a dict with "output" key
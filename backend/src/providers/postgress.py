@@ -1,26 +1,48 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from typing import Dict, List, Any, Optional
-from src.utils.constants import POSTGRES_CONNECTION_STRING
+from psycopg2.extras import RealDictCursor, execute_values
+from typing import Dict, Iterator, List, Any, Optional, Sequence, Tuple
+from src.utils.constants import POSTGRES_CONNECTION_STRING, EXPLANATION_COMPRESSION
 from src.utils.models import MatchResultsModel
 from src.utils.logging_setup import get_logger
+from src.utils.timing import JobTimings, JOB_PHASES
 import json
+import hashlib
+from contextlib import contextmanager
 from datetime import datetime
 
 logger = get_logger(__name__)
 
+# Dimension tables for the repeated pipeline_results strings, mapped to the legacy column they replace
+RESULT_DIMENSION_TABLES = {
+    "result_jobs": "job_id",
+    "result_tables": "table_name",
+    "result_pipelines": "pipeline_name",
+    "result_envs": "env_id",
+}
+# TOAST compression methods EXPLANATION_COMPRESSION may name
+EXPLANATION_COMPRESSION_METHODS = ("pglz", "lz4")
+# Advisory lock key serializing schema setup and the legacy migration across processes
+SCHEMA_SETUP_LOCK_KEY = 7207165
+
 
 class PostgreSQLProvider:
+    # Databases this process has created/migrated the tables in; only the first connect() to each runs the DDL
+    _schema_ready = set()
+
     def __init__(self, connection_string: str = POSTGRES_CONNECTION_STRING):
         self.connection_string = connection_string
         self.connection = None
+        # (dimension_table, name) -> integer key, filled lazily by _get_dimension_key
+        self._dimension_keys: Dict[Tuple[str, str], int] = {}
 
     def connect(self):
         """Establish connection to PostgreSQL database"""
         try:
             self.connection = psycopg2.connect(self.connection_string)
+            self._dimension_keys.clear()
             logger.info("Connected to PostgreSQL database")
-            self._create_tables_if_not_exists()
+            if self.connection_string not in PostgreSQLProvider._schema_ready:
+                self._create_tables_if_not_exists()
         except Exception as e:
             logger.error(f"Failed to connect to PostgreSQL: {str(e)}")
             raise
@@ -34,21 +56,97 @@ class PostgreSQLProvider:
     def _create_tables_if_not_exists(self):
         """Create necessary tables if they don't exist"""
         with self.connection.cursor() as cursor:
-            # Create results table
+            # Held until the commit below, so concurrent processes don't race on the DDL or the legacy rename/copy
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (SCHEMA_SETUP_LOCK_KEY,))
+            
+            # Create dimension tables for the low-cardinality result strings
+            for dimension_table in RESULT_DIMENSION_TABLES:
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {dimension_table} (
+                        id SERIAL PRIMARY KEY,
+                        name VARCHAR(255) UNIQUE NOT NULL
+                    )
+                """)
+            
+            # Create deduplicated explanations table (keyed by the md5 of the text)
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS pipeline_results (
+                CREATE TABLE IF NOT EXISTS result_explanations (
                     id SERIAL PRIMARY KEY,
-                    job_id VARCHAR(255),
-                    table_name VARCHAR(255),
-                    pipeline_name VARCHAR(255),
-                    env_id VARCHAR(255),
+                    explanation_hash CHAR(32) UNIQUE NOT NULL,
+                    explanation TEXT
+                )
+            """)
+            
+            # Create narrow results fact table referencing the dimensions by integer key
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS pipeline_result_rows (
+                    id SERIAL PRIMARY KEY,
+                    job_key INTEGER REFERENCES result_jobs(id),
+                    table_key INTEGER REFERENCES result_tables(id),
+                    pipeline_key INTEGER REFERENCES result_pipelines(id),
+                    env_key INTEGER REFERENCES result_envs(id),
                     original_column VARCHAR(255),
                     fitted_column VARCHAR(255),
                     fitted_schema VARCHAR(255),
-                    explanation TEXT,
+                    explanation_key INTEGER REFERENCES result_explanations(id),
                     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_pipeline_result_rows_pipeline
+                ON pipeline_result_rows (pipeline_key, id)
+            """)
+            # The later job of the same pipeline, env and table that replaced a row in the cumulative
+            # statistics; rows are kept for the history (breakdowns, reference comparisons) and only filtered
+            cursor.execute("""
+                ALTER TABLE pipeline_result_rows
+                ADD COLUMN IF NOT EXISTS superseded_by INTEGER REFERENCES result_jobs(id)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_pipeline_result_rows_current
+                ON pipeline_result_rows (pipeline_key, id) WHERE superseded_by IS NULL
+            """)
+            
+            # Counts statements deleting or superseding result rows, so MAX(id) plus this counter versions the
+            # rows the statistics are computed from
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS pipeline_result_deletions (
+                    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+                    deletions BIGINT NOT NULL DEFAULT 0
+                )
+            """)
+            cursor.execute("INSERT INTO pipeline_result_deletions (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING")
+            cursor.execute("""
+                CREATE OR REPLACE FUNCTION count_pipeline_result_deletions() RETURNS trigger AS $$
+                BEGIN
+                    UPDATE pipeline_result_deletions SET deletions = deletions + 1;
+                    RETURN NULL;
+                END
+                $$ LANGUAGE plpgsql
+            """)
+            cursor.execute("DROP TRIGGER IF EXISTS pipeline_result_rows_deleted ON pipeline_result_rows")
+            cursor.execute("""
+                CREATE TRIGGER pipeline_result_rows_deleted
+                AFTER UPDATE OF superseded_by OR DELETE OR TRUNCATE ON pipeline_result_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION count_pipeline_result_deletions()
+            """)
+            
+            # Move rows out of the old wide pipeline_results table, if there is one
+            self._migrate_legacy_pipeline_results(cursor)
+            
+            # Expose the normalized layout under the old name so readers keep working
+            cursor.execute("""
+                CREATE OR REPLACE VIEW pipeline_results AS
+                SELECT r.id, j.name AS job_id, t.name AS table_name, p.name AS pipeline_name,
+                       e.name AS env_id, r.original_column, r.fitted_column, r.fitted_schema,
+                       x.explanation, r.timestamp, r.superseded_by
+                FROM pipeline_result_rows r
+                LEFT JOIN result_jobs j ON j.id = r.job_key
+                LEFT JOIN result_tables t ON t.id = r.table_key
+                LEFT JOIN result_pipelines p ON p.id = r.pipeline_key
+                LEFT JOIN result_envs e ON e.id = r.env_key
+                LEFT JOIN result_explanations x ON x.id = r.explanation_key
+            """)
             
             # Create benchmark results table
             cursor.execute("""
@@ -65,6 +163,10 @@ class PostgreSQLProvider:
                     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            # Whether a run covered every table ('full') or a subset ('selective' re-runs, 'quick' samples),
+            # and how many tables it covered, for tables created before they existed
+            cursor.execute("ALTER TABLE benchmark_results ADD COLUMN IF NOT EXISTS run_kind VARCHAR(16) DEFAULT 'full'")
+            cursor.execute("ALTER TABLE benchmark_results ADD COLUMN IF NOT EXISTS tables_run INTEGER")
             
             # Create environment-specific benchmark results table
             cursor.execute("""
@@ -82,7 +184,185 @@ class PostgreSQLProvider:
                 )
             """)
             
+            # Per-table and per-schema metrics of a benchmark run (per-env metrics live in env_benchmark_results)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS benchmark_breakdowns (
+                    id SERIAL PRIMARY KEY,
+                    benchmark_run_id VARCHAR(255),
+                    pipeline_name VARCHAR(255),
+                    dimension VARCHAR(32),
+                    dimension_value VARCHAR(255),
+                    accuracy DECIMAL(5,4),
+                    schema_accuracy DECIMAL(5,4),
+                    column_accuracy DECIMAL(5,4),
+                    nothing_compatible_accuracy DECIMAL(5,4),
+                    total_tests INTEGER,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # How often each expected schema was predicted as each schema in a benchmark run
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS benchmark_schema_confusion (
+                    id SERIAL PRIMARY KEY,
+                    benchmark_run_id VARCHAR(255),
+                    pipeline_name VARCHAR(255),
+                    expected_schema VARCHAR(255),
+                    predicted_schema VARCHAR(255),
+                    count INTEGER,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # Wall-clock phases and payload sizes of every benchmarked pipeline job
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS pipeline_job_timings (
+                    id SERIAL PRIMARY KEY,
+                    benchmark_run_id VARCHAR(255),
+                    job_id VARCHAR(255),
+                    pipeline_name VARCHAR(255),
+                    env_id VARCHAR(255),
+                    table_name VARCHAR(255),
+                    load_seconds DOUBLE PRECISION,
+                    encode_seconds DOUBLE PRECISION,
+                    network_seconds DOUBLE PRECISION,
+                    parse_seconds DOUBLE PRECISION,
+                    persist_seconds DOUBLE PRECISION,
+                    total_seconds DOUBLE PRECISION,
+                    request_bytes BIGINT,
+                    response_bytes BIGINT,
+                    result_rows INTEGER,
+                    table_columns INTEGER,
+                    local_columns INTEGER,
+                    schema_hash CHAR(32),
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # Column counts of the fast-path matcher and the schema version of each job,
+            # for tables created before they existed
+            cursor.execute("ALTER TABLE pipeline_job_timings ADD COLUMN IF NOT EXISTS table_columns INTEGER")
+            cursor.execute("ALTER TABLE pipeline_job_timings ADD COLUMN IF NOT EXISTS local_columns INTEGER")
+            cursor.execute("ALTER TABLE pipeline_job_timings ADD COLUMN IF NOT EXISTS schema_hash CHAR(32)")
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS pipeline_job_timings_table_idx
+                ON pipeline_job_timings (pipeline_name, env_id, table_name, id)
+            """)
+            
+            # Every environment schema version a job ran against, keyed by RegisteredSchema.content_hash
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_versions (
+                    content_hash CHAR(32) PRIMARY KEY,
+                    env_id VARCHAR(255),
+                    schema JSONB,
+                    first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS pipeline_job_timings_pipeline_idx ON pipeline_job_timings (pipeline_name)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS pipeline_job_timings_pipeline_id_idx ON pipeline_job_timings (pipeline_name, id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS env_benchmark_results_run_idx ON env_benchmark_results (benchmark_run_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS benchmark_breakdowns_run_idx ON benchmark_breakdowns (benchmark_run_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS benchmark_schema_confusion_run_idx ON benchmark_schema_confusion (benchmark_run_id)")
+            
+            self.connection.commit()
+        
+        if EXPLANATION_COMPRESSION:
+            self._set_explanation_compression(EXPLANATION_COMPRESSION)
+        PostgreSQLProvider._schema_ready.add(self.connection_string)
+
+    def _migrate_legacy_pipeline_results(self, cursor):
+        """Move rows from the old wide pipeline_results table into the normalized tables"""
+        cursor.execute("""
+            SELECT table_type FROM information_schema.tables
+            WHERE table_schema = current_schema() AND table_name = 'pipeline_results'
+        """)
+        row = cursor.fetchone()
+        if not row or row[0] != 'BASE TABLE':
+            return
+        
+        logger.info("Migrating legacy pipeline_results table to normalized layout")
+        cursor.execute("ALTER TABLE pipeline_results RENAME TO pipeline_results_legacy")
+        
+        for dimension_table, source_column in RESULT_DIMENSION_TABLES.items():
+            cursor.execute(f"""
+                INSERT INTO {dimension_table} (name)
+                SELECT DISTINCT {source_column} FROM pipeline_results_legacy
+                WHERE {source_column} IS NOT NULL
+                ON CONFLICT (name) DO NOTHING
+            """)
+        
+        cursor.execute("""
+            INSERT INTO result_explanations (explanation_hash, explanation)
+            SELECT DISTINCT ON (md5(explanation)) md5(explanation), explanation
+            FROM pipeline_results_legacy
+            WHERE explanation IS NOT NULL
+            ON CONFLICT (explanation_hash) DO NOTHING
+        """)
+        
+        cursor.execute("""
+            INSERT INTO pipeline_result_rows
+            (id, job_key, table_key, pipeline_key, env_key, original_column,
+             fitted_column, fitted_schema, explanation_key, timestamp)
+            SELECT l.id, j.id, t.id, p.id, e.id, l.original_column,
+                   l.fitted_column, l.fitted_schema, x.id, l.timestamp
+            FROM pipeline_results_legacy l
+            LEFT JOIN result_jobs j ON j.name = l.job_id
+            LEFT JOIN result_tables t ON t.name = l.table_name
+            LEFT JOIN result_pipelines p ON p.name = l.pipeline_name
+            LEFT JOIN result_envs e ON e.name = l.env_id
+            LEFT JOIN result_explanations x ON x.explanation_hash = md5(l.explanation)
+        """)
+        migrated_rows = cursor.rowcount
+        
+        # Keep the id sequence ahead of the migrated ids
+        cursor.execute("""
+            SELECT setval(pg_get_serial_sequence('pipeline_result_rows', 'id'),
+                          COALESCE((SELECT MAX(id) FROM pipeline_result_rows), 0) + 1, false)
+        """)
+        cursor.execute("DROP TABLE pipeline_results_legacy")
+        logger.info(f"Migrated {migrated_rows} pipeline results to normalized layout")
+
+    def _set_explanation_compression(self, method: str):
+        """Set the TOAST compression method for explanations (PostgreSQL 14+)"""
+        if method not in EXPLANATION_COMPRESSION_METHODS:
+            logger.warning(f"Ignoring explanation compression {method}, expected one of {EXPLANATION_COMPRESSION_METHODS}")
+            return
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE result_explanations ALTER COLUMN explanation SET COMPRESSION {method}")
             self.connection.commit()
+        except Exception as e:
+            logger.warning(f"Could not set explanation compression to {method}: {str(e)}")
+            self.connection.rollback()
+
+    def _get_dimension_key(self, cursor, dimension_table: str, name: Optional[str]) -> Optional[int]:
+        """Return the integer key for a dimension value, inserting it if it is new"""
+        if name is None:
+            return None
+        cache_key = (dimension_table, name)
+        if cache_key not in self._dimension_keys:
+            cursor.execute(f"""
+                INSERT INTO {dimension_table} (name) VALUES (%s)
+                ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+                RETURNING id
+            """, (name,))
+            self._dimension_keys[cache_key] = cursor.fetchone()[0]
+        return self._dimension_keys[cache_key]
+
+    def _get_explanation_key(self, cursor, explanation: Optional[str]) -> Optional[int]:
+        """Return the key of a deduplicated explanation, inserting it if it is new"""
+        if explanation is None:
+            return None
+        explanation_hash = hashlib.md5(explanation.encode('utf-8')).hexdigest()
+        # DO NOTHING returns no row for a known explanation but, unlike DO UPDATE, writes no dead tuple
+        cursor.execute("""
+            INSERT INTO result_explanations (explanation_hash, explanation) VALUES (%s, %s)
+            ON CONFLICT (explanation_hash) DO NOTHING
+            RETURNING id
+        """, (explanation_hash, explanation))
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute("SELECT id FROM result_explanations WHERE explanation_hash = %s", (explanation_hash,))
+            row = cursor.fetchone()
+        return row[0]
 
     def save_pipeline_result(self, job_id: str, table_name: str, pipeline_name: str, env_id: str, 
                            result: MatchResultsModel):
@@ -90,22 +370,62 @@ class PostgreSQLProvider:
         try:
             with self.connection.cursor() as cursor:
                 cursor.execute("""
-                    INSERT INTO pipeline_results 
-                    (job_id, table_name, pipeline_name, env_id, original_column, 
-                    fitted_column, fitted_schema, explanation)
+                    INSERT INTO pipeline_result_rows 
+                    (job_key, table_key, pipeline_key, env_key, original_column, 
+                    fitted_column, fitted_schema, explanation_key)
                     VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
                 """, (
-                    job_id, table_name, pipeline_name, env_id, 
+                    self._get_dimension_key(cursor, 'result_jobs', job_id),
+                    self._get_dimension_key(cursor, 'result_tables', table_name),
+                    self._get_dimension_key(cursor, 'result_pipelines', pipeline_name),
+                    self._get_dimension_key(cursor, 'result_envs', env_id),
                     result.original_column, 
                     result.fitted_column, 
                     result.fitted_schema, 
-                    result.explanation
+                    self._get_explanation_key(cursor, result.explanation)
                 ))
                 self.connection.commit()
                 logger.info(f"Saved pipeline result for job {job_id}, pipeline {pipeline_name}")
         except Exception as e:
             logger.error(f"Failed to save pipeline result: {str(e)}")
             self.connection.rollback()
+            self._dimension_keys.clear()
+            raise
+
+    def save_pipeline_result_batches(self, batches: List[Tuple[str, str, str, str, List[MatchResultsModel]]]):
+        """
+        Save several pipeline runs in a single transaction.
+        Each batch is (job_id, table_name, pipeline_name, env_id, results).
+        """
+        try:
+            with self.connection.cursor() as cursor:
+                rows = []
+                for job_id, table_name, pipeline_name, env_id, results in batches:
+                    job_key = self._get_dimension_key(cursor, 'result_jobs', job_id)
+                    table_key = self._get_dimension_key(cursor, 'result_tables', table_name)
+                    pipeline_key = self._get_dimension_key(cursor, 'result_pipelines', pipeline_name)
+                    env_key = self._get_dimension_key(cursor, 'result_envs', env_id)
+                    for result in results:
+                        rows.append((
+                            job_key, table_key, pipeline_key, env_key,
+                            result.original_column,
+                            result.fitted_column,
+                            result.fitted_schema,
+                            self._get_explanation_key(cursor, result.explanation)
+                        ))
+                execute_values(cursor, """
+                    INSERT INTO pipeline_result_rows 
+                    (job_key, table_key, pipeline_key, env_key, original_column, 
+                    fitted_column, fitted_schema, explanation_key)
+                    VALUES %s
+                """, rows)
+                self.connection.commit()
+                logger.info(f"Saved {len(rows)} pipeline results from {len(batches)} jobs")
+        except Exception as e:
+            logger.error(f"Failed to save pipeline result batches: {str(e)}")
+            self.connection.rollback()
+            # The rollback may have discarded freshly inserted dimension keys
+            self._dimension_keys.clear()
             raise
 
     def save_benchmark_results(self, benchmark_run_id: str, pipeline_name: str, 
@@ -159,6 +479,178 @@ class PostgreSQLProvider:
             self.connection.rollback()
             raise
 
+    def save_benchmark_breakdowns(self, benchmark_run_id: str, pipeline_name: str, breakdowns: Dict[str, Any],
+                                  run_kind: str = "full", tables_run: Optional[int] = None):
+        """
+        Save the breakdowns of one benchmark run (as computed by compute_breakdowns) in a single transaction:
+        overall metrics to benchmark_results (with the run kind and number of tables), per-env metrics to
+        env_benchmark_results, per-table and per-schema metrics to benchmark_breakdowns and the schema
+        confusion matrix to benchmark_schema_confusion
+        """
+        def metric_values(metrics: Dict[str, Any]) -> tuple:
+            return (metrics['accuracy'], metrics['schema_accuracy'], metrics['column_accuracy'],
+                    metrics['nothing_compatible_accuracy'], metrics['total_tests'])
+
+        try:
+            with self.connection.cursor() as cursor:
+                overall = breakdowns['overall']
+                cursor.execute("""
+                    INSERT INTO benchmark_results 
+                    (benchmark_run_id, pipeline_name, accuracy, schema_accuracy, column_accuracy, 
+                     env_accuracy, nothing_compatible_accuracy, total_tests, run_kind, tables_run)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, (
+                    benchmark_run_id, pipeline_name,
+                    overall['accuracy'], overall['schema_accuracy'], overall['column_accuracy'],
+                    overall['env_accuracy'], overall['nothing_compatible_accuracy'], overall['total_tests'],
+                    run_kind, tables_run
+                ))
+                execute_values(cursor, """
+                    INSERT INTO env_benchmark_results 
+                    (benchmark_run_id, pipeline_name, env_id, accuracy, schema_accuracy, 
+                     column_accuracy, nothing_compatible_accuracy, total_tests)
+                    VALUES %s
+                """, [(benchmark_run_id, pipeline_name, env_id) + metric_values(metrics)
+                      for env_id, metrics in breakdowns['env'].items()])
+                execute_values(cursor, """
+                    INSERT INTO benchmark_breakdowns 
+                    (benchmark_run_id, pipeline_name, dimension, dimension_value, accuracy, schema_accuracy, 
+                     column_accuracy, nothing_compatible_accuracy, total_tests)
+                    VALUES %s
+                """, [(benchmark_run_id, pipeline_name, dimension, value) + metric_values(metrics)
+                      for dimension in ('table', 'schema')
+                      for value, metrics in breakdowns[dimension].items()])
+                execute_values(cursor, """
+                    INSERT INTO benchmark_schema_confusion 
+                    (benchmark_run_id, pipeline_name, expected_schema, predicted_schema, count)
+                    VALUES %s
+                """, [(benchmark_run_id, pipeline_name, cell['expected_schema'], cell['predicted_schema'], cell['count'])
+                      for cell in breakdowns['schema_confusion']])
+                self.connection.commit()
+                logger.info(f"Saved benchmark breakdowns of run {benchmark_run_id} for {pipeline_name}")
+        except Exception as e:
+            logger.error(f"Failed to save benchmark breakdowns: {str(e)}")
+            self.connection.rollback()
+            raise
+
+    def mark_superseded_results(self, pipeline_name: str, table_jobs: Sequence[Tuple[str, str, str]]) -> int:
+        """
+        Mark a pipeline's result rows of the given (env_id, table_name) pairs that belong to an earlier job
+        than the paired job_id as superseded by it, so the cumulative statistics only count each table's
+        latest job. The rows themselves are kept. Returns the rows marked.
+        """
+        if not table_jobs:
+            return 0
+        env_ids, table_names, job_ids = (list(values) for values in zip(*table_jobs))
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE pipeline_result_rows r SET superseded_by = latest.id
+                    FROM unnest(%s::text[], %s::text[], %s::text[]) AS k(env_id, table_name, job_id),
+                         result_pipelines p, result_envs e, result_tables t, result_jobs latest
+                    WHERE p.name = %s AND r.pipeline_key = p.id
+                      AND e.name = k.env_id AND r.env_key = e.id
+                      AND t.name = k.table_name AND r.table_key = t.id
+                      AND latest.name = k.job_id AND r.job_key < latest.id
+                      AND r.superseded_by IS NULL
+                """, (env_ids, table_names, job_ids, pipeline_name))
+                marked = cursor.rowcount
+                self.connection.commit()
+                logger.info(f"Marked {marked} pipeline results of {len(table_jobs)} tables as superseded for {pipeline_name}")
+                return marked
+        except Exception as e:
+            logger.error(f"Failed to mark superseded pipeline results: {str(e)}")
+            self.connection.rollback()
+            raise
+
+    def save_job_timings(self, benchmark_run_id: str, job_timings: Sequence[JobTimings]):
+        """Save the phase timings and payload sizes of a benchmark run's jobs in one statement"""
+        try:
+            with self.connection.cursor() as cursor:
+                execute_values(cursor, """
+                    INSERT INTO pipeline_job_timings 
+                    (benchmark_run_id, job_id, pipeline_name, env_id, table_name, load_seconds, encode_seconds, 
+                     network_seconds, parse_seconds, persist_seconds, total_seconds, request_bytes, response_bytes, result_rows,
+                     table_columns, local_columns, schema_hash)
+                    VALUES %s
+                """, [(
+                    benchmark_run_id, timings.job_id, timings.pipeline_name, timings.env_id, timings.table_name,
+                    *(timings.seconds[phase] for phase in JOB_PHASES),
+                    timings.total_seconds, timings.request_bytes, timings.response_bytes, timings.rows,
+                    timings.table_columns, timings.local_columns, timings.schema_hash
+                ) for timings in job_timings])
+                self.connection.commit()
+                logger.info(f"Saved timings of {len(job_timings)} jobs for benchmark run {benchmark_run_id}")
+        except Exception as e:
+            logger.error(f"Failed to save job timings: {str(e)}")
+            self.connection.rollback()
+            raise
+
+    def save_schema_versions(self, schema_versions: Dict[str, Tuple[str, Dict[str, Any]]]):
+        """Save {content_hash: (env_id, schema)} snapshots; versions already stored are left as they are"""
+        try:
+            with self.connection.cursor() as cursor:
+                execute_values(cursor, """
+                    INSERT INTO schema_versions (content_hash, env_id, schema) VALUES %s
+                    ON CONFLICT (content_hash) DO NOTHING
+                """, [(content_hash, env_id, json.dumps(schema)) for content_hash, (env_id, schema) in schema_versions.items()])
+                self.connection.commit()
+        except Exception as e:
+            logger.error(f"Failed to save schema versions: {str(e)}")
+            self.connection.rollback()
+            raise
+
+    def get_schema_versions(self, content_hashes: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Retrieve stored schema snapshots, {content_hash: schema}"""
+        if not content_hashes:
+            return {}
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT content_hash, schema FROM schema_versions WHERE content_hash = ANY(%s)
+            """, (list(content_hashes),))
+            return {content_hash: schema for content_hash, schema in cursor.fetchall()}
+
+    def get_latest_table_jobs(self, pipeline_name: str, env_id: str, table_names: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Retrieve {table_name: {job_id, schema_hash}} of the most recent benchmarked job per table"""
+        with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT DISTINCT ON (table_name) table_name, job_id, schema_hash
+                FROM pipeline_job_timings
+                WHERE pipeline_name = %s AND env_id = %s AND table_name = ANY(%s)
+                ORDER BY table_name, id DESC
+            """, (pipeline_name, env_id, list(table_names)))
+            return {row['table_name']: dict(row) for row in cursor.fetchall()}
+
+    def get_job_predictions(self, job_ids: Sequence[str]) -> Dict[str, List[Tuple[str, str]]]:
+        """Retrieve the (fitted_schema, fitted_column) pairs predicted by each job, {job_id: pairs}"""
+        predictions: Dict[str, List[Tuple[str, str]]] = {job_id: [] for job_id in job_ids}
+        if not job_ids:
+            return predictions
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT j.name, r.fitted_schema, r.fitted_column
+                FROM pipeline_result_rows r
+                JOIN result_jobs j ON j.id = r.job_key
+                WHERE j.name = ANY(%s)
+            """, (list(job_ids),))
+            for job_id, fitted_schema, fitted_column in cursor.fetchall():
+                predictions[job_id].append((fitted_schema, fitted_column))
+        return predictions
+
+    def get_job_result_rows(self, job_ids: Sequence[str]) -> List[tuple]:
+        """Retrieve the result rows of the given jobs, in the tuple layout the scoring functions take"""
+        if not job_ids:
+            return []
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT job_id, table_name, pipeline_name, env_id, original_column,
+                       fitted_column, fitted_schema, explanation
+                FROM pipeline_results
+                WHERE job_id = ANY(%s)
+                ORDER BY job_id, timestamp
+            """, (list(job_ids),))
+            return cursor.fetchall()
+
     def get_env_benchmark_results(self, pipeline_name: str, env_id: str = None) -> List[Dict[str, Any]]:
         """Retrieve environment-specific benchmark results for a specific pipeline and optionally a specific environment"""
         try:
@@ -210,6 +702,55 @@ class PostgreSQLProvider:
             logger.error(f"Failed to retrieve pipeline results for pipeline {pipeline_name}: {str(e)}")
             return []
 
+    def get_pipeline_result_watermarks(self, watermarks: Dict[str, int], all_pipelines: bool = False) -> Dict[str, Tuple[int, int]]:
+        """
+        Return {pipeline_name: (number of current rows with id <= its watermark, highest id)} in one grouped
+        query, current meaning not superseded by a later job. Covers the pipelines in `watermarks`, or every
+        pipeline with stored rows if all_pipelines is set (unlisted pipelines use watermark 0).
+        """
+        join = "LEFT JOIN" if all_pipelines else "JOIN"
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT p.name, COUNT(*) FILTER (WHERE r.id <= COALESCE(w.watermark, 0)), MAX(r.id)
+                FROM pipeline_result_rows r
+                JOIN result_pipelines p ON p.id = r.pipeline_key
+                {join} unnest(%s::text[], %s::integer[]) AS w(name, watermark) ON w.name = p.name
+                WHERE r.superseded_by IS NULL
+                GROUP BY p.name
+            """, (list(watermarks.keys()), list(watermarks.values())))
+            return {name: (rows_at_or_below, max_id) for name, rows_at_or_below, max_id in cursor.fetchall()}
+
+    def get_pipeline_result_rows_since(self, after_ids: Dict[str, int]) -> List[tuple]:
+        """
+        Retrieve (id, timestamp, *result row) tuples of the current (not superseded) rows with
+        id > after_ids[pipeline_name] for the given pipelines in one query, ready for scoring.
+        The explanation slot holds the explanation key rather than the text, so the scan never reads
+        result_explanations; get_explanations resolves the keys that are needed.
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT r.id, r.timestamp, j.name, t.name, p.name, e.name, r.original_column,
+                       r.fitted_column, r.fitted_schema, r.explanation_key
+                FROM pipeline_result_rows r
+                JOIN result_pipelines p ON p.id = r.pipeline_key
+                JOIN unnest(%s::text[], %s::integer[]) AS w(name, after_id) ON w.name = p.name
+                LEFT JOIN result_jobs j ON j.id = r.job_key
+                LEFT JOIN result_tables t ON t.id = r.table_key
+                LEFT JOIN result_envs e ON e.id = r.env_key
+                WHERE r.id > w.after_id AND r.superseded_by IS NULL
+                ORDER BY p.name, j.name COLLATE "C", r.timestamp, r.id
+            """, (list(after_ids.keys()), list(after_ids.values())))
+            return cursor.fetchall()
+
+    def get_explanations(self, explanation_keys: Sequence[int]) -> Dict[int, str]:
+        """Retrieve {explanation key: explanation text} for the given keys"""
+        if not explanation_keys:
+            return {}
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT id, explanation FROM result_explanations WHERE id = ANY(%s)",
+                           (list(explanation_keys),))
+            return dict(cursor.fetchall())
+
     def get_benchmark_results(self, pipeline_name: str) -> List[Dict[str, Any]]:
         """Retrieve benchmark results for a specific pipeline"""
         try:
@@ -224,6 +765,23 @@ class PostgreSQLProvider:
             return []
 
 
+@contextmanager
+def postgres_session(connection_string: str = None) -> Iterator[PostgreSQLProvider]:
+    """
+    A provider with its own connection for one unit of work, closed on exit. Worker threads use this
+    instead of connecting the shared postgres_provider, whose single connection they would overwrite.
+    """
+    provider = PostgreSQLProvider(connection_string or postgres_provider.connection_string)
+    provider.connect()
+    try:
+        yield provider
+    finally:
+        try:
+            provider.disconnect()
+        except:
+            logger.warning("Could not disconnect from database in finally block")
+
+
 # Global instance for easy access
 postgres_provider = PostgreSQLProvider()
 
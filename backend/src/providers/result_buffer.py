@@ -0,0 +1,296 @@
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+import psycopg2
+
+from src.providers.postgress import PostgreSQLProvider
+from src.utils.constants import (
+    POSTGRES_CONNECTION_STRING,
+    RESULT_BUFFER_MAX_BATCHES,
+    RESULT_BUFFER_FLUSH_SIZE,
+    RESULT_BUFFER_FLUSH_INTERVAL,
+    RESULT_SPILL_FILE,
+    RESULT_DEAD_LETTER_FILE,
+)
+from src.utils.models import MatchResultsModel
+from src.utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+class ResultBatch(NamedTuple):
+    job_id: str
+    table_name: str
+    pipeline_name: str
+    env_id: str
+    results: List[MatchResultsModel]
+
+
+_STOP = object()
+# Errors meaning the database is unreachable rather than that it rejected the batch
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class ResultWriteBuffer:
+    """
+    Bounded write-behind queue for pipeline results.
+    Producers submit one batch per pipeline run and return immediately; a background thread
+    writes batches to PostgreSQL in groups (by row count or time). When the database is
+    unavailable, batches are appended to a local spill file and replayed on the next flush;
+    batches the database rejects are moved to a dead-letter file.
+    Producers block when the queue is full (back-pressure).
+    """
+
+    def __init__(self, connection_string: str = POSTGRES_CONNECTION_STRING,
+                 max_batches: int = RESULT_BUFFER_MAX_BATCHES,
+                 flush_size: int = RESULT_BUFFER_FLUSH_SIZE,
+                 flush_interval: float = RESULT_BUFFER_FLUSH_INTERVAL,
+                 spill_file: str = RESULT_SPILL_FILE,
+                 dead_letter_file: str = RESULT_DEAD_LETTER_FILE):
+        # The writer thread owns this provider, so its connection is never shared
+        self.provider = PostgreSQLProvider(connection_string)
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.spill_file = spill_file
+        self.dead_letter_file = dead_letter_file
+        self.spilled_batches = 0  # Batches in the spill file after the last write
+        self.dead_lettered_batches = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_batches)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the writer thread (idempotent)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="result-write-buffer", daemon=True)
+            self._thread.start()
+            logger.info("Started result write buffer")
+
+    def submit(self, job_id: str, table_name: str, pipeline_name: str, env_id: str,
+               results: List[MatchResultsModel], timeout: Optional[float] = None):
+        """
+        Queue the results of one pipeline run for persistence.
+        Blocks while the queue is full; raises queue.Full if `timeout` seconds pass first.
+        """
+        if not results:
+            return
+        self.start()
+        self._queue.put(ResultBatch(job_id, table_name, pipeline_name, env_id, list(results)), timeout=timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until everything submitted so far is written to the database, spilled or dead-lettered.
+        Returns False if `timeout` seconds passed first.
+        """
+        self.start()
+        flushed = threading.Event()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        try:
+            self._queue.put(flushed, timeout=timeout)
+        except queue.Full:
+            return False
+        return flushed.wait(max(0.0, deadline - time.monotonic()) if deadline is not None else None)
+
+    def backlog(self) -> Dict[str, int]:
+        """Batches waiting in the spill file after the last write, and batches dead-lettered so far"""
+        return {"spilled": self.spilled_batches, "dead_lettered": self.dead_lettered_batches}
+
+    def close(self, timeout: Optional[float] = None):
+        """Flush outstanding batches and stop the writer thread"""
+        with self._lock:
+            thread = self._thread
+        if not thread or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self.provider.disconnect()
+        logger.info("Stopped result write buffer")
+
+    def _run(self):
+        pending: List[ResultBatch] = []
+        pending_rows = 0
+        waiters: List[threading.Event] = []
+        stop = False
+        deadline = time.monotonic() + self.flush_interval
+
+        while not stop:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                stop = True
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None:
+                pending.append(item)
+                pending_rows += len(item.results)
+
+            if stop or waiters or pending_rows >= self.flush_size or time.monotonic() >= deadline:
+                try:
+                    self._write(pending)
+                except Exception as e:
+                    # Keep the writer alive: an unexpected error (e.g. a full disk while spilling) must
+                    # neither lose the dequeued batches nor leave flush() waiting forever
+                    logger.error(f"Writing {len(pending)} result batches failed, moving them to {self.dead_letter_file}: {str(e)}")
+                    try:
+                        self._append_batches(self.dead_letter_file, pending, error=str(e))
+                        self.dead_lettered_batches += len(pending)
+                    except Exception as dead_letter_error:
+                        logger.error(f"Could not dead-letter {len(pending)} result batches: {str(dead_letter_error)}")
+                finally:
+                    pending, pending_rows = [], 0
+                    for waiter in waiters:
+                        waiter.set()
+                    waiters = []
+                    deadline = time.monotonic() + self.flush_interval
+
+    def _write(self, batches: List[ResultBatch]):
+        """
+        Replay spilled batches one transaction each, then write the new batches. Batches left unwritten
+        by an unreachable database are spilled for the next flush; batches the database rejects go to the
+        dead-letter file, so one bad batch doesn't hold back everything written after it.
+        """
+        spilled = self._read_spill_file()
+        if not batches and not spilled:
+            return
+
+        unsent_spilled = self._save_each(spilled)
+        # Don't try the new batches while the database is unreachable, keep them behind the spilled ones
+        unsent = batches if unsent_spilled else self._save_group(batches)
+        if spilled:
+            self._rewrite_spill_file(unsent_spilled)
+            if len(unsent_spilled) < len(spilled):
+                logger.info(f"Replayed {len(spilled) - len(unsent_spilled)} spilled result batches")
+        if unsent:
+            logger.error(f"Could not write {len(unsent)} result batches to PostgreSQL, spilling to {self.spill_file}")
+            self._append_batches(self.spill_file, unsent)
+        self.spilled_batches = len(unsent_spilled) + len(unsent)
+
+    def _ensure_connected(self) -> bool:
+        """Whether there is a connection, after trying to open one if there wasn't"""
+        if self.provider.connection and not self.provider.connection.closed:
+            return True
+        try:
+            self.provider.connect()
+            return True
+        except Exception as e:
+            logger.error(f"Could not connect to PostgreSQL: {str(e)}")
+            self._reset_connection()
+            return False
+
+    def _reset_connection(self):
+        try:
+            self.provider.disconnect()
+        except Exception:
+            pass
+        self.provider.connection = None
+
+    def _save_group(self, batches: List[ResultBatch]) -> List[ResultBatch]:
+        """Write batches in one transaction, falling back to one each to isolate rejected batches"""
+        if not batches or not self._ensure_connected():
+            return batches
+        try:
+            self.provider.save_pipeline_result_batches(batches)
+            return []
+        except CONNECTION_ERRORS as e:
+            logger.error(f"Lost connection to PostgreSQL: {str(e)}")
+            self._reset_connection()
+            return batches
+        except Exception:
+            return self._save_each(batches)
+
+    def _save_each(self, batches: List[ResultBatch]) -> List[ResultBatch]:
+        """Write batches one transaction each; returns the batches left unwritten by a lost connection"""
+        for index, batch in enumerate(batches):
+            if not self._ensure_connected():
+                return batches[index:]
+            try:
+                self.provider.save_pipeline_result_batches([batch])
+            except CONNECTION_ERRORS as e:
+                logger.error(f"Lost connection to PostgreSQL: {str(e)}")
+                self._reset_connection()
+                return batches[index:]
+            except Exception as e:
+                logger.error(f"PostgreSQL rejected the results of job {batch.job_id} ({batch.pipeline_name}, "
+                             f"{batch.table_name}), moving them to {self.dead_letter_file}: {str(e)}")
+                self._append_batches(self.dead_letter_file, [batch], error=str(e))
+                self.dead_lettered_batches += 1
+        return []
+
+    def _append_batches(self, path: str, batches: List[ResultBatch], error: Optional[str] = None):
+        if not batches:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for batch in batches:
+                f.write(json.dumps({
+                    'job_id': batch.job_id,
+                    'table_name': batch.table_name,
+                    'pipeline_name': batch.pipeline_name,
+                    'env_id': batch.env_id,
+                    'results': [{
+                        'original_column': result.original_column,
+                        'fitted_column': result.fitted_column,
+                        'fitted_schema': result.fitted_schema,
+                        'explanation': result.explanation
+                    } for result in batch.results],
+                    **({'error': error} if error else {})
+                }) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rewrite_spill_file(self, batches: List[ResultBatch]):
+        """Replace the spill file with the batches still to be replayed, removing it when there are none"""
+        if not batches:
+            os.remove(self.spill_file)
+            return
+        temporary_file = self.spill_file + ".tmp"
+        if os.path.exists(temporary_file):
+            os.remove(temporary_file)
+        self._append_batches(temporary_file, batches)
+        os.replace(temporary_file, self.spill_file)
+
+    def _read_spill_file(self) -> List[ResultBatch]:
+        """
+        The spilled batches. Unreadable lines (a partially written last line from a crash, a record with
+        missing keys or invalid results) are moved to the dead-letter file, so they aren't read again.
+        """
+        if not os.path.exists(self.spill_file):
+            return []
+        batches, unreadable = [], []
+        with open(self.spill_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                    batches.append(ResultBatch(
+                        item['job_id'], item['table_name'], item['pipeline_name'], item['env_id'],
+                        [MatchResultsModel(**res) for res in item['results']]
+                    ))
+                except (ValueError, KeyError, TypeError) as e:
+                    # ValueError covers both invalid JSON and pydantic validation errors
+                    unreadable.append((line.rstrip('\n'), str(e)))
+        if unreadable:
+            logger.warning(f"Moving {len(unreadable)} unreadable lines of {self.spill_file} to {self.dead_letter_file}")
+            os.makedirs(os.path.dirname(self.dead_letter_file) or ".", exist_ok=True)
+            with open(self.dead_letter_file, 'a', encoding='utf-8') as f:
+                for line, error in unreadable:
+                    f.write(json.dumps({'unreadable_spill_line': line, 'error': error}) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.dead_lettered_batches += len(unreadable)
+            self._rewrite_spill_file(batches)
+        return batches
+
+
+# Global instance for easy access
+result_buffer = ResultWriteBuffer()
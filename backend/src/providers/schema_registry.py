@@ -0,0 +1,172 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, List, Optional, TypeVar
+
+from pydantic import ValidationError
+
+from src.utils.models import EnvModel
+from src.utils.constants import SCHEMA_REGISTRY_TTL
+from src.providers.mick import get_database_schema, get_database_schemas
+from src.utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class SchemaUnavailableError(LookupError):
+    """Mick could not provide an environment's schema and no earlier copy is registered"""
+
+
+class RegisteredSchema:
+    """An environment schema as fetched from Mick, validated and serialized once"""
+
+    def __init__(self, env_id: str, schema: Dict[str, Any]):
+        self.env_id = env_id
+        self.schema = schema
+        self.fetched_at = time.monotonic()
+        try:
+            self.model: Optional[EnvModel] = EnvModel.model_validate(schema)
+        except ValidationError as e:
+            logger.warning(f"Schema of environment {env_id} does not match EnvModel ({e.error_count()} errors)")
+            self.model = None
+        # One serialized fragment per schema, so payloads with a subset of schemas are joins, not dumps
+        self.schema_fragments: List[str] = [json.dumps(item) for item in schema.get("schemas", [])]
+        self.json = self.subset_json(range(len(self.schema_fragments)))
+        self.json_bytes = self.json.encode('utf-8')
+        # Independent of key order, so equal schemas hash equally whatever Mick's serialization
+        self.content_hash = hashlib.md5(json.dumps(schema, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+    def subset_json(self, schema_indices) -> str:
+        """JSON of this environment with only the schemas at the given indices, in that order"""
+        fields = {key: value for key, value in self.schema.items() if key != "schemas"}
+        prefix = json.dumps(fields)[:-1]
+        schemas = ", ".join(self.schema_fragments[index] for index in schema_indices)
+        return f'{prefix}{", " if fields else ""}"schemas": [{schemas}]}}'
+
+
+class ContentCache(Generic[T]):
+    """
+    Bounded LRU of structures built from a schema's content (indexes, matchers), keyed by content hash,
+    so refetched or re-wrapped schemas with unchanged content reuse what was already built
+    """
+
+    def __init__(self, build: Callable[[RegisteredSchema], T], max_entries: int = 32):
+        self.build = build
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, T]" = OrderedDict()
+
+    def get(self, registered: RegisteredSchema) -> T:
+        with self._lock:
+            if registered.content_hash in self._entries:
+                self._entries.move_to_end(registered.content_hash)
+                return self._entries[registered.content_hash]
+        value = self.build(registered)
+        with self._lock:
+            self._entries[registered.content_hash] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+class SchemaRegistry:
+    """
+    Per-environment cache of Mick schemas. Each schema is fetched, validated against EnvModel and
+    serialized once per TTL; concurrent callers for the same environment share one fetch.
+    When a refetch returns the registered schema itself (Mick answered "not modified"), the entry is
+    only marked fresh again instead of being validated and serialized anew. Failed fetches are never
+    registered: the previous entry is served until a fetch succeeds, and without one the lookup raises.
+    """
+
+    def __init__(self, fetch: Callable[[str], Optional[Dict[str, Any]]] = get_database_schema,
+                 ttl: float = SCHEMA_REGISTRY_TTL,
+                 fetch_many: Callable[[List[str]], Dict[str, Optional[Dict[str, Any]]]] = get_database_schemas):
+        self.fetch = fetch
+        self.fetch_many = fetch_many
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._env_locks: Dict[str, threading.Lock] = {}
+        self._entries: Dict[str, RegisteredSchema] = {}
+
+    def _fresh(self, env_id: str) -> Optional[RegisteredSchema]:
+        entry = self._entries.get(env_id)
+        if entry is not None and time.monotonic() - entry.fetched_at < self.ttl:
+            return entry
+        return None
+
+    def get(self, env_id: str) -> RegisteredSchema:
+        """
+        The registered schema of an environment, fetching it when missing or older than the TTL.
+        Raises SchemaUnavailableError when the fetch fails and nothing was registered before.
+        """
+        entry = self._fresh(env_id)
+        if entry is not None:
+            return entry
+        with self._lock:
+            env_lock = self._env_locks.setdefault(env_id, threading.Lock())
+        with env_lock:
+            entry = self._fresh(env_id)
+            if entry is None:
+                entry = self._store(env_id, self.fetch(env_id))
+            return entry
+
+    def _store(self, env_id: str, schema: Optional[Dict[str, Any]]) -> RegisteredSchema:
+        entry = self._entries.get(env_id)
+        if schema is None:
+            # Left stale, so the next lookup tries again
+            if entry is None:
+                raise SchemaUnavailableError(f"Schema of environment {env_id} could not be fetched from Mick")
+            logger.warning(f"Could not refetch schema of environment {env_id}, serving the one fetched "
+                           f"{time.monotonic() - entry.fetched_at:.0f}s ago")
+            return entry
+        if entry is not None and entry.schema is schema:
+            entry.fetched_at = time.monotonic()
+            return entry
+        entry = RegisteredSchema(env_id, schema)
+        self._entries[env_id] = entry
+        logger.info(f"Registered schema of environment {env_id} ({len(entry.schema_fragments)} schemas, hash {entry.content_hash})")
+        return entry
+
+    def get_many(self, env_ids: List[str]) -> Dict[str, RegisteredSchema]:
+        """
+        Registered schemas of several environments, fetching the missing or stale ones in one batch.
+        Environments whose schema is unavailable are left out (get() raises for them).
+        """
+        stale = [env_id for env_id in env_ids if self._fresh(env_id) is None]
+        if stale:
+            fetched = self.fetch_many(stale)
+            for env_id in stale:
+                try:
+                    self._store(env_id, fetched.get(env_id))
+                except SchemaUnavailableError as e:
+                    logger.error(str(e))
+        return {env_id: self._entries[env_id] for env_id in env_ids if env_id in self._entries}
+
+    def serialized(self, env_id: str, env_schema: Dict[str, Any]) -> str:
+        """JSON of env_schema, reusing the registered serialization when it is the registered schema itself"""
+        entry = self._entries.get(env_id)
+        if entry is not None and entry.schema is env_schema:
+            return entry.json
+        return json.dumps(env_schema)
+
+    def for_schema(self, env_id: str, env_schema: Dict[str, Any]) -> RegisteredSchema:
+        """The registered entry when env_schema is the registered schema itself, otherwise an unregistered wrapper"""
+        entry = self._entries.get(env_id)
+        if entry is not None and entry.schema is env_schema:
+            return entry
+        return RegisteredSchema(env_id, env_schema)
+
+    def invalidate(self, env_id: Optional[str] = None):
+        """Drop the cached schema of one environment, or of all environments"""
+        if env_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(env_id, None)
+
+
+# Global instance for easy access
+schema_registry = SchemaRegistry()
@@ -1,43 +1,91 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
+import json
 import uuid
+from io import BytesIO
 from pathlib import Path
-from psycopg2.extras import RealDictCursor
 
-from src.pipeline.pipelines.n8n_pipeline import N8NPipeline
+from src.pipeline.registry import pipeline_registry
+from src.pipeline.single_flight import pipeline_single_flight, request_key
 from src.utils.func_utils import load_excel_file
-from src.utils.constants import EXCEL_FILES_DIR
+from src.utils.timing import JobTimings
+from src.utils.constants import EXCEL_FILES_DIR, DEFAULT_PIPELINE_TYPE, PIPELINE_SINGLE_FLIGHT, QUICK_BENCHMARK_PRECISION
 from src.utils.logging_setup import get_logger
-from src.providers.postgress import postgres_provider
-from src.providers.mick import get_database_schema
+from src.providers.async_postgress import async_postgres_provider, DatabaseUnavailableError
+from src.providers.result_buffer import result_buffer
+from src.providers.schema_registry import schema_registry, SchemaUnavailableError
 
 logger = get_logger(__name__)
 router = APIRouter()
 
 
+def _error_status(error: Exception) -> int:
+    """503 while the database pool is unavailable, 500 for any other failure"""
+    return 503 if isinstance(error, DatabaseUnavailableError) else 500
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header already names this ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def _set_version_headers(response: Response, version: Optional[str]):
+    """ETag the response with the statistics version it matches; without one it must not be reused"""
+    if version is None:
+        response.headers["Cache-Control"] = "no-store"
+        return
+    response.headers["ETag"] = f'"{version}"'
+    response.headers["Cache-Control"] = "no-cache"
+
+
 @router.post("/benchmark")
-async def run_benchmark(pipeline_name: str = Form(...), pipeline_route: str = Form(...), timeout: int = Form(600)):
+async def run_benchmark(pipeline_name: str = Form(...), pipeline_route: Optional[str] = Form(None), timeout: int = Form(600),
+                        selective: bool = Form(False), pipeline_type: str = Form(DEFAULT_PIPELINE_TYPE),
+                        quick: bool = Form(False), reference_pipeline: Optional[str] = Form(None),
+                        precision: float = Form(QUICK_BENCHMARK_PRECISION)):
     """
-    Run benchmark for the n8n pipeline across all environment directories in data/excels/
+    Run benchmark for a registered pipeline type (the n8n pipeline by default) across all environment directories in data/excels/
     The pipeline_name parameter will be used as the name saved in the database
-    The pipeline_route parameter specifies which route to use for the n8n pipeline
+    The pipeline_route parameter specifies which route to use for the n8n pipeline (N8N_URL when omitted)
     The timeout parameter specifies the timeout in seconds (default 600 seconds = 10 minutes)
+    With selective set, only the tables whose last run used a schema version that differs from the current
+    one in the schemas/fields their ground truth or predictions touch are re-run
+    With quick set, a stratified sample of the tables is run in rounds until the accuracy estimate is
+    precise enough or clearly differs from reference_pipeline's latest results on the same tables
     
     Args:
         pipeline_name (str): Name to save in the database for this pipeline run
-        pipeline_route (str): The route to use for the n8n pipeline
+        pipeline_route (str, optional): The route to use for the n8n pipeline; ignored by in-process pipelines
         use_mock (bool, optional): If True, use mock provider instead of real n8n. Defaults to False.
         timeout (int, optional): Timeout in seconds for pipeline execution. Defaults to 600 (10 minutes).
+        selective (bool, optional): If True, re-run only the tables affected by schema changes. Defaults to False.
+        pipeline_type (str, optional): Registered pipeline type to run (see GET /pipelines). Defaults to n8n_pipeline.
+        quick (bool, optional): If True, run a sample of the tables and stop early. Defaults to False.
+        reference_pipeline (str, optional): Pipeline name to compare against in quick mode.
+        precision (float, optional): Accuracy interval half width at which quick mode stops. Defaults to 0.03.
     """
+    try:
+        pipeline_registry.get(pipeline_type)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
+    if quick and selective:
+        raise HTTPException(status_code=400, detail="quick and selective cannot be combined")
+    if quick and precision <= 0:
+        raise HTTPException(status_code=400, detail="precision must be positive")
     try:
         # Import the benchmark function here to avoid circular import issues
         from src.benchmarking.benchmark import benchmark
         
-        # Set up the provider to use based on the use_mock flag
-        from src.providers import n8n
-        # We need to temporarily update n8n provider to use the custom route
-        original_n8n_route = n8n.n8n_provider.n8n_base_url
-        # Don't change the global n8n URL directly, instead modify how the benchmark uses pipelines
+        # The route is passed down to the pipelines; the global n8n URL is left unchanged
         logger.info(f"Running benchmark using route: {pipeline_route}")
         
         try:
@@ -45,23 +93,67 @@ async def run_benchmark(pipeline_name: str = Form(...), pipeline_route: str = Fo
             env_base_path = Path(EXCEL_FILES_DIR)
             env_directories = [d for d in env_base_path.iterdir() if d.is_dir()]
             
-            if not env_directories:
+            outputs = []
+            # env_id -> {table_name: reason} of the tables re-run in selective mode
+            rerun_tables = {}
+            quick_report = None
+            if quick:
+                from src.benchmarking.quick_benchmark import quick_benchmark
+                await run_in_threadpool(schema_registry.get_many, [d.name for d in env_directories])
+                outputs, quick_report = await run_in_threadpool(quick_benchmark, pipeline_name, n8n_route=pipeline_route, timeout=timeout,
+                                                                pipeline_type=pipeline_type, reference_pipeline=reference_pipeline,
+                                                                precision=precision)
+            elif not env_directories:
                 # If no environment directories, run with default_env
-                benchmark(pipeline_name, "default_env", n8n_route=pipeline_route, timeout=timeout)
+                outputs.append(await run_in_threadpool(benchmark, pipeline_name, "default_env", n8n_route=pipeline_route, timeout=timeout,
+                                                       pipeline_type=pipeline_type))
             else:
+                # Fetch the schemas of all environments in one batch request before running them
+                await run_in_threadpool(schema_registry.get_many, [d.name for d in env_directories])
                 # Run benchmark for each environment directory
                 for env_dir in env_directories:
                     env_id_from_dir = env_dir.name  # Use folder name as env_id
                     excel_files = list(env_dir.glob("*.xlsx")) + list(env_dir.glob("*.xls"))
                     
-                    if excel_files:
+                    if excel_files and selective:
+                        from src.benchmarking.schema_diff import affected_tables
+                        affected = await run_in_threadpool(affected_tables, pipeline_name, env_id_from_dir, [f.stem for f in excel_files])
+                        rerun_tables[env_id_from_dir] = affected
+                        if affected:
+                            outputs.append(await run_in_threadpool(benchmark, pipeline_name, env_id_from_dir, excel_dir=str(env_dir),
+                                                                   n8n_route=pipeline_route, timeout=timeout, tables=set(affected),
+                                                                   pipeline_type=pipeline_type))
+                    elif excel_files:
                         logger.info(f"Running benchmark for environment: {env_id_from_dir} with {len(excel_files)} Excel files")
                         # Run benchmark for this specific environment
-                        benchmark(pipeline_name, env_id_from_dir, excel_dir=str(env_dir), n8n_route=pipeline_route, timeout=timeout)
+                        outputs.append(await run_in_threadpool(benchmark, pipeline_name, env_id_from_dir, excel_dir=str(env_dir), n8n_route=pipeline_route, timeout=timeout,
+                                                               pipeline_type=pipeline_type))
                     else:
                         logger.info(f"No Excel files found in environment directory: {env_id_from_dir}")
+            
+            # Persist overall/env/table/schema breakdowns of this run, computed in one pass over its rows,
+            # and the phase timings of its jobs
+            run_rows = [row for output in outputs for row in output.rows]
+            job_timings = [timings for output in outputs for timings in output.job_timings]
+            benchmark_run_id = str(uuid.uuid4()) if run_rows or job_timings else None
+            if benchmark_run_id:
+                from src.benchmarking.breakdowns import record_benchmark_run
+                schema_versions = {content_hash: version for output in outputs
+                                   for content_hash, version in output.schema_versions.items()}
+                run_kind = "quick" if quick else "selective" if selective else "full"
+                await run_in_threadpool(record_benchmark_run, benchmark_run_id, pipeline_name, run_rows, job_timings, schema_versions,
+                                        run_kind)
+            table_columns = sum(timings.table_columns for timings in job_timings)
         
-            return {"status": "success", "message": f"Benchmark completed for pipeline {pipeline_name}"}
+            return {
+                "status": "success",
+                "message": f"Benchmark completed for pipeline {pipeline_name}",
+                "benchmark_run_id": benchmark_run_id,
+                # Fraction of columns the fast-path matcher resolved without calling n8n
+                "local_resolution_rate": sum(timings.local_columns for timings in job_timings) / table_columns if table_columns else None,
+                **({"rerun_tables": rerun_tables} if selective else {}),
+                **({"quick": quick_report} if quick else {})
+            }
         
         finally:
             # Restore original route if needed
@@ -71,43 +163,205 @@ async def run_benchmark(pipeline_name: str = Form(...), pipeline_route: str = Fo
         logger.error(f"Error running benchmark: {str(e)}")
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+
+@router.post("/benchmark/variants")
+async def run_benchmark_variants(variants: str = Form(...), timeout: int = Form(600)):
+    """
+    Run several pipelines (e.g. n8n routes) over all environment directories in data/excels/ in one pass,
+    loading and encoding every table once, and record them under one shared benchmark run id
+    
+    Args:
+        variants (str): JSON list of {"pipeline_name", "pipeline_route" (optional), "pipeline_type" (optional)}
+        timeout (int, optional): Timeout in seconds for each pipeline job. Defaults to 600 (10 minutes).
+    """
+    from src.benchmarking.benchmark import PipelineVariant, benchmark_variants
+    try:
+        parsed = [PipelineVariant(item.get("pipeline_name"), item.get("pipeline_route"), item.get("pipeline_type", DEFAULT_PIPELINE_TYPE))
+                  for item in json.loads(variants)]
+        names = [variant.pipeline_name for variant in parsed]
+        if not parsed or not all(names) or len(set(names)) != len(names):
+            raise ValueError("expected a non-empty list with a distinct pipeline_name per variant")
+        for variant in parsed:
+            pipeline_registry.get(variant.pipeline_type)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
+    except (ValueError, TypeError, AttributeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid variants: {str(e)}")
+    
+    try:
+        env_directories = [d for d in Path(EXCEL_FILES_DIR).iterdir() if d.is_dir()]
+        # pipeline_name -> BenchmarkOutputs of every environment
+        outputs = {variant.pipeline_name: [] for variant in parsed}
+        if not env_directories:
+            runs = [await run_in_threadpool(benchmark_variants, parsed, "default_env", timeout=timeout)]
+        else:
+            await run_in_threadpool(schema_registry.get_many, [d.name for d in env_directories])
+            runs = []
+            for env_dir in env_directories:
+                if list(env_dir.glob("*.xlsx")) + list(env_dir.glob("*.xls")):
+                    runs.append(await run_in_threadpool(benchmark_variants, parsed, env_dir.name,
+                                                        excel_dir=str(env_dir), timeout=timeout))
+        for run in runs:
+            for pipeline_name, output in run.items():
+                outputs[pipeline_name].append(output)
+        
+        # Score and persist every variant under the same run id
+        from src.benchmarking.breakdowns import record_benchmark_run
+        benchmark_run_id = str(uuid.uuid4())
+        pipelines = {}
+        for pipeline_name, pipeline_outputs in outputs.items():
+            run_rows = [row for output in pipeline_outputs for row in output.rows]
+            job_timings = [timings for output in pipeline_outputs for timings in output.job_timings]
+            schema_versions = {content_hash: version for output in pipeline_outputs
+                               for content_hash, version in output.schema_versions.items()}
+            breakdowns = None
+            if run_rows or job_timings:
+                breakdowns = await run_in_threadpool(record_benchmark_run, benchmark_run_id, pipeline_name, run_rows,
+                                                     job_timings, schema_versions)
+            table_columns = sum(timings.table_columns for timings in job_timings)
+            pipelines[pipeline_name] = {
+                "overall": breakdowns["overall"] if breakdowns else None,
+                "local_resolution_rate": sum(timings.local_columns for timings in job_timings) / table_columns if table_columns else None
+            }
+        
+        return {
+            "status": "success",
+            "message": f"Benchmark completed for pipelines {', '.join(outputs)}",
+            "benchmark_run_id": benchmark_run_id,
+            "pipelines": pipelines
+        }
+    
+    except Exception as e:
+        logger.error(f"Error running multi-pipeline benchmark: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
 
 
 @router.get("/benchmark/{pipeline_name}")
-async def get_benchmark_results(pipeline_name: str):
+async def get_benchmark_results(pipeline_name: str, request: Request, response: Response, summary: bool = False):
     """
     Get all benchmark results for a specific pipeline
+    If summary is True, returns only the metrics and counts; page through the wrong matches with
+    /benchmark/{pipeline_name}/wrong_matches
+    Responds 304 when the If-None-Match header carries the current ETag
     """
     try:
-        from src.benchmarking.pipeline_statistics import get_pipeline_statistics
-        results = get_pipeline_statistics(pipeline_name)
-        if not results:
-            raise HTTPException(status_code=404, detail=f"No benchmark results found for pipeline {pipeline_name}")
+        from src.benchmarking.pipeline_statistics import get_statistics_version, get_memoized_statistics
+        version = await get_statistics_version(pipeline_name)
+        etag = f'"{version}"'
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
         
+        version, results = await get_memoized_statistics(version, pipeline_name, summary)
+        _set_version_headers(response, version)
         return {"pipeline_name": pipeline_name, "results": results}
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting benchmark results: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+
+@router.get("/benchmark/{pipeline_name}/wrong_matches")
+async def get_benchmark_wrong_matches(
+    pipeline_name: str,
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    env_id: Optional[str] = None,
+    table_name: Optional[str] = None,
+    schema: Optional[str] = None
+):
+    """
+    Get one page of a pipeline's wrong matches, in the same order as the full benchmark results
+    Optionally filtered by environment, table and expected schema
+    Responds 304 when the If-None-Match header carries the current ETag
+    """
+    try:
+        from src.benchmarking.pipeline_statistics import get_statistics_version, get_wrong_matches_page_async
+        version = await get_statistics_version(pipeline_name)
+        etag = f'"{version}"'
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+        
+        filters = {"env_id": env_id, "table_name": table_name, "expected_fitted_schema": schema}
+        total, wrong_matches = await get_wrong_matches_page_async(
+            pipeline_name, offset, limit, {key: value for key, value in filters.items() if value is not None})
+        
+        # Results stored while the page was computed may be partly in it, so it doesn't match either version
+        _set_version_headers(response, version if await get_statistics_version(pipeline_name) == version else None)
+        return {
+            "pipeline_name": pipeline_name,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "wrong_matches": wrong_matches
+        }
+    
+    except Exception as e:
+        logger.error(f"Error getting wrong matches: {str(e)}")
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+
 
 
 
+@router.get("/benchmark/{pipeline_name}/compare/{other_pipeline}")
+async def compare_benchmark_results(pipeline_name: str, other_pipeline: str):
+    """
+    Paired bootstrap comparison of two pipelines' accuracy on the items both were scored on
+    Returns the mean accuracy difference (pipeline_name - other_pipeline), its confidence interval and a p-value
+    """
+    try:
+        from src.benchmarking.pipeline_statistics import compare_pipelines_async
+        return await compare_pipelines_async(pipeline_name, other_pipeline)
+    
+    except Exception as e:
+        logger.error(f"Error comparing pipelines: {str(e)}")
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+
+@router.get("/benchmark/{pipeline_name}/runs")
+async def get_benchmark_runs(pipeline_name: str, limit: int = Query(20, ge=1, le=500)):
+    """
+    Get the most recent benchmark runs of a pipeline with their stored breakdowns:
+    overall, per-env, per-table and per-schema metrics and the schema confusion matrix
+    """
+    try:
+        runs = await async_postgres_provider.get_benchmark_runs(pipeline_name, limit)
+        return {"pipeline_name": pipeline_name, "runs_count": len(runs), "runs": runs}
+    
+    except Exception as e:
+        logger.error(f"Error getting benchmark runs: {str(e)}")
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
 
 
 @router.get("/benchmark")
-async def get_all_benchmark_results():
+async def get_all_benchmark_results(request: Request, response: Response, summary: bool = False):
     """
     Get benchmark results for all pipelines
+    If summary is True, returns only the metrics and counts of each pipeline
+    Responds 304 when the If-None-Match header carries the current ETag
     """
     try:
-        from src.benchmarking.pipeline_statistics import get_all_pipeline_statistics_with_wrong_matches
-        results = get_all_pipeline_statistics_with_wrong_matches()
+        from src.benchmarking.pipeline_statistics import get_statistics_version, get_memoized_statistics
+        version = await get_statistics_version()
+        etag = f'"{version}"'
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+        
+        version, results = await get_memoized_statistics(version, summary=summary)
+        _set_version_headers(response, version)
         return {"results": results}
     
     except Exception as e:
         logger.error(f"Error getting all benchmark results: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
 
 
 
@@ -118,14 +372,19 @@ async def run_pipeline(
     file: UploadFile = File(...),
     pipeline_name: str = Form(...),  # The name to save in the database for this pipeline run
     env_id: str = Form("default_env"),
-    pipeline_route: str = Form(...),  # The route to use for the n8n pipeline
-    timeout: int = Form(600)  # Timeout in seconds for pipeline execution (default 600 seconds = 10 minutes)
+    pipeline_route: Optional[str] = Form(None),  # The route to use for the n8n pipeline (N8N_URL when omitted)
+    timeout: int = Form(600),  # Timeout in seconds for pipeline execution (default 600 seconds = 10 minutes)
+    pipeline_type: str = Form(DEFAULT_PIPELINE_TYPE)  # Registered pipeline type to run, see GET /pipelines
 ):
     """
-    Run the n8n pipeline on an uploaded Excel file using the specified route
+    Run a registered pipeline (the n8n pipeline by default) on an uploaded Excel file using the specified route
     The pipeline_name parameter will be the name saved in the database
     The timeout parameter specifies the timeout in seconds (default 600 seconds = 10 minutes)
     """
+    try:
+        spec = pipeline_registry.get(pipeline_type)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
     try:
         # Create a temporary file to save the uploaded Excel file
         file_id = str(uuid.uuid4())
@@ -141,16 +400,42 @@ async def run_pipeline(
             buffer.write(content)
         
         try:
-            # Load the Excel file
-            table_df = load_excel_file(file_path)
+            # Fetch the database schema for the environment (cached by the schema registry)
+            try:
+                registered = await run_in_threadpool(schema_registry.get, env_id)
+            except SchemaUnavailableError as e:
+                raise HTTPException(status_code=503, detail=str(e))
+            env_schema = registered.schema
+            
+            table_name = file.filename if file.filename else f"table_{file_id}"
+            # Remove file extension from table name
+            if '.' in table_name:
+                table_name = table_name.rsplit('.', 1)[0]
+            
+            # Create the pipeline with the custom name, route, and timeout
+            pipeline = spec.create(pipeline_name, file_id, n8n_route=pipeline_route, timeout=timeout)
+            timings = JobTimings(file_id, pipeline_name, env_id, table_name)
+            timings.schema_hash = registered.content_hash
+            pipeline.timings = timings
             
-            # Fetch the database schema for the environment
-            env_schema = get_database_schema(env_id)
+            def load_and_run():
+                # Load the Excel file from the uploaded bytes: the execution may be shared with other
+                # requests and outlive this one, whose temporary file is removed when it returns
+                with timings.phase("load"):
+                    table_df = load_excel_file(BytesIO(content))
+                return pipeline.run(env_id, table_df, env_schema)
             
-            # Always use the n8n pipeline but with the custom name, route, and timeout
-            pipeline = N8NPipeline(name=pipeline_name, job_id=file_id, n8n_route=pipeline_route, timeout=timeout)
+            async def execute():
+                # Waits for a request slot of the pipeline type without holding a worker thread
+                async with spec.request_slot(pipeline_route):
+                    return await run_in_threadpool(load_and_run)
             
-            results = pipeline.run(env_id, table_df, env_schema)
+            if PIPELINE_SINGLE_FLIGHT:
+                # Identical uploads in flight (same workbook, pipeline, route, schema and timeout) share one execution
+                key = request_key(content, pipeline_type, pipeline_route, env_id, registered.content_hash, timeout)
+                results, shared_execution = await pipeline_single_flight.run(key, execute)
+            else:
+                results, shared_execution = await execute(), False
             
             # Format results for response
             formatted_results = []
@@ -161,30 +446,33 @@ async def run_pipeline(
                     "fitted_schema": result.fitted_schema,
                     "explanation": result.explanation
                 })
-                
-                # Save result to PostgreSQL using the custom name provided by user
-                try:
-                    table_name = file.filename if file.filename else f"table_{file_id}"
-                    # Remove file extension from table name
-                    if '.' in table_name:
-                        table_name = table_name.rsplit('.', 1)[0]
-                    
-                    postgres_provider.save_pipeline_result(
+            
+            # Save results to PostgreSQL using the custom name provided by user
+            try:
+                # Queued write-behind; blocks in the threadpool only when the buffer is full
+                with timings.phase("persist"):
+                    await run_in_threadpool(
+                        result_buffer.submit,
                         job_id=file_id,
                         table_name=table_name,
                         pipeline_name=pipeline_name,  # Use the name provided by the user
                         env_id=env_id,
-                        result=result
+                        results=results
                     )
-                except Exception as e:
-                    logger.error(f"Failed to save pipeline result to PostgreSQL: {str(e)}")
-                    # Continue with the response even if saving to PostgreSQL fails
+                # Only the request whose execution ran records its phases; callers sharing it did no work
+                if not shared_execution:
+                    timings.rows = len(results)
+                    await async_postgres_provider.save_job_timings([timings])
+            except Exception as e:
+                logger.error(f"Failed to save pipeline result to PostgreSQL: {str(e)}")
+                # Continue with the response even if saving to PostgreSQL fails
             
             return {
                 "job_id": file_id,
                 "pipeline_name": pipeline_name,  # Return the custom name provided by user
                 "env_id": env_id,
                 "results": formatted_results,
+                "shared_execution": shared_execution,
                 "status": "completed"
             }
             
@@ -194,9 +482,23 @@ async def run_pipeline(
             if os.path.exists(file_path):
                 os.remove(file_path)
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error running pipeline: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+
+@router.get("/pipeline/single_flight")
+async def get_single_flight_stats():
+    """How many /pipeline/run calls were answered by an identical request already in flight"""
+    return pipeline_single_flight.stats()
+
+
+@router.get("/pipelines")
+async def list_pipelines():
+    """The registered pipeline types with their concurrency limits, for the pipeline_type parameter"""
+    return {"pipelines": [spec.describe() for spec in pipeline_registry.specs()]}
 
 
 @router.get("/")
@@ -213,9 +515,7 @@ async def db_status():
     """
     try:
         # Test database connection by attempting a simple query
-        with postgres_provider.connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            result = cursor.fetchone()
+        await async_postgres_provider.check_connection()
         
         return {
             "status": "connected",
@@ -223,7 +523,7 @@ async def db_status():
         }
     except Exception as e:
         logger.error(f"Database connection failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Database connection failed: {str(e)}")
+        raise HTTPException(status_code=_error_status(e), detail=f"Database connection failed: {str(e)}")
 
 @router.get("/db/pipeline_results")
 async def get_pipeline_results(pipeline_name: Optional[str] = None, include_wrong_matches: bool = False, limit: int = 100):
@@ -236,14 +536,10 @@ async def get_pipeline_results(pipeline_name: Optional[str] = None, include_wron
     try:
         if pipeline_name:
             # Get results for a specific pipeline
-            results = postgres_provider.get_pipeline_results_by_pipeline_name(pipeline_name, limit)
+            results = await async_postgres_provider.get_pipeline_results_by_pipeline_name(pipeline_name, limit)
         else:
             # Get the most recent pipeline results
-            with postgres_provider.connection.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("""
-                    SELECT * FROM pipeline_results ORDER BY timestamp DESC LIMIT %s
-                """, (limit,))
-                results = [dict(row) for row in cursor.fetchall()]
+            results = await async_postgres_provider.get_recent_pipeline_results(limit)
         
         response = {
             "status": "success",
@@ -254,57 +550,36 @@ async def get_pipeline_results(pipeline_name: Optional[str] = None, include_wron
         
         # If include_wrong_matches is True, compare with ground truth to identify wrong matches
         if include_wrong_matches and results:
-            from src.utils.func_utils import load_json
-            from src.utils.models import MatchResultsModel
-            from src.utils.constants import GROUND_TRUTH_DIR
-            import os
-            from pathlib import Path
-            
-            # Group results by table_name to match with ground truth
-            results_by_table = {}
-            for result in results:
-                table_name = result['table_name']
-                if table_name not in results_by_table:
-                    results_by_table[table_name] = []
-                results_by_table[table_name].append(result)
+            from src.benchmarking.ground_truth import ground_truth_index
             
+            gt_tables, gt_mapping = ground_truth_index.snapshot()
             all_wrong_matches = []
             
-            # For each table, compare with ground truth
-            for table_name, table_results in results_by_table.items():
-                gt_file_path = os.path.join(GROUND_TRUTH_DIR, f"{table_name}_gt.json")
-                if os.path.exists(gt_file_path):
-                    try:
-                        gt_data = load_json(gt_file_path)
-                        ground_truth = [MatchResultsModel(**item) for item in gt_data]
-                        
-                        # Create a mapping of original columns to ground truth
-                        gt_mapping = {gt.original_column: gt for gt in ground_truth}
-                        
-                        # Compare each result with ground truth
-                        for result in table_results:
-                            original_column = result['original_column']
-                            if original_column in gt_mapping:
-                                expected = gt_mapping[original_column]
-                                # Check if the prediction is wrong
-                                is_correct = (result['fitted_column'] == expected.fitted_column and 
-                                            result['fitted_schema'] == expected.fitted_schema)
-                                if not is_correct:
-                                    wrong_match = {
-                                        'job_id': result['job_id'],
-                                        'table_name': result['table_name'],
-                                        'env_id': result['env_id'],
-                                        'original_column': original_column,
-                                        'predicted_fitted_column': result['fitted_column'],
-                                        'predicted_fitted_schema': result['fitted_schema'],
-                                        'expected_fitted_column': expected.fitted_column,
-                                        'expected_fitted_schema': expected.fitted_schema,
-                                        'explanation': result['explanation']
-                                    }
-                                    all_wrong_matches.append(wrong_match)
-                    except Exception as e:
-                        logger.error(f"Error processing ground truth for {table_name}: {str(e)}")
-                        continue
+            # Compare each result with the ground truth of its table
+            for result in results:
+                table_name = result['table_name']
+                if table_name not in gt_tables:
+                    continue
+                original_column = result['original_column']
+                expected = gt_mapping.get((table_name, original_column))
+                if expected is None:
+                    continue
+                # Check if the prediction is wrong
+                is_correct = (result['fitted_column'] == expected.fitted_column and 
+                            result['fitted_schema'] == expected.fitted_schema)
+                if not is_correct:
+                    wrong_match = {
+                        'job_id': result['job_id'],
+                        'table_name': result['table_name'],
+                        'env_id': result['env_id'],
+                        'original_column': original_column,
+                        'predicted_fitted_column': result['fitted_column'],
+                        'predicted_fitted_schema': result['fitted_schema'],
+                        'expected_fitted_column': expected.fitted_column,
+                        'expected_fitted_schema': expected.fitted_schema,
+                        'explanation': result['explanation']
+                    }
+                    all_wrong_matches.append(wrong_match)
             
             response["wrong_matches"] = all_wrong_matches
             response["wrong_matches_count"] = len(all_wrong_matches)
@@ -312,7 +587,7 @@ async def get_pipeline_results(pipeline_name: Optional[str] = None, include_wron
         return response
     except Exception as e:
         logger.error(f"Error getting pipeline results: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
 
 
 
@@ -328,16 +603,12 @@ async def clear_database(confirm: str = "false"):
         }
     
     try:
-        with postgres_provider.connection.cursor() as cursor:
-            # Clear the pipeline results table
-            cursor.execute("DELETE FROM pipeline_results;")
-            pipeline_deleted = cursor.rowcount
-
-            # Clear the benchmark results table  
-            cursor.execute("DELETE FROM benchmark_results;")
-            benchmark_deleted = cursor.rowcount
-            
-            postgres_provider.connection.commit()
+        pipeline_deleted, benchmark_deleted = await async_postgres_provider.clear_results()
+        # Deletions are also detected on the next stats call; dropping the cache frees the memory now
+        from src.benchmarking.statistics_cache import pipeline_statistics_cache
+        from src.benchmarking.pipeline_statistics import clear_statistics_memo
+        pipeline_statistics_cache.invalidate()
+        clear_statistics_memo()
         
         logger.info(f"Cleared {pipeline_deleted} pipeline results and {benchmark_deleted} benchmark results")
         return {
@@ -346,4 +617,4 @@ async def clear_database(confirm: str = "false"):
         }
     except Exception as e:
         logger.error(f"Error clearing database: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
\ No newline at end of file
@@ -1,12 +1,12 @@
 import pandas as pd
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union, BinaryIO
 import json
 from pathlib import Path
 
 
-def load_excel_file(file_path: str) -> pd.DataFrame:
+def load_excel_file(file_path: Union[str, BinaryIO]) -> pd.DataFrame:
     """
-    Load an Excel file into a pandas DataFrame
+    Load an Excel file (a path or a binary file-like object) into a pandas DataFrame
     """
     try:
         df = pd.read_excel(file_path)
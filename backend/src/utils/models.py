@@ -1,7 +1,10 @@
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 class FieldModel(BaseModel):
+    # Mick returns numeric example values for numeric fields
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
     field_id: str
     field_name: str
     example_values: Optional[List[str]]
@@ -0,0 +1,46 @@
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Optional
+
+# Phases of one pipeline job, in the order they happen
+JOB_PHASES = ("load", "encode", "network", "parse", "persist")
+
+
+class JobTimings:
+    """
+    Wall-clock seconds per phase, payload sizes, column counts and schema version of one pipeline job.
+    Phases may be entered several times; their durations add up.
+    """
+
+    def __init__(self, job_id: str, pipeline_name: str, env_id: str, table_name: str):
+        self.job_id = job_id
+        self.pipeline_name = pipeline_name
+        self.env_id = env_id
+        self.table_name = table_name
+        self.seconds: Dict[str, float] = dict.fromkeys(JOB_PHASES, 0.0)
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.rows = 0
+        # Columns of the table, and how many of them were resolved without calling the pipeline's backend
+        self.table_columns = 0
+        self.local_columns = 0
+        # RegisteredSchema.content_hash of the environment schema the job ran against
+        self.schema_hash: Optional[str] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Add the duration of the with-block to a phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.seconds.values())
+
+
+def timed_phase(timings: Optional[JobTimings], name: str):
+    """timings.phase(name), or a no-op when the caller is not collecting timings"""
+    return timings.phase(name) if timings is not None else nullcontext()
@@ -0,0 +1,199 @@
+"""
+Behavior of the local matching logic: fast-path name resolution, field constraints, candidate schema
+retrieval and merging local with pipeline results. Run from the backend directory: python -m pytest -q
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.pipeline.candidate_retrieval import CandidateIndex, candidate_schema_json
+from src.pipeline.fast_path import FastPathMatcher, merge_results, normalize_name
+from src.pipeline.field_constraints import FieldConstraints
+from src.providers.schema_registry import RegisteredSchema
+from src.utils.models import MatchResultsModel
+
+
+def field(field_name, regex=None, value_options=None, mapping_history=None, description=""):
+    return {"field_id": field_name, "field_name": field_name, "example_values": None, "mapping_history": mapping_history,
+            "value_options": value_options, "regex": regex, "probability": "1", "description": description}
+
+
+def registered(*schemas, env_id="test_env"):
+    return RegisteredSchema(env_id, {"env_id": env_id, "schemas": [
+        {"schema_id": name, "schema_name": name, "fields": fields, "description": ""} for name, fields in schemas]})
+
+
+def result(column, field_name="", schema_name="", explanation=""):
+    return MatchResultsModel(original_column=column, fitted_column=field_name, fitted_schema=schema_name,
+                             explanation=explanation)
+
+
+def resolved(match_result):
+    return {r.original_column: (r.fitted_schema, r.fitted_column) for r in match_result.results}
+
+
+# Fast path: normalization collisions
+
+def test_normalize_name_ignores_case_and_separators():
+    assert normalize_name("Contact-Email") == normalize_name("contactEmail") == normalize_name(" contact_email ") == "contact_email"
+    assert normalize_name(2024) == "2024"
+
+
+def test_fields_normalizing_alike_are_ambiguous():
+    matcher = FastPathMatcher(registered(("customers", [field("EmailAddress")]), ("leads", [field("email_address")])))
+    match = matcher.match(pd.DataFrame({"Email-Address": ["a@b.com"]}))
+    assert match.results == []
+    assert match.unresolved_columns == ["Email-Address"]
+
+
+def test_aliases_of_one_field_normalizing_alike_are_one_candidate():
+    matcher = FastPathMatcher(registered(("customers", [field("phone_number", mapping_history=["PhoneNumber", "phone-number"])])))
+    assert [c.source for c in matcher.names["phone_number"]] == ["field name"]
+    match = matcher.match(pd.DataFrame({"Phone Number": ["555-0100"]}))
+    assert resolved(match) == {"Phone Number": ("customers", "phone_number")}
+    assert "based on field name" in match.results[0].explanation
+
+
+# Fast path: ambiguous aliases
+
+def test_alias_shared_by_two_fields_is_left_for_the_pipeline():
+    matcher = FastPathMatcher(registered(("orders", [field("order_status", mapping_history=["status"])]),
+                                         ("tickets", [field("ticket_status", mapping_history=["status"])])))
+    match = matcher.match(pd.DataFrame({"status": ["open", "closed"], "order_status": ["open", "closed"]}))
+    assert resolved(match) == {"order_status": ("orders", "order_status")}
+    assert match.unresolved_columns == ["status"]
+
+
+def test_sample_values_break_an_alias_tie():
+    matcher = FastPathMatcher(registered(
+        ("orders", [field("order_status", value_options=["Shipped", "Pending"], mapping_history=["status"])]),
+        ("tickets", [field("ticket_status", value_options=["open", "closed"], mapping_history=["status"])])))
+    match = matcher.match(pd.DataFrame({"status": ["OPEN", "closed", "open"]}))
+    assert resolved(match) == {"status": ("tickets", "ticket_status")}
+    assert "mapping history; 3 sample values satisfy its value options" in match.results[0].explanation
+
+
+def test_values_violating_the_only_candidate_leave_the_column_unresolved():
+    matcher = FastPathMatcher(registered(("customers", [field("zip_code", regex=r"\d{5}")])))
+    match = matcher.match(pd.DataFrame({"zip_code": ["12345", "ABCDE"]}))
+    assert match.results == []
+    assert match.unresolved_columns == ["zip_code"]
+
+
+# All-null columns
+
+def test_all_null_column_matches_by_name_without_value_evidence():
+    matcher = FastPathMatcher(registered(("customers", [field("zip_code", regex=r"\d{5}")])))
+    match = matcher.match(pd.DataFrame({"zip_code": [None, np.nan]}))
+    assert resolved(match) == {"zip_code": ("customers", "zip_code")}
+    assert "sample values" not in match.results[0].explanation
+
+
+def test_all_null_column_does_not_break_an_alias_tie():
+    matcher = FastPathMatcher(registered(("a", [field("code", regex=r"\d+")]), ("b", [field("code", value_options=["x"])])))
+    match = matcher.match(pd.DataFrame({"code": [None, None]}))
+    assert match.results == []
+    assert match.unresolved_columns == ["code"]
+
+
+def test_all_null_column_is_compatible_with_every_field():
+    constraints = FieldConstraints(registered(("customers", [field("zip_code", regex=r"\d{5}"), field("tier", value_options=["gold"])])))
+    matrix = constraints.compatibility(pd.DataFrame({"empty": [None, None], "zip": ["12345", "1234"]}))
+    assert matrix.samples.tolist() == [0, 2]
+    assert matrix.scores[0].tolist() == [1.0, 1.0]
+    assert matrix.score(1, "customers", "zip_code") == 0.5
+    assert matrix.score(1, "customers", "tier") == 0.0
+
+
+# Field constraints: invalid regexes
+
+def test_invalid_regex_is_ignored_instead_of_failing():
+    constraints = FieldConstraints(registered(("customers", [field("broken", regex="[unclosed"), field("zip_code", regex=r"\d{5}")])))
+    assert constraints.constrained.tolist() == [False, True]
+    matrix = constraints.compatibility(pd.DataFrame({"value": ["anything", "12345"]}))
+    assert matrix.score(0, "customers", "broken") == 1.0
+    assert matrix.score(0, "customers", "zip_code") == 0.5
+
+
+def test_invalid_regex_still_lets_the_fast_path_resolve_by_name():
+    matcher = FastPathMatcher(registered(("customers", [field("broken", regex="(")])))
+    match = matcher.match(pd.DataFrame({"broken": ["x"]}))
+    assert resolved(match) == {"broken": ("customers", "broken")}
+
+
+def test_regex_must_match_whole_value_and_options_ignore_case():
+    constraints = FieldConstraints(registered(("s", [field("zip_code", regex=r"\d{5}"), field("tier", value_options=["Gold", "Silver"])])))
+    matrix = constraints.compatibility(pd.DataFrame({"zip": ["12345", "123456"], "tier": ["GOLD", "bronze"]}))
+    assert matrix.score(0, "s", "zip_code") == 0.5
+    assert matrix.score(1, "s", "tier") == 0.5
+    assert matrix.score(0, "s", "unknown") is None
+
+
+def test_samples_are_distinct_values_up_to_the_sample_size():
+    constraints = FieldConstraints(registered(("s", [field("zip_code", regex=r"\d{5}")])))
+    matrix = constraints.compatibility(pd.DataFrame({"zip": ["12345"] * 10 + ["bad", "99999"]}), sample_size=2)
+    assert matrix.samples.tolist() == [2]
+    assert matrix.score(0, "s", "zip_code") == 0.5
+
+
+# merge_results ordering and precedence
+
+def test_merge_results_orders_by_table_columns():
+    table_df = pd.DataFrame(columns=["a", "b", "c"])
+    merged = merge_results(table_df, [result("c", "f_c")], [result("b", "f_b"), result("a", "f_a")])
+    assert [r.original_column for r in merged] == ["a", "b", "c"]
+
+
+def test_merge_results_prefers_local_results():
+    table_df = pd.DataFrame(columns=["a", "b"])
+    merged = merge_results(table_df, [result("a", "local")], [result("a", "remote"), result("b", "remote")])
+    assert [(r.original_column, r.fitted_column) for r in merged] == [("a", "local"), ("b", "remote")]
+
+
+def test_merge_results_keeps_unknown_columns_last_in_pipeline_order():
+    table_df = pd.DataFrame(columns=[1, "b"])
+    merged = merge_results(table_df, [], [result("extra_2"), result("b"), result("extra_1"), result("1")])
+    assert [r.original_column for r in merged] == ["1", "b", "extra_2", "extra_1"]
+
+
+# Candidate retrieval
+
+def candidate_schemas():
+    return registered(
+        ("customers", [field("email", mapping_history=["e-mail address"]), field("phone_number")]),
+        ("orders", [field("order_id"), field("order_total", description="Amount charged for the order")]),
+        ("products", [field("sku"), field("product_name")]))
+
+
+def test_top_schemas_ranks_by_column_similarity_in_original_order():
+    index = CandidateIndex(candidate_schemas())
+    assert index.top_schemas(["E-Mail Address", "PhoneNumber"], 1) == [0]
+    assert index.top_schemas(["order total", "SKU"], 2) == [1, 2]
+
+
+def test_top_schemas_returns_every_schema_when_k_covers_them_or_is_zero():
+    index = CandidateIndex(candidate_schemas())
+    assert index.top_schemas(["sku"], 0) == [0, 1, 2]
+    assert index.top_schemas(["sku"], 3) == [0, 1, 2]
+
+
+def test_top_schemas_keeps_original_order_among_ties():
+    index = CandidateIndex(candidate_schemas())
+    assert index.schema_scores(["zzqx"]).tolist() == [0.0, 0.0, 0.0]
+    assert index.top_schemas(["zzqx"], 2) == [0, 1]
+
+
+def test_exact_alias_scores_as_an_exact_field_name():
+    index = CandidateIndex(candidate_schemas())
+    scores = index.field_scores(["e-mail address", "email"])
+    email = index.fields.index(("customers", "email"))
+    assert np.allclose(scores[:, email], 1.0)
+
+
+def test_candidate_schema_json_holds_only_the_chosen_schemas():
+    schema_json, indices = candidate_schema_json(candidate_schemas(), ["sku", "product name"], 1)
+    assert indices == [2]
+    payload = json.loads(schema_json)
+    assert payload["env_id"] == "test_env"
+    assert [schema["schema_name"] for schema in payload["schemas"]] == ["products"]
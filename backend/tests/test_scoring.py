@@ -0,0 +1,94 @@
+"""
+Parity of the vectorized scoring engine with the per-row loop it replaced (perf.scoring_benchmark's
+reference_score). Run from the backend directory: python -m pytest -q
+"""
+from perf.scoring_benchmark import generate_corpus, reference_score
+from src.benchmarking.scoring import ground_truth_frame, results_frame, score_results_frame
+from src.utils.models import MatchResultsModel
+
+
+def ground_truth(*tables):
+    gt_tables, gt_mapping = {}, {}
+    for table_name, columns in tables:
+        gt_tables[table_name] = []
+        for original_column, fitted_column, fitted_schema in columns:
+            gt = MatchResultsModel(original_column=original_column, fitted_column=fitted_column,
+                                   fitted_schema=fitted_schema, explanation="ground truth")
+            gt_tables[table_name].append(gt)
+            gt_mapping[(table_name, original_column)] = gt
+    return gt_tables, gt_mapping
+
+
+def row(table_name, original_column, fitted_column, fitted_schema, explanation="because", job_id="job_1", env_id="env"):
+    return (job_id, table_name, "pipeline", env_id, original_column, fitted_column, fitted_schema, explanation)
+
+
+def vectorized_score(db_results, gt_tables, gt_mapping):
+    return score_results_frame(results_frame(db_results), ground_truth_frame(gt_mapping), gt_tables.keys())
+
+
+def assert_parity(db_results, gt_tables, gt_mapping):
+    expected = reference_score(db_results, gt_tables, gt_mapping)
+    assert vectorized_score(db_results, gt_tables, gt_mapping) == expected
+    return expected
+
+
+CUSTOMERS = ("customers", [("email", "email_address", "Contacts"), ("Name", "full_name", "Contacts"),
+                           ("zip", "postal_code", "Addresses")])
+
+
+def test_case_and_whitespace_differences_are_wrong_in_both():
+    gt_tables, gt_mapping = ground_truth(CUSTOMERS)
+    statistics = assert_parity([
+        row("customers", "email", "Email_Address", "Contacts"),
+        row("customers", "email", "email_address ", "contacts"),
+        row("customers", "email", "email_address", "Contacts"),
+        row("customers", "name", "full_name", "Contacts"),
+        row("customers", " Name", "full_name", "Contacts"),
+        row("customers", "zip", " postal_code", "Addresses"),
+    ], gt_tables, gt_mapping)
+    assert statistics["accuracy"] == 1 / 6
+    assert statistics["schema_accuracy"] == 3 / 6
+    assert [w["expected_fitted_column"] for w in statistics["wrong_matches"]] == [
+        "email_address", "email_address", "NOT_FOUND", "NOT_FOUND", "postal_code"]
+
+
+def test_rows_compatible_with_nothing_are_skipped_or_wrong_alike():
+    gt_tables, gt_mapping = ground_truth(CUSTOMERS)
+    statistics = assert_parity([
+        row("customers", "email", "", ""),
+        row("customers", "email", None, "Contacts"),
+        row("customers", "zip", "postal_code", None),
+        row("customers", None, "email_address", "Contacts"),
+        row("customers", "Name", "full_name", "Contacts", explanation=None),
+        row("customers", "zip", "NOT_FOUND", "NOT_FOUND"),
+        row("customers", "zip", "postal_code", "Addresses"),
+    ], gt_tables, gt_mapping)
+    assert statistics["accuracy"] == 1 / 3
+    assert len(statistics["wrong_matches"]) == 2
+
+
+def test_tables_missing_from_ground_truth_are_not_scored():
+    gt_tables, gt_mapping = ground_truth(CUSTOMERS, ("empty_table", []))
+    statistics = assert_parity([
+        row("orders", "email", "email_address", "Contacts"),
+        row("Customers", "email", "email_address", "Contacts"),
+        row(None, "email", "email_address", "Contacts"),
+        row("empty_table", "email", "email_address", "Contacts"),
+        row("customers", "email", "email_address", "Contacts"),
+    ], gt_tables, gt_mapping)
+    assert statistics["accuracy"] == 0.5
+    assert statistics["wrong_matches"][0]["table_name"] == "empty_table"
+    assert statistics["wrong_matches"][0]["expected_fitted_schema"] == "NOT_FOUND"
+
+
+def test_nothing_scored_gives_zero_statistics():
+    gt_tables, gt_mapping = ground_truth(CUSTOMERS)
+    assert assert_parity([], gt_tables, gt_mapping) == {"accuracy": 0.0, "schema_accuracy": 0.0, "wrong_matches": []}
+    assert assert_parity([row("orders", "email", "email_address", "Contacts")], gt_tables, gt_mapping)["wrong_matches"] == []
+
+
+def test_synthetic_corpus_scores_identically():
+    gt_tables, gt_mapping, db_results = generate_corpus(5000, n_tables=20, n_columns=10, seed=3)
+    statistics = assert_parity(db_results, gt_tables, gt_mapping)
+    assert 0.0 < statistics["accuracy"] < 1.0
@@ -40,7 +40,7 @@ function Leaderboard() {
   const fetchBenchmarkData = async () => {
     try {
       setLoading(true);
-      const response = await axios.get(`${API_BASE_URL}/benchmark`);
+      const response = await axios.get(`${API_BASE_URL}/benchmark`, { params: { summary: true } });
       const benchmarks = response.data.results || {};
       
       // Transform the data for the table
@@ -248,19 +248,20 @@ function Leaderboard() {
                   <TableCell align="center" sx={{ color: '#f5f5f5', fontWeight: 'bold' }}>Accuracy</TableCell>
                   <TableCell align="center" sx={{ color: '#f5f5f5', fontWeight: 'bold' }}>Schema Accuracy</TableCell>
                   <TableCell align="center" sx={{ color: '#f5f5f5', fontWeight: 'bold'}}>Total Tests</TableCell>
+                  <TableCell align="center" sx={{ color: '#f5f5f5', fontWeight: 'bold'}}>Job Latency p50 / p95</TableCell>
                   <TableCell align="center" sx={{ color: '#f5f5f5', fontWeight: 'bold' }}>Wrong Matches</TableCell>
                 </TableRow>
               </TableHead>
               <TableBody>
                 {loading ? (
                   <TableRow>
-                    <TableCell colSpan={6} align="center">
+                    <TableCell colSpan={7} align="center">
                       <CircularProgress sx={{ color: '#ff9800' }} />
                     </TableCell>
                   </TableRow>
                 ) : filteredData.length === 0 ? (
                   <TableRow>
-                    <TableCell colSpan={6} align="center" sx={{ color: '#f5f5f5' }}>
+                    <TableCell colSpan={7} align="center" sx={{ color: '#f5f5f5' }}>
                       No benchmark data available
                     </TableCell>
                   </TableRow>
@@ -327,12 +328,17 @@ function Leaderboard() {
                         />
                       </TableCell>
                       <TableCell align="center" sx={{ color: '#f5f5f5' }}>
-                        {row.total_tests || 0}
+                        {row.total_predictions || 0}
+                      </TableCell>
+                      <TableCell align="center" sx={{ color: '#f5f5f5' }}>
+                        {row.latency
+                          ? `${row.latency.total_seconds.p50.toFixed(1)}s / ${row.latency.total_seconds.p95.toFixed(1)}s`
+                          : 'N/A'}
                       </TableCell>
                       <TableCell align="center">
-                        {row.wrong_matches ? (
+                        {row.wrong_matches_count !== undefined ? (
                           <Chip 
-                            label={row.wrong_matches.length} 
+                            label={row.wrong_matches_count} 
                             size="small"
                             sx={{ 
                               backgroundColor: '#EF9A9A',
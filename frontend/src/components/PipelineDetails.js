@@ -20,7 +20,8 @@ import {
   CardHeader,
   IconButton,
   Link,
-  Breadcrumbs
+  Breadcrumbs,
+  TablePagination
 } from '@mui/material';
 import { Refresh as RefreshIcon, TrendingUp as TrendingUpIcon, ArrowBack as ArrowBackIcon } from '@mui/icons-material';
 import { useParams, useNavigate } from 'react-router-dom';
@@ -39,7 +40,7 @@ function PipelineDetails() {
   const fetchPipelineData = async () => {
     try {
       setLoading(true);
-      const response = await axios.get(`${API_BASE_URL}/benchmark/${pipelineName}`);
+      const response = await axios.get(`${API_BASE_URL}/benchmark/${pipelineName}`, { params: { summary: true } });
       setPipelineData(response.data.results);
       setError(null);
     } catch (err) {
@@ -54,15 +55,36 @@ function PipelineDetails() {
     fetchPipelineData();
   }, [pipelineName]);
 
-  // Separate correct and incorrect results
-  const [correctResults, setCorrectResults] = useState([]);
+  // Incorrect results are fetched one page at a time
   const [incorrectResults, setIncorrectResults] = useState([]);
+  const [incorrectTotal, setIncorrectTotal] = useState(0);
+  const [page, setPage] = useState(0);
+  const [rowsPerPage, setRowsPerPage] = useState(25);
 
-  useEffect(() => {
-    if (pipelineData && pipelineData.wrong_matches) {
-      setIncorrectResults(pipelineData.wrong_matches);
+  const fetchIncorrectResults = async () => {
+    try {
+      const response = await axios.get(`${API_BASE_URL}/benchmark/${pipelineName}/wrong_matches`, {
+        params: { offset: page * rowsPerPage, limit: rowsPerPage }
+      });
+      setIncorrectResults(response.data.wrong_matches);
+      setIncorrectTotal(response.data.total);
+    } catch (err) {
+      console.error('Error fetching incorrect results:', err);
     }
-  }, [pipelineData]);
+  };
+
+  useEffect(() => {
+    fetchIncorrectResults();
+  }, [pipelineName, page, rowsPerPage]);
+
+  const handleChangePage = (event, newPage) => {
+    setPage(newPage);
+  };
+
+  const handleChangeRowsPerPage = (event) => {
+    setRowsPerPage(parseInt(event.target.value, 10));
+    setPage(0);
+  };
 
   const handleBack = () => {
     navigate('/');
@@ -147,7 +169,7 @@ function PipelineDetails() {
                 variant="contained"
                 color="primary"
                 size="large"
-                onClick={fetchPipelineData}
+                onClick={() => { fetchPipelineData(); fetchIncorrectResults(); }}
                 disabled={loading}
                 startIcon={loading ? <CircularProgress size={20} /> : <RefreshIcon />}
                 sx={{
@@ -267,10 +289,11 @@ function PipelineDetails() {
             p: 2
           }}>
             <Typography variant="h5" sx={{ mb: 2, color: '#fff', fontWeight: 'bold' }}>
-              Incorrect Results ({pipelineData.wrong_matches ? pipelineData.wrong_matches.length : 0})
+              Incorrect Results ({pipelineData.wrong_matches_count || 0})
             </Typography>
             
-            {pipelineData.wrong_matches && pipelineData.wrong_matches.length > 0 ? (
+            {incorrectTotal > 0 ? (
+              <>
               <TableContainer>
                 <Table sx={{ minWidth: 650 }} aria-label="wrong matches table">
                   <TableHead>
@@ -286,9 +309,9 @@ function PipelineDetails() {
                     </TableRow>
                   </TableHead>
                   <TableBody>
-                    {pipelineData.wrong_matches.map((wrongMatch, index) => (
+                    {incorrectResults.map((wrongMatch, index) => (
                       <TableRow
-                        key={index}
+                        key={page * rowsPerPage + index}
                         sx={{
                           '&:nth-of-type(odd)': { backgroundColor: 'rgba(255, 255, 255, 0.05)' },
                           '&:nth-of-type(even)': { backgroundColor: 'rgba(255, 255, 255, 0.02)' },
@@ -348,6 +371,17 @@ function PipelineDetails() {
                   </TableBody>
                 </Table>
               </TableContainer>
+              <TablePagination
+                component="div"
+                count={incorrectTotal}
+                page={page}
+                onPageChange={handleChangePage}
+                rowsPerPage={rowsPerPage}
+                onRowsPerPageChange={handleChangeRowsPerPage}
+                rowsPerPageOptions={[25, 50, 100]}
+                sx={{ color: '#fff' }}
+              />
+              </>
             ) : (
               <Alert severity="info" sx={{ borderRadius: '10px' }}>
                 No incorrect results found. All predictions were correct!